@@ -1,8 +1,18 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 import os
+import random
+import tempfile
+import time
+import traceback
 from dotenv import load_dotenv
+from services.pool_monitor import (
+    InstrumentedQueuePool, InstrumentedAsyncQueuePool, SqlPoolMonitor, instrumented_async_pool,
+    sql_pool_monitor, async_sql_pool_monitor, mongo_pool_monitor, async_mongo_pool_monitor
+)
 
 load_dotenv()
 
@@ -12,23 +22,194 @@ host = os.getenv("POSTGRES_HOST", "localhost")
 port = os.getenv("POSTGRES_PORT", "5432")
 db_name = os.getenv("POSTGRES_DB", "escrow_db")
 
+# Optimistic concurrency: attempts for version-checked mutations before answering 409
+OPTIMISTIC_RETRY_ATTEMPTS = int(os.getenv("OPTIMISTIC_RETRY_ATTEMPTS", "3"))
+
 # Assuming local postgres without password for 'robert' or standard setup
 SQLALCHEMY_DATABASE_URL = f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{db_name}"
+
+# Connection pool (per worker process). Checkouts beyond pool_size + max_overflow wait up to
+# DB_POOL_TIMEOUT seconds; pre-ping drops connections the server or a proxy closed underneath us.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Backend profile: "server" (Postgres + MongoDB) or "embedded" (SQLite file + in-process document
+# store, services/docstore.py) for hermetic single-machine runs of the API and verify suite.
+BACKEND_PROFILE = os.getenv("BACKEND_PROFILE", "server").lower()
+EMBEDDED = BACKEND_PROFILE == "embedded"
+
+def _sqlite_path() -> str:
+    path = os.getenv("SQLITE_PATH", "escrow.db")
+    if path != ":memory:":
+        return os.path.abspath(path)
+    # Sync and async engines must see the same database, so "memory" is an ephemeral file
+    # on tmpfs where available rather than a per-connection :memory: database.
+    fd, path = tempfile.mkstemp(prefix="escrow-", suffix=".db", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    os.close(fd)
+    return path
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+if EMBEDDED:
+    SQLITE_PATH = _sqlite_path()
+    SQLALCHEMY_DATABASE_URL = f"sqlite:///{SQLITE_PATH}"
+    ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{SQLITE_PATH}"
+    _sqlite_connect_args = {"check_same_thread": False, "timeout": DB_POOL_TIMEOUT}
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=_sqlite_connect_args)
+    async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, connect_args=_sqlite_connect_args)
+
+    def _sqlite_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        # WAL: readers don't block the writer; busy_timeout: writers queue instead of failing
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(DB_POOL_TIMEOUT * 1000)}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    event.listen(engine, "connect", _sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+else:
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+    # Async engine for read/polling handlers (async def): waiting on Postgres no longer holds a
+    # threadpool thread. Writes still go through the sync engine above (see get_db).
+    # Same pool settings; each engine has its own pool.
+    async_engine = create_async_engine(
+        ASYNC_SQLALCHEMY_DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+sql_pool_monitor.attach(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_sql_pool_monitor.attach(async_engine.sync_engine)
+# expire_on_commit=False: results are serialized after the session closes, without lazy IO
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Read replicas (optional): comma-separated host[:port][/dbname], same credentials as the primary.
+# Read-only endpoints are routed here by services/read_router.py. Not used by the embedded profile.
+POSTGRES_REPLICA_HOSTS = [] if EMBEDDED else [
+    h.strip() for h in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",") if h.strip()
+]
+
+def _replica_url(entry: str) -> str:
+    hostport, _, name = entry.partition("/")
+    replica_host, _, replica_port = hostport.partition(":")
+    return f"postgresql+asyncpg://{user}:{password}@{replica_host}:{replica_port or port}/{name or db_name}"
+
+replica_pool_monitors = [SqlPoolMonitor() for _ in POSTGRES_REPLICA_HOSTS]
+replica_engines = [
+    create_async_engine(
+        _replica_url(entry),
+        poolclass=instrumented_async_pool(monitor),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+    for entry, monitor in zip(POSTGRES_REPLICA_HOSTS, replica_pool_monitors)
+]
+for monitor, replica_engine in zip(replica_pool_monitors, replica_engines):
+    monitor.attach(replica_engine.sync_engine)
+ReplicaSessionLocals = [async_sessionmaker(e, autoflush=False, expire_on_commit=False) for e in replica_engines]
 
 Base = declarative_base()
 
 def get_db():
+    """
+    Request-scoped unit of work. FastAPI caches dependencies per request, so auth and
+    the handler share this one session (one pooled connection, one transaction).
+    Handlers commit exactly once; anything that escapes is rolled back.
+    """
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
+async def get_async_db():
+    """Request-scoped AsyncSession for async handlers and auth. Read-only by convention."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def after_commit(db: Session, fn, *args, **kwargs):
+    """Defers a side effect (notifications, webhooks) until the session's transaction commits."""
+    db.info.setdefault("after_commit", []).append((fn, args, kwargs))
+
+def retry_on_conflict(db: Session, fn, attempts: int = None):
+    """
+    Runs a version-checked mutation, retrying from a clean session when another request
+    updated the same row first (StaleDataError from UPDATE ... WHERE id=? AND version=?).
+    fn must be re-runnable: it re-reads its rows, and must flush() the versioned UPDATE before
+    any non-transactional side effect (ledger writes), so a lost race leaves nothing behind.
+    """
+    attempts = attempts or OPTIMISTIC_RETRY_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except StaleDataError:
+            db.rollback()
+            if attempt == attempts:
+                raise
+            # Small jittered backoff so the racers don't collide again in lockstep
+            time.sleep(random.uniform(0, 0.01 * attempt))
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    for fn, args, kwargs in session.info.pop("after_commit", []):
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            # The transaction is already durable; a failed side effect must not fail the request.
+            traceback.print_exc()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit(session):
+    session.info.pop("after_commit", None)
+
 # MongoDB Connection
-from pymongo import MongoClient
-mongo_client = MongoClient("mongodb://localhost:27017/")
+from pymongo import AsyncMongoClient, MongoClient
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+
+if EMBEDDED:
+    from services.docstore import AsyncDocumentClient, DocumentClient
+    mongo_client = DocumentClient()
+    async_mongo_client = AsyncDocumentClient(mongo_client)
+else:
+    mongo_client = MongoClient(
+        MONGO_URL,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[mongo_pool_monitor]
+    )
+    # Native asyncio client (pymongo >= 4.10) for async reads; connects lazily on first use
+    async_mongo_client = AsyncMongoClient(
+        MONGO_URL,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[async_mongo_pool_monitor]
+    )
 mongo_db = mongo_client["escrow_ledger"]
 audit_collection = mongo_db["audit_logs"]
+async_audit_collection = async_mongo_client["escrow_ledger"]["audit_logs"]
@@ -1,52 +1,118 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+import hashlib
 
 import models, schemas, auth, database
+from services.principal_service import Principal, principal_cache, revocation_list
+from services.read_router import read_router, subject_from_request, pinned_to_primary
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_db():
-    db = database.SessionLocal()
-    try:
+# Same callable as main.get_db => one shared session per request
+get_db = database.get_db
+
+# Async routes resolve the principal on the async session (shared with the handler's get_async_db)
+get_async_db = database.get_async_db
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: a replica when configured, the primary for callers
+    that wrote within READ_STICKINESS_SECONDS (read-your-writes, by token subject or by the
+    read_primary cookie set on the write response).
+    """
+    async with read_router.session(subject_from_request(request), pinned_to_primary(request)) as db:
         yield db
-    finally:
-        db.close()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _credentials_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _authenticate(token: str):
+    """
+    Verifies the token. Returns (principal, username): the principal when the signed claims
+    (stateless mode) or the principal cache settle it, otherwise None and the subject to load.
+    """
     try:
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-        try:
-            payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
-            username: str = payload.get("sub")
-            if username is None:
-                raise credentials_exception
-            token_data = schemas.TokenData(username=username, role=payload.get("role"))
-        except JWTError:
-            raise credentials_exception
-        
-        user = db.query(models.User).filter(models.User.username == token_data.username).first()
-        if user is None:
-            raise credentials_exception
-        return user
+        payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+        username: str = payload.get("sub")
+        if username is None:
+            raise _credentials_exception()
+        token_data = schemas.TokenData(username=username, role=payload.get("role"))
+    except JWTError:
+        raise _credentials_exception()
+
+    # Stateless mode: signed claims + revocation list, zero DB queries
+    if auth.STATELESS_AUTH and token_data.role:
+        if revocation_list.is_revoked(token_data.username, payload.get("iat")):
+            raise _credentials_exception()
+        return Principal(
+            id=payload.get("uid"),
+            username=token_data.username,
+            role=models.UserRole(token_data.role),
+            organization_id=payload.get("org")
+        ), token_data.username
+
+    # Principal cache: hits never touch the users table
+    return principal_cache.get(token_data.username), token_data.username
+
+def _principal_for(user: Optional[models.User]) -> Principal:
+    if user is None:
+        raise _credentials_exception()
+    principal = Principal.from_user(user)
+    principal_cache.put(principal)
+    return principal
+
+def _active(principal: Principal) -> Principal:
+    if principal.is_active is False:
+        raise _credentials_exception()
+    return principal
+
+def _auth_error(e: Exception) -> HTTPException:
+    import traceback
+    traceback.print_exc()
+    return HTTPException(status_code=500, detail=f"Auth Error: {str(e)}")
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    try:
+        principal, username = _authenticate(token)
+        if principal is None:
+            result = await db.execute(select(models.User).where(models.User.username == username))
+            principal = _principal_for(result.scalar_one_or_none())
+        return _active(principal)
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Auth Error: {str(e)}")
+        raise _auth_error(e)
+
+def get_current_user_sync(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    get_current_user for routes that take get_db: a cache miss loads the user on the request's
+    own session, so the route holds one pooled connection, not a sync and an async one.
+    """
+    try:
+        principal, username = _authenticate(token)
+        if principal is None:
+            result = db.execute(select(models.User).where(models.User.username == username))
+            principal = _principal_for(result.scalar_one_or_none())
+        return _active(principal)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _auth_error(e)
 
 class RoleChecker:
     def __init__(self, allowed_roles: List[models.UserRole]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, user: models.User = Depends(get_current_user)):
+    def check(self, user: Principal) -> Principal:
         if user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, 
@@ -54,9 +120,21 @@ class RoleChecker:
             )
         return user
 
+    # async: no IO here, so FastAPI should not hop to the threadpool for it
+    async def __call__(self, user: Principal = Depends(get_current_user)):
+        return self.check(user)
+
+class SyncRoleChecker(RoleChecker):
+    async def __call__(self, user: Principal = Depends(get_current_user_sync)):
+        return self.check(user)
+
 def require_role(roles: List[models.UserRole]):
     return RoleChecker(roles)
 
+def require_role_sync(roles: List[models.UserRole]):
+    """require_role for routes that take get_db (see get_current_user_sync)."""
+    return SyncRoleChecker(roles)
+
 # State & Hash Validation Helpers
 def validate_escrow_state(escrow: models.Escrow, allowed_states: List[models.EscrowState]):
     if escrow.state not in allowed_states:
@@ -81,3 +159,23 @@ def validate_one_time_custody(escrow: models.Escrow):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Funds already confirmed or state invalid."
         )
+
+# Conditional GET Helpers (ETag / If-None-Match)
+def make_etag(*parts) -> str:
+    """Strong ETag from cheap version markers (never from the serialized body)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # Clients may cache but must revalidate every time (cheap 304s)
+    response.headers["Cache-Control"] = "private, no-cache"
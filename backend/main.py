@@ -1,5 +1,10 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Response, Request
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Any
 import uuid
 import datetime
@@ -13,21 +18,62 @@ from services.notification_service import notification_service
 import models, schemas, database, dependencies
 from services.notification_service import notification_service
 from services.payment_service import payment_service
+from services.webhook_service import webhook_service, InvalidWebhookURL
+from services.hashing_service import hashing_pool, HashingPoolSaturated
 from services import template_service
-
-
-
-models.Base.metadata.create_all(bind=database.engine)
+from services import escrow_query_service
+from services import summary_service # registers the portfolio summary flush hook
+from services import bulk_import_service
+from services import evidence_service
+from services import upload_session_service
+from services import evidence_storage
+from services import preview_service
+from services import metadata_service
+from services import ledger_service
+from services.evidence_pool import evidence_pool, warn_missing_libraries
+from services.escrow_cache import escrow_cache
+from services.serialization import FastJSONResponse
+from services.read_router import read_router, subject_from_request, pinned_to_primary, WRITE_METHODS
+import migrations
 
 app = FastAPI(title="Escrow Rule Engine API")
 
 @app.on_event("startup")
 def startup_event():
+    # Schema changes are applied by `python migrate.py upgrade`; here we only compare versions.
+    # The embedded profile owns its throwaway SQLite file, so it migrates itself.
+    if database.EMBEDDED:
+        migrations.upgrade(database.engine, echo=lambda *_: None)
+    migrations.check_schema(database.engine)
+    ledger_service.ensure_indexes()
     db = database.SessionLocal()
     try:
         template_service.seed_templates(db)
+        warn_missing_libraries()
+        preview_service.resume(db)
+        metadata_service.resume(db)
     finally:
         db.close()
+    if auth.STATELESS_AUTH:
+        dependencies.revocation_list.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    evidence_pool.shutdown()
+
+@app.exception_handler(StaleDataError)
+def stale_data_handler(request: Request, exc: StaleDataError):
+    # Optimistic lock lost (after retries, where the handler retries at all)
+    return JSONResponse(status_code=409, content={"detail": "Escrow was modified concurrently. Reload and try again."})
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    # A successful write pins the caller's reads to the primary for a short window
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        read_router.mark_write(subject_from_request(request))
+        read_router.pin_response(response)
+    return response
 
 @app.get("/health_check_new")
 def health_check_new():
@@ -35,25 +81,27 @@ def health_check_new():
 
 from fastapi.middleware.cors import CORSMiddleware
 
+# Size cap + stall timeout for multipart bodies, enforced while the body is still arriving
+# (added before CORS so CORS stays outermost and early 413s still carry its headers)
+app.add_middleware(evidence_service.UploadLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # mount uploads directory
 os.makedirs("uploads", exist_ok=True)
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
-# Dependency
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Dependency: request-scoped unit of work for writes (sync handlers)
+get_db = database.get_db
+# Dependency: request-scoped async session for read/polling handlers (shared with dependencies.get_current_user)
+get_async_db = database.get_async_db
 
 import hashlib
 import json
@@ -65,7 +113,7 @@ import json
 # ... imports
 from pymongo import MongoClient
 from database import audit_collection, mongo_client, mongo_db
-from services.ledger_service import create_attestation, calculate_hash
+from services.ledger_service import create_attestation, calculate_hash, list_attestations
 
 # MongoDB Connection (Moved to database.py)
 # mongo_client = MongoClient("mongodb://localhost:27017/")
@@ -87,9 +135,19 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 # ...
 
 @app.post("/token", response_model=schemas.Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # Keep the event loop free: async DB lookup, bcrypt on the bounded hashing pool
+    result = await db.execute(select(models.User).where(models.User.username == form_data.username))
+    user = result.scalar_one_or_none()
+    try:
+        valid = user is not None and await hashing_pool.verify_password(form_data.password, user.hashed_password)
+    except HashingPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login temporarily unavailable. Please retry.",
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -97,34 +155,21 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
     access_token_expires = datetime.timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.username, "role": user.role}, expires_delta=access_token_expires
+        data={"sub": user.username, "role": user.role, "uid": user.id, "org": user.organization_id},
+        expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/audit-logs", response_model=List[schemas.AuditLogRead])
-
-def get_audit_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    # Read from MongoDB
-    logs_cursor = audit_collection.find().sort("timestamp", -1).skip(skip).limit(limit)
-    
-    results = []
-    for l in logs_cursor:
-        results.append({
-            "entity_id": l["entity_id"],
-            "event_type": l["event_type"],
-            "actor_id": l["actor_id"],
-            "event_data": l["event_data"],
-            "timestamp": l["timestamp"],
-            "previous_hash": l["previous_hash"],
-            "current_hash": l["current_hash"]
-        })
-    return results
+async def get_audit_logs(skip: int = 0, limit: int = 100):
+    # Read from MongoDB (async client); projected ledger docs go straight to JSON bytes
+    return FastJSONResponse(await list_attestations(skip, limit))
 
 @app.post("/escrows", response_model=schemas.Escrow)
 def create_escrow(
     escrow: schemas.EscrowCreate, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.AGENT]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.AGENT]))
 ):
     try:
         # 0. Terms Extraction
@@ -145,24 +190,24 @@ def create_escrow(
             state=models.EscrowState.CREATED,
             version=1,
             agreement_hash=agreement_hash,
-            funded_amount=0.0
+            funded_amount=0.0,
+            organization_id=current_user.organization_id
         )
         db.add(db_escrow)
-        db.commit()
-        db.commit()
-        db.refresh(db_escrow)
+        db.flush() # assign ID (single commit below)
 
         # 3. Create Milestones
         # Logic Change: If milestones are empty (e.g. for Template use), just skip this loop.
         # The frontend/logic requesting template use will send empty milestones list, 
         # then call apply-template.
-        for ms in escrow.milestones:
+        for position, ms in enumerate(escrow.milestones):
             db_milestone = models.Milestone(
                 escrow_id=db_escrow.id,
                 name=ms.name,
                 amount=ms.amount,
                 required_evidence_types=ms.required_evidence_types,
-                status=models.MilestoneStatus.CREATED # Initial start as CREATED (waiting for first fund)
+                status=models.MilestoneStatus.CREATED, # Initial start as CREATED (waiting for first fund)
+                position=position
             )
             db.add(db_milestone)
         
@@ -170,34 +215,62 @@ def create_escrow(
         # Attributed to the Authenticated Agent
         create_attestation(db, db_escrow.id, models.AuditEvent.CREATE, current_user.username, current_user.role, terms_data, agreement_hash, 1)
         
-        db.commit()
-        db.refresh(db_escrow)
-        
         # Notify Custodian
-        notification_service.emit_notification(
+        database.after_commit(db, notification_service.emit_notification,
             event_type=models.AuditEvent.CREATE,
             escrow_id=db_escrow.id,
             actor_role=current_user.role,
             data={"users": {"CUSTODIAN": "title_co", "AGENT": "alice_agent"}}
         )
         
-        return db_escrow
+        escrow_id = db_escrow.id
+        db.commit()
+        
+        return escrow_query_service.get_escrow_graph(db, escrow_id)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/escrows/bulk")
+async def bulk_create_escrows(
+    request: Request,
+    current_user: models.User = Depends(dependencies.require_role([models.UserRole.AGENT]))
+):
+    """
+    Bulk import: a JSON array of EscrowCreate bodies, a CSV upload (multipart field `file`), or a
+    raw text/csv body. Responds with NDJSON, one result per input row as its chunk commits:
+    {"row", "ref", "status": "created", "id", "agreement_hash"} or {"row", "ref", "status": "error", "errors"}.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            upload = (await request.form()).get("file")
+            if upload is None or isinstance(upload, str):
+                raise bulk_import_service.BulkImportError("Expected a CSV file in the `file` field")
+            rows = bulk_import_service.parse_csv((await upload.read()).decode("utf-8-sig"))
+        elif content_type.startswith("text/csv"):
+            rows = bulk_import_service.parse_csv((await request.body()).decode("utf-8-sig"))
+        else:
+            rows = bulk_import_service.parse_json(await request.json())
+    except (bulk_import_service.BulkImportError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Sync generator: Starlette iterates it in the threadpool, off the event loop
+    results = bulk_import_service.import_escrows(rows, current_user)
+    return StreamingResponse(bulk_import_service.ndjson(results), media_type="application/x-ndjson")
+
 @app.get("/templates", response_model=List[schemas.MilestoneTemplateResponse])
-def list_templates(db: Session = Depends(get_db)):
+async def list_templates(db: AsyncSession = Depends(dependencies.get_read_db)):
     """List all available milestone templates."""
-    return template_service.get_all_templates(db)
+    return await template_service.get_all_templates_async(db)
 
 @app.post("/escrows/{escrow_id}/apply-template")
 def apply_template_to_escrow(
     escrow_id: str,
     request: schemas.ApplyTemplateRequest,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.AGENT]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.AGENT]))
 ):
     """
     Apply a standardized milestone template to a newly created Escrow.
@@ -205,25 +278,74 @@ def apply_template_to_escrow(
     return template_service.apply_template(db, escrow_id, request.template_id, current_user)
 
 @app.get("/escrows", response_model=List[schemas.Escrow])
-def read_escrows(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    escrows = db.query(models.Escrow).offset(skip).limit(limit).all()
+async def read_escrows(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    state: Optional[models.EscrowState] = None,
+    buyer_id: Optional[str] = None,
+    provider_id: Optional[str] = None,
+    milestone_status: Optional[models.MilestoneStatus] = None,
+    db: AsyncSession = Depends(dependencies.get_read_db)
+):
+    """
+    Cursor-paginated escrow list (newest first). Pass the X-Next-Cursor response
+    header back as `cursor` to fetch the next page; it is absent on the last page.
+    """
+    limit = max(1, min(limit, 500))
+    try:
+        # Whole graph in a fixed number of queries (no per-escrow / per-milestone lazy loads),
+        # projected to response-shaped dicts and encoded without response_model re-validation
+        escrows, next_cursor = await escrow_query_service.list_escrow_rows_async(
+            db, limit, cursor, state, buyer_id, provider_id, milestone_status
+        )
+    except escrow_query_service.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     # Simple migration/shim: if funded_amount is None (old records), assume equal to total for FUNDED/ACTIVE
     # But for new logic we rely on default=0.0
-    return escrows
+    return FastJSONResponse(escrows, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 @app.get("/escrows/{escrow_id}", response_model=schemas.Escrow)
-def read_escrow(escrow_id: str, db: Session = Depends(get_db)):
-    db_escrow = db.query(models.Escrow).filter(models.Escrow.id == escrow_id).first()
-    if db_escrow is None:
-        raise HTTPException(status_code=404, detail="Escrow not found")
-    return db_escrow
+async def read_escrow(
+    escrow_id: str,
+    request: Request,
+    if_none_match: Optional[str] = Header(None)
+):
+    # Hot path: serialized graph + ETag from the read-through cache, no database round trip
+    cached = escrow_cache.get(escrow_id)
+    if cached is not None:
+        etag, body = cached
+        if dependencies.etag_matches(if_none_match, etag):
+            return dependencies.not_modified(etag)
+        response = Response(content=body, media_type="application/json")
+        dependencies.set_etag(response, etag)
+        return response
+
+    token = escrow_cache.token() # taken before reading, so a racing commit voids the fill
+    async with read_router.session(subject_from_request(request), pinned_to_primary(request)) as db:
+        # Conditional GET: check the version markers first (single narrow row, no graph load)
+        stamp = await escrow_query_service.get_escrow_stamp_async(db, escrow_id)
+        if stamp is None:
+            raise HTTPException(status_code=404, detail="Escrow not found")
+        etag = dependencies.make_etag("escrow", escrow_id, stamp.version, stamp.updated_at)
+        if dependencies.etag_matches(if_none_match, etag):
+            return dependencies.not_modified(etag)
+
+        db_escrow = await escrow_query_service.get_escrow_graph_async(db, escrow_id)
+        body = schemas.to_json(schemas.from_orm(schemas.Escrow, db_escrow))
+        # Replica rows may predate the last invalidation; only primary reads fill the cache
+        if "read_replica" not in db.info:
+            escrow_cache.put(escrow_id, token, etag, body)
+
+    response = Response(content=body, media_type="application/json")
+    dependencies.set_etag(response, etag)
+    return response
 
 @app.post("/milestones/{milestone_id}/evidence", response_model=schemas.Evidence)
 def upload_evidence(
     milestone_id: str, 
     evidence: schemas.EvidenceCreate, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.CONTRACTOR]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.CONTRACTOR]))
 ):
     db_milestone = db.query(models.Milestone).filter(models.Milestone.id == milestone_id).first()
     if not db_milestone:
@@ -255,13 +377,12 @@ def upload_evidence(
     # Update status if pending
     if db_milestone.status == models.MilestoneStatus.PENDING:
         db_milestone.status = models.MilestoneStatus.EVIDENCE_SUBMITTED
-        
-    db.commit()
-    db.refresh(db_evidence)
     
     # Audit Log
     create_attestation(db, db_milestone.escrow_id, models.AuditEvent.UPLOAD_EVIDENCE, current_user.username, current_user.role, {"milestone_id": milestone_id, "type": evidence.evidence_type}, db_escrow.agreement_hash, db_escrow.version)
     
+    db.commit()
+    db.refresh(db_evidence)
     return db_evidence
 
 @app.post("/escrows/{escrow_id}/confirm_funds", response_model=schemas.Escrow)
@@ -269,8 +390,13 @@ def confirm_funds(
     escrow_id: str, 
     confirmation: schemas.FundConfirmation, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.CUSTODIAN]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.CUSTODIAN]))
 ):
+    # Read-then-write on funded_amount: version-checked, retried if another request wins the race
+    database.retry_on_conflict(db, lambda: _confirm_funds(db, escrow_id, confirmation, current_user))
+    return escrow_query_service.get_escrow_graph(db, escrow_id)
+
+def _confirm_funds(db: Session, escrow_id: str, confirmation: schemas.FundConfirmation, current_user):
     db_escrow = db.query(models.Escrow).filter(models.Escrow.id == escrow_id).first()
     if not db_escrow:
         raise HTTPException(status_code=404, detail="Escrow not found")
@@ -291,6 +417,7 @@ def confirm_funds(
     if is_initial:
         dependencies.validate_one_time_custody(db_escrow)
         db_escrow.state = models.EscrowState.FUNDED
+        db_escrow.custodian_organization_id = current_user.organization_id
     else:
         # Delta Funding Validation
         if db_escrow.state not in [models.EscrowState.FUNDED, models.EscrowState.ACTIVE]:
@@ -313,31 +440,31 @@ def confirm_funds(
     if not db_escrow.agreement_hash:
         raise HTTPException(status_code=500, detail="Agreement Integrity Error")
 
+    # Version check happens here; the ledger is only written once we hold the row
+    db.flush()
+
     create_attestation(db, escrow_id, models.AuditEvent.CONFIRM_FUNDS, current_user.username, current_user.role, {
         "code": confirmation.confirmation_code,
         "delta_confirmed": delta,
         "new_funded_amount": db_escrow.funded_amount
     }, db_escrow.agreement_hash, db_escrow.version)
     
-    db.commit()
-    db.refresh(db_escrow)
-    
     # Notify Agent
-    notification_service.emit_notification(
+    database.after_commit(db, notification_service.emit_notification,
         event_type=models.AuditEvent.CONFIRM_FUNDS,
         escrow_id=db_escrow.id,
         actor_role=current_user.role,
         data={"users": {"AGENT": "alice_agent"}}
     )
     
-    return db_escrow
+    db.commit()
 
 @app.post("/milestones/{milestone_id}/approve", response_model=schemas.Milestone)
 def approve_milestone(
     milestone_id: str, 
     approval: schemas.ApprovalRequest, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.INSPECTOR]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.INSPECTOR]))
 ):
     db_milestone = db.query(models.Milestone).filter(models.Milestone.id == milestone_id).first()
     if not db_milestone:
@@ -385,11 +512,8 @@ def approve_milestone(
     # Replaces the dummy 'generate_instruction_internal'
     payment_service.create_instruction(db, milestone_id)
     
-    db.commit()
-    db.refresh(db_milestone)
-    
     # Notify Participants (Agent & Contractor)
-    notification_service.emit_notification(
+    database.after_commit(db, notification_service.emit_notification,
        event_type=models.AuditEvent.PAYMENT_RELEASED,
        escrow_id=db_escrow.id,
        milestone_id=milestone_id,
@@ -400,6 +524,9 @@ def approve_milestone(
        }}
     )
     
+    db.commit()
+    db.refresh(db_milestone)
+    
     return db_milestone
 
 
@@ -409,69 +536,74 @@ def change_budget(
     escrow_id: str,
     change_req: schemas.ChangeBudgetRequest,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.AGENT, models.UserRole.ADMIN]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.AGENT, models.UserRole.ADMIN]))
 ):
     try:
-        """
-        Append-Only Budget Increase (Change Order v1).
-        Adds new milestone, increases Total, keeps Funded same (creating a Delta).
-        Does NOT reset state.
-        """
-        db_escrow = db.query(models.Escrow).filter(models.Escrow.id == escrow_id).first()
-        if not db_escrow:
-            raise HTTPException(status_code=404, detail="Escrow not found")
-            
-        if db_escrow.state == models.EscrowState.COMPLETED: # or PAID
-             raise HTTPException(status_code=400, detail="Cannot change budget of fully PAID escrow.")
-
-        if change_req.amount_delta <= 0:
-            raise HTTPException(status_code=400, detail="Amount delta must be positive.")
-
-        # 1. Append New Milestone (Status = CREATED)
-        # This effectively "parks" the work until funded.
-        new_milestone = models.Milestone(
-            escrow_id=db_escrow.id,
-            name=change_req.milestone_name,
-            amount=change_req.amount_delta,
-            required_evidence_types=[change_req.evidence_type],
-            status=models.MilestoneStatus.CREATED 
-        )
-        db.add(new_milestone)
-        db.flush() # get ID
-
-        # 2. Update Total Amount (Funded Amount stays same -> Logic Gap created)
-        db_escrow.total_amount += change_req.amount_delta
-        
-        # 3. Audit Log
-        # We link to the specific new milestone ID
-        create_attestation(db, escrow_id, models.AuditEvent.CHANGE_ORDER_ADDED, current_user.username, current_user.role, 
-            {
-                "delta_amount": change_req.amount_delta,
-                "milestone_id": new_milestone.id,
-                "milestone_name": new_milestone.name,
-                "prev_hash": db_escrow.agreement_hash # Linking to current state
-            }, db_escrow.agreement_hash, db_escrow.version)
-        
-        db.commit()
-        db.refresh(db_escrow)
-        
-        # Notify funds required (Agent) - wait, this adds milestone but usually requires funding confirmation?
-        # The prompt says: "FUNDS_REQUIRED -> Client / Agent". This corresponds to CHANGE_ORDER_BUDGET.
-        notification_service.emit_notification(
-            event_type=models.AuditEvent.CHANGE_ORDER_BUDGET,
-            escrow_id=escrow_id,
-            actor_role=current_user.role,
-            data={"users": {"AGENT": "alice_agent"}, "delta_amount": change_req.amount_delta}
-        )
-        
-        return db_escrow
-    except HTTPException:
+        # total_amount += delta: version-checked, retried if another request wins the race
+        database.retry_on_conflict(db, lambda: _change_budget(db, escrow_id, change_req, current_user))
+        return escrow_query_service.get_escrow_graph(db, escrow_id)
+    except (HTTPException, StaleDataError):
         raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+def _change_budget(db: Session, escrow_id: str, change_req: schemas.ChangeBudgetRequest, current_user):
+    """
+    Append-Only Budget Increase (Change Order v1).
+    Adds new milestone, increases Total, keeps Funded same (creating a Delta).
+    Does NOT reset state.
+    """
+    db_escrow = db.query(models.Escrow).filter(models.Escrow.id == escrow_id).first()
+    if not db_escrow:
+        raise HTTPException(status_code=404, detail="Escrow not found")
+        
+    if db_escrow.state == models.EscrowState.COMPLETED: # or PAID
+         raise HTTPException(status_code=400, detail="Cannot change budget of fully PAID escrow.")
+
+    if change_req.amount_delta <= 0:
+        raise HTTPException(status_code=400, detail="Amount delta must be positive.")
+
+    # 1. Append New Milestone (Status = CREATED)
+    # This effectively "parks" the work until funded.
+    new_milestone = models.Milestone(
+        escrow_id=db_escrow.id,
+        name=change_req.milestone_name,
+        amount=change_req.amount_delta,
+        required_evidence_types=[change_req.evidence_type],
+        status=models.MilestoneStatus.CREATED,
+        position=models.next_milestone_position(db, db_escrow.id)
+    )
+    db.add(new_milestone)
+
+    # 2. Update Total Amount (Funded Amount stays same -> Logic Gap created)
+    db_escrow.total_amount += change_req.amount_delta
+
+    # Version check happens here (also assigns the milestone ID); ledger is written only after it
+    db.flush()
+    
+    # 3. Audit Log
+    # We link to the specific new milestone ID
+    create_attestation(db, escrow_id, models.AuditEvent.CHANGE_ORDER_ADDED, current_user.username, current_user.role, 
+        {
+            "delta_amount": change_req.amount_delta,
+            "milestone_id": new_milestone.id,
+            "milestone_name": new_milestone.name,
+            "prev_hash": db_escrow.agreement_hash # Linking to current state
+        }, db_escrow.agreement_hash, db_escrow.version)
+    
+    # Notify funds required (Agent) - wait, this adds milestone but usually requires funding confirmation?
+    # The prompt says: "FUNDS_REQUIRED -> Client / Agent". This corresponds to CHANGE_ORDER_BUDGET.
+    database.after_commit(db, notification_service.emit_notification,
+        event_type=models.AuditEvent.CHANGE_ORDER_BUDGET,
+        escrow_id=escrow_id,
+        actor_role=current_user.role,
+        data={"users": {"AGENT": "alice_agent"}, "delta_amount": change_req.amount_delta}
+    )
+    
+    db.commit()
+
 @app.get("/audit-logs", response_model=List[schemas.AuditLogRead])
 def get_audit_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     # Return logs ordered by timestamp (descending) to show latest activity first
@@ -494,7 +626,7 @@ def get_audit_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db
     ]
 
 @app.post("/escrows/{escrow_id}/dispute", response_model=schemas.Escrow)
-def dispute_escrow(escrow_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+def dispute_escrow(escrow_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(dependencies.get_current_user_sync)):
     db_escrow = db.query(models.Escrow).filter(models.Escrow.id == escrow_id).first()
     if not db_escrow:
         raise HTTPException(status_code=404, detail="Escrow not found")
@@ -506,24 +638,23 @@ def dispute_escrow(escrow_id: str, db: Session = Depends(get_db), current_user:
     create_attestation(db, escrow_id, models.AuditEvent.DISPUTE, current_user.username, current_user.role, 
         {"reason": "Manual Dispute Triggered"}, db_escrow.agreement_hash, db_escrow.version)
     
-    db.commit()
-    db.refresh(db_escrow)
-    
     # Notify Dispute
-    notification_service.emit_notification(
+    database.after_commit(db, notification_service.emit_notification,
         event_type=models.AuditEvent.DISPUTE,
         escrow_id=escrow_id,
         actor_role=current_user.role,
         data={"users": {"AGENT": "alice_agent", "INSPECTOR": "rob_inspector", "CUSTODIAN": "title_co"}}
     )
     
-    return db_escrow
+    db.commit()
+    
+    return escrow_query_service.get_escrow_graph(db, escrow_id)
 
 @app.post("/milestones/{milestone_id}/dispute", response_model=schemas.Milestone)
 def raise_milestone_dispute(
     milestone_id: str,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.AGENT, models.UserRole.INSPECTOR, models.UserRole.CUSTODIAN]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.AGENT, models.UserRole.INSPECTOR, models.UserRole.CUSTODIAN]))
 ):
     db_milestone = db.query(models.Milestone).filter(models.Milestone.id == milestone_id).first()
     if not db_milestone:
@@ -547,11 +678,8 @@ def raise_milestone_dispute(
         "milestone_name": db_milestone.name
     }, db_escrow.agreement_hash, db_escrow.version)
     
-    db.commit()
-    db.refresh(db_milestone)
-    
     # Notify Dispute Raised
-    notification_service.emit_notification(
+    database.after_commit(db, notification_service.emit_notification,
         event_type=models.AuditEvent.DISPUTE,
         escrow_id=db_escrow.id,
         milestone_id=milestone_id,
@@ -559,6 +687,9 @@ def raise_milestone_dispute(
         data={"users": {"AGENT": "alice_agent", "INSPECTOR": "rob_inspector", "CUSTODIAN": "title_co"}}
     )
     
+    db.commit()
+    db.refresh(db_milestone)
+    
     return db_milestone
 
 @app.post("/milestones/{milestone_id}/resolve-dispute", response_model=schemas.Milestone)
@@ -566,7 +697,7 @@ def resolve_milestone_dispute(
     milestone_id: str,
     resolution: schemas.DisputeResolutionRequest,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.AGENT, models.UserRole.INSPECTOR, models.UserRole.CUSTODIAN]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.AGENT, models.UserRole.INSPECTOR, models.UserRole.CUSTODIAN]))
 ):
     db_milestone = db.query(models.Milestone).filter(models.Milestone.id == milestone_id).first()
     if not db_milestone:
@@ -600,7 +731,7 @@ def resolve_milestone_dispute(
         }, db_escrow.agreement_hash, db_escrow.version)
         
         # Notify Cancelled
-        notification_service.emit_notification(
+        database.after_commit(db, notification_service.emit_notification,
             event_type=models.AuditEvent.MILESTONE_CANCELLED,
             escrow_id=db_escrow.id,
             milestone_id=milestone_id,
@@ -620,20 +751,28 @@ def reset_system(db: Session = Depends(get_db)):
     # 1. Clear Mongo (Ledger & Notifications)
     audit_collection.delete_many({})
     notification_service.notification_collection.delete_many({})
+    notification_service.watermark_collection.delete_many({})
+    webhook_service.dead_letter_collection.delete_many({})
     
     # 2. Clear Postgres (State)
     # Delete in order of dependencies (Child -> Parent)
+    db.query(models.UploadChunk).delete()
+    db.query(models.UploadSession).delete()
     db.query(models.Evidence).delete()
+    db.query(models.EvidenceBlob).delete()
     db.query(models.PaymentInstruction).delete()
     db.query(models.Milestone).delete()
     db.query(models.Escrow).delete()
+    db.query(models.PortfolioSummary).delete() # bulk deletes bypass the summary flush hook too
     
     db.commit()
+    escrow_cache.clear() # bulk deletes bypass the flush hook
 
     # 3. Clear Local Files
-    # Delete all files in 'uploads/' but keep the directory
-    folder = 'uploads'
-    if os.path.exists(folder):
+    # Delete all files in 'uploads/' (and unfinished upload sessions) but keep the directories
+    for folder in ('uploads', upload_session_service.UPLOAD_SESSION_DIR):
+        if not os.path.exists(folder):
+            continue
         for filename in os.listdir(folder):
             file_path = os.path.join(folder, filename)
             try:
@@ -646,62 +785,46 @@ def reset_system(db: Session = Depends(get_db)):
 
     return {"message": "System Reset Complete"}
 
-@app.post("/milestones/{id}/external-evidence", response_model=schemas.Evidence)
-def attach_external_evidence(
-    id: str,
-    source_type: schemas.EvidenceSourceType = Form(...),
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.get_current_user)
-):
-    # 1. RBAC: Only Inspector, Agent, Custodian
-    if current_user.role == models.UserRole.CONTRACTOR:
-        raise HTTPException(status_code=403, detail="Contractors cannot submit third-party external evidence.")
-    
-    # 2. Get Milestone
+def _external_evidence_milestone(db: Session, id: str) -> models.Milestone:
     milestone = db.query(models.Milestone).filter(models.Milestone.id == id).first()
     if not milestone:
         raise HTTPException(status_code=404, detail="Milestone not found")
-        
-    db_escrow = milestone.escrow
-    
-    # 3. Validation: Status Checks
     if milestone.status in [models.MilestoneStatus.DISPUTED, models.MilestoneStatus.PAID, models.MilestoneStatus.CANCELLED]:
         raise HTTPException(status_code=400, detail="Cannot attach evidence to this milestone state.")
-        
-    # 4. Handle File Upload
-    # Verify extension (basic check)
-    filename = file.filename.lower()
-    if not (filename.endswith('.pdf') or filename.endswith('.jpg') or filename.endswith('.png') or filename.endswith('.jpeg')):
-        raise HTTPException(status_code=400, detail="Only PDF, JPG, and PNG files are allowed.")
-        
-    # Generate safe filename
-    safe_filename = f"{id}_{uuid.uuid4()}_{file.filename}"
-    file_path = os.path.join("uploads", safe_filename)
-    
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
-        
-    # Generate URL (Localhost for MVP)
-    file_url = f"http://localhost:8000/uploads/{safe_filename}"
-    
-    # 5. Create Evidence Record (ADDITIVE ONLY)
+    return milestone
+
+def _attach_blob(db: Session, evidence: models.Evidence, stored: evidence_service.StoredFile):
+    # Counts the reference and picks up (or queues, after commit) the blob's preview and metadata
+    blob = evidence_service.add_reference(db, stored)
+    preview_service.attach(db, evidence, stored.storage_key, stored.filename, blob)
+    metadata_service.attach(db, evidence, stored.storage_key, stored.filename, blob)
+
+def _record_external_evidence(db: Session, id: str, source_type, stored: evidence_service.StoredFile, current_user: models.User,
+                              evidence_id: str = None):
+    # Re-check: the milestone may have moved while the file was streaming
+    milestone = _external_evidence_milestone(db, id)
+    db_escrow = milestone.escrow
+
+    # Create Evidence Record (ADDITIVE ONLY)
+    evidence_id = evidence_id or str(uuid.uuid4())
+    file_url = evidence_storage.evidence_url(evidence_id)
     new_evidence = models.Evidence(
+        id=evidence_id,
         milestone_id=id,
         evidence_type="External Attestation", # Label
         url=file_url,
         origin=models.EvidenceOrigin.THIRD_PARTY,
         source_type=source_type,
-        submitted_by_role=current_user.role
+        submitted_by_role=current_user.role,
+        sha256=stored.sha256,
+        size_bytes=stored.size_bytes
     )
     db.add(new_evidence)
-    
-    # 6. Log to Ledger (EVIDENCE_ATTESTED)
+    _attach_blob(db, new_evidence, stored)
+
+    # Log to Ledger (EVIDENCE_ATTESTED)
     create_attestation(
-        db, 
+        db,
         entity_id=db_escrow.id,
         event_type=models.AuditEvent.EVIDENCE_ATTESTED,
         actor_username=current_user.username,
@@ -710,92 +833,90 @@ def attach_external_evidence(
             "milestone_id": id,
             "origin": "THIRD_PARTY",
             "source_type": source_type,
-            "url": file_url
+            "url": file_url,
+            "sha256": stored.sha256,
+            "size_bytes": stored.size_bytes
         },
         agreement_hash=db_escrow.agreement_hash,
         agreement_version=db_escrow.version
     )
-    
-    db.commit()
-    db.refresh(new_evidence)
-    
+
     # Notify External Evidence
-    notification_service.emit_notification(
+    database.after_commit(db, notification_service.emit_notification,
         event_type=models.AuditEvent.EVIDENCE_ATTESTED,
         escrow_id=db_escrow.id,
         milestone_id=id,
         actor_role=current_user.role,
         data={"users": {"AGENT": "alice_agent"}}
     )
-    
+
+    db.commit()
+    db.refresh(new_evidence)
     return new_evidence
 
-@app.post("/milestones/{id}/evidence/upload", response_model=schemas.Evidence)
-def upload_contractor_evidence(
+@app.post("/milestones/{id}/external-evidence", response_model=schemas.Evidence)
+async def attach_external_evidence(
     id: str,
-    evidence_type: str = Form(...),
     source_type: schemas.EvidenceSourceType = Form(...),
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.CONTRACTOR]))
+    current_user: models.User = Depends(dependencies.get_current_user_sync)
 ):
-    """
-    Contractor File Upload Endpoint.
-    Replaces the mock JSON upload. Handles file storage + state transition.
-    """
-    # 1. Get Milestone
+    # 1. RBAC: Only Inspector, Agent, Custodian
+    if current_user.role == models.UserRole.CONTRACTOR:
+        raise HTTPException(status_code=403, detail="Contractors cannot submit third-party external evidence.")
+
+    # 2. Milestone exists and accepts evidence; file type (before anything is written)
+    await run_in_threadpool(_external_evidence_milestone, db, id)
+    evidence_service.check_extension(file.filename)
+
+    # 3. Hash the file (chunked, size-capped) and store it by content unless already stored
+    stored = await evidence_service.save_upload(file, db)
+
+    # 4. Evidence row + blob reference + ledger entry (sync session work off the event loop).
+    # On failure the blob stays: it may already be shared, and the next identical upload reuses it.
+    return await run_in_threadpool(_record_external_evidence, db, id, source_type, stored, current_user)
+
+def _contractor_upload_milestone(db: Session, id: str, evidence_type: str) -> models.Milestone:
     milestone = db.query(models.Milestone).filter(models.Milestone.id == id).first()
     if not milestone:
         raise HTTPException(status_code=404, detail="Milestone not found")
-        
-    db_escrow = milestone.escrow
-    
-    # 2. Validation: Status Checks
     if milestone.status not in [models.MilestoneStatus.PENDING, models.MilestoneStatus.EVIDENCE_SUBMITTED]:
          raise HTTPException(status_code=400, detail=f"Cannot upload evidence in state {milestone.status}")
-         
-    # 3. Validate Evidence Type
     if evidence_type not in milestone.required_evidence_types:
         raise HTTPException(status_code=400, detail=f"Evidence type '{evidence_type}' not required for this milestone")
+    return milestone
 
-    # 4. Handle File Upload
-    # Verify extension (basic check)
-    filename = file.filename.lower()
-    if not (filename.endswith('.pdf') or filename.endswith('.jpg') or filename.endswith('.png') or filename.endswith('.jpeg')):
-        raise HTTPException(status_code=400, detail="Only PDF, JPG, and PNG files are allowed.")
-        
-    # Generate safe filename
-    safe_filename = f"{id}_{uuid.uuid4()}_{file.filename}"
-    file_path = os.path.join("uploads", safe_filename)
-    
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
-        
-    # Generate URL
-    file_url = f"http://localhost:8000/uploads/{safe_filename}"
-    
-    # 5. Create Evidence Record
+def _record_contractor_evidence(db: Session, id: str, evidence_type: str, source_type, stored: evidence_service.StoredFile,
+                                current_user: models.User, evidence_id: str = None):
+    milestone = _contractor_upload_milestone(db, id, evidence_type)
+    db_escrow = milestone.escrow
+
+    # Create Evidence Record
+    evidence_id = evidence_id or str(uuid.uuid4())
+    file_url = evidence_storage.evidence_url(evidence_id)
     new_evidence = models.Evidence(
+        id=evidence_id,
         milestone_id=id,
         evidence_type=evidence_type,
         url=file_url,
         origin=models.EvidenceOrigin.CONTRACTOR,
         source_type=source_type,
-        submitted_by_role=current_user.role
+        submitted_by_role=current_user.role,
+        sha256=stored.sha256,
+        size_bytes=stored.size_bytes
     )
     db.add(new_evidence)
-    
-    # 6. Update Milestone Status
+    _attach_blob(db, new_evidence, stored)
+
+    # Update Milestone Status
     # CHANGED: We do NOT auto-submit anymore. Contractor must explicitly click "Finish Submission".
     # if milestone.status == models.MilestoneStatus.PENDING:
     #     milestone.status = models.MilestoneStatus.EVIDENCE_SUBMITTED
-    
-    # 7. Audit Log
+
+    # Audit Log
     create_attestation(
-        db, 
+        db,
         entity_id=db_escrow.id,
         event_type=models.AuditEvent.UPLOAD_EVIDENCE,
         actor_username=current_user.username,
@@ -803,22 +924,220 @@ def upload_contractor_evidence(
         data={
             "milestone_id": id,
             "type": evidence_type,
-            "url": file_url, 
-            "filename": safe_filename
+            "url": file_url,
+            "filename": stored.filename,
+            "storage_key": stored.storage_key,
+            "sha256": stored.sha256,
+            "size_bytes": stored.size_bytes
         },
         agreement_hash=db_escrow.agreement_hash,
         agreement_version=db_escrow.version
     )
-    
+
     db.commit()
     db.refresh(new_evidence)
     return new_evidence
 
+@app.post("/milestones/{id}/evidence/upload", response_model=schemas.Evidence)
+async def upload_contractor_evidence(
+    id: str,
+    evidence_type: str = Form(...),
+    source_type: schemas.EvidenceSourceType = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.CONTRACTOR]))
+):
+    """
+    Contractor File Upload Endpoint.
+    Replaces the mock JSON upload. Handles file storage + state transition.
+    The file is hashed and stored by content (identical files are kept once) before any database
+    write; the SHA-256 is stored on the evidence row and in the UPLOAD_EVIDENCE attestation.
+    """
+    # 1. Milestone state, required evidence type, file type
+    await run_in_threadpool(_contractor_upload_milestone, db, id, evidence_type)
+    evidence_service.check_extension(file.filename)
+
+    # 2. Hash the file and store it by content
+    stored = await evidence_service.save_upload(file, db)
+
+    # 3. Evidence row + blob reference + ledger entry
+    return await run_in_threadpool(_record_contractor_evidence, db, id, evidence_type, source_type, stored, current_user)
+
+# --- Resumable uploads (services/upload_session_service.py) ---
+def _upload_target(db: Session, id: str, request: schemas.UploadSessionCreate, current_user: models.User):
+    """(origin, evidence_type) for a session upload, after the same milestone checks as the form uploads."""
+    if current_user.role == models.UserRole.CONTRACTOR:
+        if not request.evidence_type:
+            raise HTTPException(status_code=400, detail="evidence_type is required for contractor uploads.")
+        _contractor_upload_milestone(db, id, request.evidence_type)
+        return models.EvidenceOrigin.CONTRACTOR, request.evidence_type
+    _external_evidence_milestone(db, id)
+    return models.EvidenceOrigin.THIRD_PARTY, "External Attestation"
+
+@app.post("/milestones/{id}/upload-sessions", response_model=schemas.UploadSession, status_code=201)
+def create_upload_session(
+    id: str,
+    request: schemas.UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.get_current_user_sync)
+):
+    """
+    Starts a resumable upload. Same rules as the form upload endpoints: contractors upload one
+    of the milestone's required evidence types, other roles attach third-party evidence.
+    """
+    origin, evidence_type = _upload_target(db, id, request, current_user)
+    upload = upload_session_service.create_session(db, id, origin, evidence_type, request, current_user.username)
+    return upload_session_service.describe(db, upload)
+
+@app.post("/milestones/{id}/direct-uploads", response_model=schemas.DirectUpload, status_code=201)
+def create_direct_upload(
+    id: str,
+    request: schemas.UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.get_current_user_sync)
+):
+    """
+    Direct upload: the client sends the file straight to storage with the returned pre-signed
+    request (sha256 is required and pinned by the signature), then calls complete_url. The API
+    never handles the bytes; it records the evidence and attests the verified hash.
+    """
+    origin, evidence_type = _upload_target(db, id, request, current_user)
+    upload, presigned = upload_session_service.create_direct_session(db, id, origin, evidence_type, request,
+                                                                     current_user.username)
+    return {
+        "session_id": upload.id,
+        "storage_key": upload.storage_key,
+        "already_stored": presigned is None,
+        "upload": presigned,
+        "complete_url": f"{evidence_storage.PUBLIC_BASE_URL}/upload-sessions/{upload.id}/complete",
+        "expires_at": upload.expires_at
+    }
+
+@app.put("/storage/{key:path}", status_code=204)
+async def put_signed_object(key: str, request: Request, size: int, sha256: str, expires: int, signature: str):
+    """Local storage backend's pre-signed PUT target (the signature is the authorization)."""
+    if not isinstance(evidence_storage.storage, evidence_storage.LocalStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+    if not evidence_storage.storage.check_signature(key, size, sha256, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload signature.")
+    await evidence_service.receive_signed_upload(key, size, sha256, request.stream())
+    return Response(status_code=204)
+
+@app.get("/upload-sessions/{session_id}", response_model=schemas.UploadSession)
+def get_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.get_current_user_sync)
+):
+    """Received byte ranges and missing chunks: resume by re-sending only the missing ones."""
+    upload = upload_session_service.get_session(db, session_id, current_user.username)
+    return upload_session_service.describe(db, upload)
+
+@app.put("/upload-sessions/{session_id}/chunks/{index}", response_model=schemas.UploadSession)
+async def put_upload_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.get_current_user_sync)
+):
+    """Raw chunk body (application/octet-stream), written at index * chunk_bytes. Safe to re-send."""
+    upload = await run_in_threadpool(upload_session_service.get_session, db, session_id, current_user.username, True)
+    size = await upload_session_service.write_chunk(upload, index, request.stream(), x_chunk_sha256)
+    await run_in_threadpool(upload_session_service.record_chunk, db, upload, index, size)
+    return await run_in_threadpool(upload_session_service.describe, db, upload)
+
+def _complete_upload(db: Session, upload: models.UploadSession, stored: evidence_service.StoredFile, current_user: models.User):
+    # Session closes in the same transaction as the evidence row and its attestation
+    evidence_id = str(uuid.uuid4())
+    upload.status = models.UploadSessionStatus.COMPLETED.value
+    upload.evidence_id = evidence_id
+    source_type = models.EvidenceSourceType(upload.source_type)
+    if upload.origin == models.EvidenceOrigin.CONTRACTOR.value:
+        return _record_contractor_evidence(db, upload.milestone_id, upload.evidence_type, source_type, stored, current_user,
+                                           evidence_id=evidence_id)
+    return _record_external_evidence(db, upload.milestone_id, source_type, stored, current_user, evidence_id=evidence_id)
+
+@app.post("/upload-sessions/{session_id}/complete", response_model=schemas.Evidence)
+async def complete_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.get_current_user_sync)
+):
+    """
+    Hashes the assembled file, stores it by content and records the evidence + attestation exactly
+    like a form upload. Retrying after a lost response returns the same evidence.
+    """
+    upload = await run_in_threadpool(upload_session_service.get_session, db, session_id, current_user.username)
+    if upload.status == models.UploadSessionStatus.COMPLETED.value:
+        return await run_in_threadpool(db.get, models.Evidence, upload.evidence_id)
+    upload = await run_in_threadpool(upload_session_service.get_session, db, session_id, current_user.username, True)
+    await run_in_threadpool(upload_session_service.claim_for_completion, db, upload)
+    try:
+        stored = await run_in_threadpool(upload_session_service.store_file, db, upload)
+    except Exception:
+        await run_in_threadpool(upload_session_service.release_claim, db, upload)
+        raise
+    try:
+        return await run_in_threadpool(_complete_upload, db, upload, stored, current_user)
+    except Exception:
+        # The file has already moved into the evidence store; this session can't be retried
+        await run_in_threadpool(db.rollback)
+        await run_in_threadpool(upload_session_service.abort, db, upload)
+        raise
+
+@app.delete("/upload-sessions/{session_id}", status_code=204)
+def abort_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.get_current_user_sync)
+):
+    upload = upload_session_service.get_session(db, session_id, current_user.username, writable=True)
+    upload_session_service.abort(db, upload)
+    return Response(status_code=204)
+
+@app.get("/evidence/{id}/download")
+async def download_evidence(id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Redirects to a short-lived download URL from the storage backend (pre-signed on S3), so file
+    bytes never pass through the API. Like the /uploads mount it replaces, it needs no bearer
+    token: browsers open evidence links directly. Reads the primary (links are opened right after
+    an upload, without the token that would pin a replica read to it).
+    """
+    row = (await db.execute(
+        select(models.Evidence.url, models.EvidenceBlob.storage_key)
+        .outerjoin(models.EvidenceBlob, models.EvidenceBlob.sha256 == models.Evidence.sha256)
+        .where(models.Evidence.id == id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    if row.storage_key:
+        target = await run_in_threadpool(evidence_storage.storage.download_url, row.storage_key)
+    elif row.url and row.url != evidence_storage.evidence_url(id):
+        target = row.url # link-only or pre-blob evidence
+    else:
+        raise HTTPException(status_code=404, detail="Evidence file not found")
+    return RedirectResponse(target, status_code=307)
+
+@app.get("/evidence/{id}/preview")
+async def preview_evidence(id: str, db: AsyncSession = Depends(get_async_db)):
+    """Redirects to the rendered thumbnail / first-page preview; 404 until it is ready (see preview_url)."""
+    row = (await db.execute(
+        select(models.EvidenceBlob.preview_key)
+        .join(models.Evidence, models.EvidenceBlob.sha256 == models.Evidence.sha256)
+        .where(models.Evidence.id == id, models.EvidenceBlob.preview_status == models.ProcessingStatus.READY.value)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Preview not available")
+    target = await run_in_threadpool(evidence_storage.storage.download_url, row.preview_key)
+    return RedirectResponse(target, status_code=307)
+
 @app.post("/milestones/{id}/submit", response_model=schemas.Milestone)
 def submit_milestone_evidence(
     id: str,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.CONTRACTOR]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.CONTRACTOR]))
 ):
     """
     Explicitly marks a milestone as EVIDENCE_SUBMITTED.
@@ -844,11 +1163,8 @@ def submit_milestone_evidence(
     # Optional: We could log an event here too "EVIDENCE_SUBMISSION_COMPLETED"
     # For now, relying on status change state.
     
-    db.commit()
-    db.refresh(milestone)
-    
     # Notify Inspector
-    notification_service.emit_notification(
+    database.after_commit(db, notification_service.emit_notification,
         event_type=models.AuditEvent.UPLOAD_EVIDENCE,
         escrow_id=milestone.escrow_id,
         milestone_id=id,
@@ -856,15 +1172,27 @@ def submit_milestone_evidence(
         data={"users": {"INSPECTOR": "rob_inspector"}}
     )
     
+    db.commit()
+    db.refresh(milestone)
+    
     return milestone
 
 @app.get("/notifications", response_model=List[Any])
-def get_notifications(
+async def get_notifications(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: models.User = Depends(dependencies.get_current_user)
 ):
     """Fetch notifications for key user."""
+    # Conditional GET: the per-user watermark changes on every insert / mark-read
+    seq, updated_at = await notification_service.get_watermark_async(current_user.username)
+    etag = dependencies.make_etag("notifications", current_user.username, seq, updated_at)
+    if dependencies.etag_matches(if_none_match, etag):
+        return dependencies.not_modified(etag)
+    dependencies.set_etag(response, etag)
+
     # Convert Mongo objects to list and handle ObjectId serialization
-    notes = notification_service.get_notifications(current_user.username, current_user.role)
+    notes = await notification_service.get_notifications_async(current_user.username, current_user.role)
     results = []
     for n in notes:
         n["_id"] = str(n["_id"])
@@ -880,11 +1208,188 @@ def mark_notification_read(
     notification_service.mark_read(id, current_user.username)
     return {"status": "success"}
 
+# --- Webhook Delivery Channel ---
+def _webhook_subscription_out(sub):
+    return {
+        "id": str(sub["_id"]),
+        "url": sub["url"],
+        "event_types": sub["event_types"],
+        "is_active": sub["is_active"],
+        "created_at": sub["created_at"],
+        "secret": sub["secret"]
+    }
+
+@app.post("/webhooks", response_model=schemas.WebhookSubscriptionCreated)
+def register_webhook(
+    subscription: schemas.WebhookSubscriptionCreate,
+    current_user: models.User = Depends(dependencies.get_current_user)
+):
+    """Register an endpoint that receives this user's notifications (HMAC-signed)."""
+    try:
+        sub = webhook_service.register(current_user.username, current_user.role, subscription.url,
+                                       subscription.secret, subscription.event_types)
+    except InvalidWebhookURL as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _webhook_subscription_out(sub)
+
+@app.get("/webhooks", response_model=List[schemas.WebhookSubscription])
+def list_webhooks(current_user: models.User = Depends(dependencies.get_current_user)):
+    return [_webhook_subscription_out(s) for s in webhook_service.list_subscriptions(current_user.username)]
+
+@app.delete("/webhooks/{id}")
+def delete_webhook(id: str, current_user: models.User = Depends(dependencies.get_current_user)):
+    if not webhook_service.remove(id, current_user.username):
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    return {"status": "success"}
+
+@app.get("/webhooks/dead-letters", response_model=List[Any])
+def list_webhook_dead_letters(current_user: models.User = Depends(dependencies.get_current_user)):
+    """Deliveries that exhausted all retries."""
+    results = []
+    for d in webhook_service.get_dead_letters(current_user.username):
+        d["_id"] = str(d["_id"])
+        d["subscription_id"] = str(d["subscription_id"])
+        results.append(d)
+    return results
+
+@app.post("/webhooks/dead-letters/{id}/redeliver")
+def redeliver_webhook(id: str, current_user: models.User = Depends(dependencies.get_current_user)):
+    if not webhook_service.redeliver(id, current_user.username):
+        raise HTTPException(status_code=404, detail="Dead letter not found or subscription inactive")
+    return {"status": "queued"}
+
+@app.get("/webhooks/stats")
+def webhook_stats(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN, models.UserRole.CUSTODIAN]))):
+    """Delivery counters and throughput (deliveries per second)."""
+    return webhook_service.stats()
+
+# --- Portfolio Summary ---
+@app.get("/summary", response_model=schemas.PortfolioSummary)
+async def get_portfolio_summary(
+    organization_id: Optional[str] = None,
+    role: Optional[models.UserRole] = None,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: models.User = Depends(dependencies.require_role([
+        models.UserRole.AGENT, models.UserRole.CUSTODIAN, models.UserRole.ADMIN
+    ]))
+):
+    """
+    Dashboard totals for the caller's organization in their role (escrows by state, amounts,
+    outstanding delta funding, milestones awaiting inspection). Admins pass organization_id and role.
+    """
+    if current_user.role == models.UserRole.ADMIN:
+        if not organization_id or role not in (models.UserRole.AGENT, models.UserRole.CUSTODIAN):
+            raise HTTPException(status_code=400, detail="organization_id and role (AGENT or CUSTODIAN) are required.")
+    else:
+        organization_id, role = current_user.organization_id, current_user.role
+        if not organization_id:
+            raise HTTPException(status_code=400, detail="User has no organization.")
+    role = models.UserRole(role).value
+
+    summary = await summary_service.get_summary_async(db, organization_id, role)
+    if summary is None:
+        return schemas.PortfolioSummary(organization_id=organization_id, role=role)
+    return summary
+
+# --- Metrics ---
+@app.get("/metrics/principal-cache")
+def principal_cache_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Hit rate of the authenticated-principal cache used by get_current_user."""
+    return dependencies.principal_cache.stats()
+
+@app.get("/metrics/escrow-cache")
+def escrow_cache_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Hit rate and size of the GET /escrows/{id} read-through cache."""
+    return escrow_cache.stats()
+
+@app.get("/metrics/evidence-blobs")
+def evidence_blob_metrics(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.ADMIN]))
+):
+    """Content-addressed evidence store: distinct blobs, references and bytes saved by deduplication."""
+    return evidence_service.blob_stats(db)
+
+@app.get("/metrics/evidence-pool")
+def evidence_pool_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Post-upload processing pool (previews, metadata): queue depth and completed / failed / dropped jobs."""
+    return evidence_pool.stats()
+
+@app.get("/metrics/previews", deprecated=True)
+def preview_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Former preview pool metrics, kept for existing dashboards; use /metrics/evidence-pool."""
+    return preview_service.stats()
+
+@app.get("/metrics/revocation-list")
+def revocation_list_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Size and freshness of the stateless-auth revocation list."""
+    return dependencies.revocation_list.stats()
+
+@app.get("/metrics/auth-hashing")
+def auth_hashing_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Concurrency and queueing of the bcrypt pool used by /token."""
+    return hashing_pool.stats()
+
+@app.get("/metrics/read-routing")
+def read_routing_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Primary vs replica reads, read-your-writes stickiness and replica failovers."""
+    return read_router.stats()
+
+@app.get("/metrics/pools")
+def pool_metrics(current_user: models.User = Depends(dependencies.require_role([models.UserRole.ADMIN]))):
+    """Postgres (primary and read replicas) and Mongo connection pool gauges and checkout wait times."""
+    return {
+        "postgres": database.sql_pool_monitor.stats(),
+        "postgres_async": database.async_sql_pool_monitor.stats(),
+        "postgres_replicas": [monitor.stats() for monitor in database.replica_pool_monitors],
+        "mongo": database.mongo_pool_monitor.stats(),
+        "mongo_async": database.async_mongo_pool_monitor.stats()
+    }
+
+@app.get("/escrows/{escrow_id}/evidence", response_model=List[schemas.EvidenceMatch])
+async def search_evidence(
+    escrow_id: str,
+    milestone_id: Optional[str] = None,
+    source_type: Optional[models.EvidenceSourceType] = None,
+    geotagged: Optional[bool] = None,
+    captured_after: Optional[datetime.datetime] = None,
+    captured_before: Optional[datetime.datetime] = None,
+    near_lat: Optional[float] = None,
+    near_lon: Optional[float] = None,
+    radius_m: Optional[float] = None,
+    has_text: Optional[bool] = None,
+    min_pages: Optional[int] = None,
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: models.User = Depends(dependencies.get_current_user)
+):
+    """
+    Evidence on an escrow filtered by metadata extracted from the files, e.g. photos geotagged
+    within radius_m of the site (near_lat/near_lon) and taken after the milestone started, or
+    PDFs with a text layer. Files still being processed have no metadata yet and only match
+    unfiltered queries.
+    """
+    near = (near_lat, near_lon, radius_m)
+    if any(v is not None for v in near) and not all(v is not None for v in near):
+        raise HTTPException(status_code=400, detail="near_lat, near_lon and radius_m go together.")
+    if radius_m is not None and radius_m <= 0:
+        raise HTTPException(status_code=400, detail="radius_m must be positive.")
+    if await escrow_query_service.get_escrow_stamp_async(db, escrow_id) is None:
+        raise HTTPException(status_code=404, detail="Escrow not found")
+    # Stored capture times are naive UTC
+    captured_after, captured_before = (
+        t.astimezone(datetime.timezone.utc).replace(tzinfo=None) if t is not None and t.tzinfo else t
+        for t in (captured_after, captured_before)
+    )
+    return FastJSONResponse(await escrow_query_service.list_evidence_rows_async(
+        db, escrow_id, milestone_id, source_type, geotagged, captured_after, captured_before,
+        near if near_lat is not None else None, has_text, min_pages
+    ))
+
 # --- Payment Instruction Layer ---
 @app.get("/escrows/{escrow_id}/payment-instructions", response_model=List[schemas.PaymentInstruction])
-def get_payment_instructions(
+async def get_payment_instructions(
     escrow_id: str, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(dependencies.get_read_db),
     current_user: models.User = Depends(dependencies.get_current_user)
 ):
     """
@@ -893,13 +1398,13 @@ def get_payment_instructions(
     # Verify Access (Agent, Inspector, Custodian, Contractor if Payee)
     # Simple check: anyone associated can see list, but sensitive info might be filtered in real app.
     # For MVP, assume role access is generally open to participants.
-    return payment_service.get_by_escrow(db, escrow_id)
+    return FastJSONResponse(await payment_service.get_by_escrow_rows_async(db, escrow_id))
 
 @app.post("/payment-instructions/{id}/mark-sent", response_model=schemas.PaymentInstruction)
 def mark_payment_sent(
     id: str,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.CUSTODIAN]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.CUSTODIAN]))
 ):
     """
     Custodian manually marks as SENT.
@@ -910,7 +1415,7 @@ def mark_payment_sent(
 def mark_payment_settled(
     id: str,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(dependencies.require_role([models.UserRole.CUSTODIAN]))
+    current_user: models.User = Depends(dependencies.require_role_sync([models.UserRole.CUSTODIAN]))
 ):
     """
     Custodian manually marks as SETTLED.
@@ -0,0 +1,31 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine
+import migrations
+
+USAGE = "Usage: python migrate.py upgrade [version] | status"
+
+def status():
+    with engine.connect() as conn:
+        current = migrations.current_version(conn)
+    print(f"Current schema version: {current}")
+    print(f"Latest schema version:  {migrations.LATEST_VERSION}")
+    for number, name in migrations.MIGRATIONS:
+        print(f"  [{'x' if number <= current else ' '}] {name}")
+
+def main(argv):
+    if not argv or argv[0] not in ("upgrade", "status"):
+        print(USAGE)
+        return 1
+    if argv[0] == "status":
+        status()
+        return 0
+    target = int(argv[1]) if len(argv) > 1 else None
+    version = migrations.upgrade(engine, target)
+    print(f"Schema at version {version}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
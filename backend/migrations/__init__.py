@@ -0,0 +1,111 @@
+"""
+Versioned schema migrations.
+
+Each migration is a module named mNNNN_<description>.py exposing `upgrade(conn)`.
+Set `TRANSACTIONAL = False` in a module for DDL that cannot run inside a
+transaction (e.g. CREATE INDEX CONCURRENTLY). Applied versions are recorded
+in the `schema_migrations` table.
+
+    python migrate.py upgrade     # apply pending migrations
+    python migrate.py status      # show current vs latest
+
+At startup the API only compares the stored version with LATEST_VERSION
+(one indexed MAX() query); it never reflects or creates tables.
+"""
+import importlib
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+
+_MODULE_RE = re.compile(r"^m(\d{4})_(\w+)\.py$")
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+def _discover():
+    here = os.path.dirname(os.path.abspath(__file__))
+    found = []
+    for filename in os.listdir(here):
+        m = _MODULE_RE.match(filename)
+        if m:
+            found.append((int(m.group(1)), filename[:-3]))
+    return sorted(found)
+
+MIGRATIONS = _discover()
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_migrations"):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+def check_schema(engine):
+    """Fast startup check: stored version must equal the version this code expects."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version != LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at v{version}, code expects v{LATEST_VERSION}. "
+            f"Run `python migrate.py upgrade`."
+        )
+    return version
+
+def upgrade(engine, target: int = None, echo=print):
+    target = LATEST_VERSION if target is None else target
+    with engine.begin() as conn:
+        _meta.create_all(conn, checkfirst=True)
+        version = current_version(conn)
+
+    for number, module_name in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_name}")
+        echo(f"Applying {module_name}...")
+        if getattr(module, "TRANSACTIONAL", True):
+            with engine.begin() as conn:
+                module.upgrade(conn)
+                _record(conn, number, module_name)
+        else:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                module.upgrade(conn)
+                _record(conn, number, module_name)
+        version = number
+    return version
+
+def _record(conn, number, module_name):
+    conn.execute(schema_migrations.insert().values(version=number, name=module_name, applied_at=datetime.utcnow()))
+
+# --- Helpers for migration modules (idempotent, so legacy create_all databases can be adopted) ---
+def add_column_if_missing(conn, table_name: str, column: Column):
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    if column.name in existing:
+        return False
+    col_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN "{column.name}" {col_type}'))
+    return True
+
+def create_index_online(conn, name: str, table_name: str, columns, unique=False):
+    """CREATE INDEX CONCURRENTLY on Postgres (run from a TRANSACTIONAL = False migration)."""
+    is_postgres = conn.dialect.name == "postgresql"
+    if is_postgres:
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            # Leftover from an interrupted CONCURRENTLY build
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+    cols = ", ".join(f'"{c}"' for c in columns)
+    concurrently = " CONCURRENTLY" if is_postgres else ""
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(text(f'CREATE {kind}{concurrently} IF NOT EXISTS "{name}" ON "{table_name}" ({cols})'))
@@ -0,0 +1,92 @@
+"""Baseline: the schema as it existed when the app still ran create_all at import.
+
+Frozen here (not imported from models.py) so later model edits never change what this
+migration does. checkfirst makes it a no-op on databases created by the old create_all.
+"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Enum, Float, ForeignKey, Integer, JSON, MetaData, String, Table
+
+from models import EscrowState, EvidenceOrigin, EvidenceSourceType, MilestoneStatus, PaymentStatus, UserRole
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", String, primary_key=True),
+    Column("username", String, unique=True, index=True),
+    Column("hashed_password", String),
+    Column("role", Enum(UserRole)),
+    Column("organization_id", String, nullable=True),
+    Column("is_active", Boolean),
+)
+
+Table(
+    "escrows", metadata,
+    Column("id", String, primary_key=True),
+    Column("buyer_id", String, index=True),
+    Column("provider_id", String, index=True),
+    Column("total_amount", Float),
+    Column("funded_amount", Float),
+    Column("state", Enum(EscrowState)),
+    Column("created_at", DateTime),
+    Column("version", Integer),
+    Column("previous_version_hash", String, nullable=True),
+    Column("agreement_hash", String, nullable=True),
+    Column("is_disputed", Boolean),
+)
+
+Table(
+    "milestones", metadata,
+    Column("id", String, primary_key=True),
+    Column("escrow_id", String, ForeignKey("escrows.id")),
+    Column("name", String),
+    Column("amount", Float),
+    Column("required_evidence_types", JSON),
+    Column("status", Enum(MilestoneStatus)),
+    Column("approval_signature", JSON, nullable=True),
+)
+
+Table(
+    "evidences", metadata,
+    Column("id", String, primary_key=True),
+    Column("milestone_id", String, ForeignKey("milestones.id")),
+    Column("evidence_type", String),
+    Column("url", String),
+    Column("origin", Enum(EvidenceOrigin)),
+    Column("source_type", Enum(EvidenceSourceType)),
+    Column("submitted_by_role", String, nullable=True),
+    Column("timestamp", DateTime),
+)
+
+Table(
+    "payment_instructions", metadata,
+    Column("id", String, primary_key=True),
+    Column("escrow_id", String, ForeignKey("escrows.id")),
+    Column("milestone_id", String, ForeignKey("milestones.id")),
+    Column("amount", Float),
+    Column("currency", String),
+    Column("payee_name", String),
+    Column("payee_role", String),
+    Column("payee_reference_id", String),
+    Column("method", String),
+    Column("memo", String),
+    Column("status", Enum(PaymentStatus)),
+    Column("created_at", DateTime),
+    Column("created_by", String),
+    Column("sent_at", DateTime, nullable=True),
+    Column("settled_at", DateTime, nullable=True),
+)
+
+Table(
+    "milestone_templates", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, unique=True),
+    Column("description", String),
+    Column("milestones", JSON),
+    Column("is_system", Boolean),
+)
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
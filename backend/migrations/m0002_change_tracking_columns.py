@@ -0,0 +1,9 @@
+"""escrows.updated_at (conditional GET / ETags) and users.tokens_valid_after (token revocation)."""
+from sqlalchemy import Column, DateTime, text
+
+from migrations import add_column_if_missing
+
+def upgrade(conn):
+    if add_column_if_missing(conn, "escrows", Column("updated_at", DateTime)):
+        conn.execute(text("UPDATE escrows SET updated_at = created_at WHERE updated_at IS NULL"))
+    add_column_if_missing(conn, "users", Column("tokens_valid_after", DateTime))
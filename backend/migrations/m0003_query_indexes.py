@@ -0,0 +1,28 @@
+"""Keyset pagination, filter and FK indexes. Built CONCURRENTLY on Postgres so writes are not blocked."""
+from sqlalchemy import text
+
+from migrations import create_index_online
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("ix_escrows_created_at_id", "escrows", ["created_at", "id"]),
+    ("ix_escrows_state_created_at_id", "escrows", ["state", "created_at", "id"]),
+    ("ix_escrows_buyer_id_created_at_id", "escrows", ["buyer_id", "created_at", "id"]),
+    ("ix_escrows_provider_id_created_at_id", "escrows", ["provider_id", "created_at", "id"]),
+    ("ix_milestones_escrow_id_status", "milestones", ["escrow_id", "status"]),
+    ("ix_milestones_status", "milestones", ["status"]),
+    ("ix_evidences_milestone_id", "evidences", ["milestone_id"]),
+    ("ix_payment_instructions_milestone_id", "payment_instructions", ["milestone_id"]),
+    ("ix_payment_instructions_escrow_id_created_at", "payment_instructions", ["escrow_id", "created_at"]),
+]
+
+def upgrade(conn):
+    tables = set()
+    for name, table, columns in INDEXES:
+        create_index_online(conn, name, table, columns)
+        tables.add(table)
+    # Fresh statistics so the planner actually picks the new indexes
+    if conn.dialect.name == "postgresql":
+        for table in sorted(tables):
+            conn.execute(text(f'ANALYZE "{table}"'))
@@ -0,0 +1,7 @@
+"""escrows.version becomes the optimistic-lock counter; it must never be NULL (WHERE version = NULL matches nothing)."""
+from sqlalchemy import text
+
+def upgrade(conn):
+    conn.execute(text("UPDATE escrows SET version = 1 WHERE version IS NULL"))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE escrows ALTER COLUMN version SET NOT NULL"))
@@ -0,0 +1,63 @@
+"""Escrow ownership columns + portfolio_summaries projection, backfilled from existing rows."""
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, select, update
+
+from migrations import add_column_if_missing
+
+metadata = MetaData()
+
+portfolio_summaries = Table(
+    "portfolio_summaries", metadata,
+    Column("organization_id", String, primary_key=True),
+    Column("role", String, primary_key=True),
+    Column("escrow_count", Integer, nullable=False, default=0),
+    Column("escrows_created", Integer, nullable=False, default=0),
+    Column("escrows_funded", Integer, nullable=False, default=0),
+    Column("escrows_active", Integer, nullable=False, default=0),
+    Column("escrows_completed", Integer, nullable=False, default=0),
+    Column("escrows_disputed", Integer, nullable=False, default=0),
+    Column("escrows_halted", Integer, nullable=False, default=0),
+    Column("total_amount", Float, nullable=False, default=0.0),
+    Column("funded_amount", Float, nullable=False, default=0.0),
+    Column("outstanding_delta", Float, nullable=False, default=0.0),
+    Column("milestones_awaiting_inspection", Integer, nullable=False, default=0),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+def _backfill_owners(conn):
+    """Legacy escrows: owners come from the ledger (CREATE actor = agent, first CONFIRM_FUNDS actor = custodian)."""
+    from database import audit_collection
+    users = Table("users", MetaData(), autoload_with=conn)
+    escrows = Table("escrows", MetaData(), autoload_with=conn)
+    orgs = dict(conn.execute(select(users.c.username, users.c.organization_id)).all())
+
+    owners, custodians = {}, {}
+    entries = audit_collection.find(
+        {"event_type": {"$in": ["CREATE", "CONFIRM_FUNDS"]}},
+        {"entity_id": 1, "event_type": 1, "actor_id": 1}
+    ).sort("timestamp", 1)
+    for entry in entries:
+        target = owners if entry["event_type"] == "CREATE" else custodians
+        target.setdefault(entry["entity_id"], orgs.get(entry["actor_id"]))
+
+    for escrow_id, org in owners.items():
+        if org:
+            conn.execute(update(escrows).where(escrows.c.id == escrow_id, escrows.c.organization_id.is_(None))
+                         .values(organization_id=org))
+    for escrow_id, org in custodians.items():
+        if org:
+            conn.execute(update(escrows).where(escrows.c.id == escrow_id, escrows.c.custodian_organization_id.is_(None))
+                         .values(custodian_organization_id=org))
+
+def upgrade(conn):
+    add_column_if_missing(conn, "escrows", Column("organization_id", String))
+    add_column_if_missing(conn, "escrows", Column("custodian_organization_id", String))
+    metadata.create_all(conn, checkfirst=True)
+
+    try:
+        _backfill_owners(conn)
+    except Exception as e:
+        # Ledger unreachable: legacy escrows stay unowned (not counted) until backfilled
+        print(f"Skipping owner backfill from the ledger: {e}")
+
+    from services import summary_service
+    summary_service.rebuild(conn)
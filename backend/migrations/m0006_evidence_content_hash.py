@@ -0,0 +1,8 @@
+"""evidences.sha256 / evidences.size_bytes: content hash and size recorded when a file is uploaded."""
+from sqlalchemy import BigInteger, Column, String
+
+from migrations import add_column_if_missing
+
+def upgrade(conn):
+    add_column_if_missing(conn, "evidences", Column("sha256", String(64)))
+    add_column_if_missing(conn, "evidences", Column("size_bytes", BigInteger))
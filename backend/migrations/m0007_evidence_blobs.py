@@ -0,0 +1,35 @@
+"""evidence_blobs: content-addressed evidence files with reference counts, backfilled from hashed evidence."""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, func, select, text
+
+metadata = MetaData()
+
+evidence_blobs = Table(
+    "evidence_blobs", metadata,
+    Column("sha256", String(64), primary_key=True),
+    Column("storage_key", String, nullable=False),
+    Column("size_bytes", BigInteger, nullable=False),
+    Column("ref_count", Integer, nullable=False, default=0),
+    Column("created_at", DateTime, nullable=False),
+)
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_evidences_sha256" ON "evidences" ("sha256")'))
+
+    # Files uploaded before deduplication keep their per-upload names; one of them becomes the blob
+    evidences = Table("evidences", MetaData(), autoload_with=conn)
+    rows = conn.execute(
+        select(evidences.c.sha256, func.min(evidences.c.url), func.max(evidences.c.size_bytes), func.count())
+        .where(evidences.c.sha256.is_not(None)).group_by(evidences.c.sha256)
+    ).all()
+    existing = set(conn.execute(select(evidence_blobs.c.sha256)).scalars())
+    now = datetime.utcnow()
+    blobs = [
+        {"sha256": sha256, "storage_key": url.rsplit("/uploads/", 1)[-1], "size_bytes": size_bytes or 0,
+         "ref_count": count, "created_at": now}
+        for sha256, url, size_bytes, count in rows if sha256 not in existing
+    ]
+    if blobs:
+        conn.execute(evidence_blobs.insert(), blobs)
@@ -0,0 +1,36 @@
+"""upload_sessions / upload_chunks: resumable chunked evidence uploads."""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+# Referenced only (already exists; create_all(checkfirst=True) skips it)
+Table("milestones", metadata, Column("id", String, primary_key=True))
+
+upload_sessions = Table(
+    "upload_sessions", metadata,
+    Column("id", String, primary_key=True),
+    Column("milestone_id", String, ForeignKey("milestones.id"), index=True),
+    Column("origin", String, nullable=False),
+    Column("evidence_type", String, nullable=False),
+    Column("source_type", String, nullable=False),
+    Column("filename", String, nullable=False),
+    Column("size_bytes", BigInteger, nullable=False),
+    Column("chunk_bytes", Integer, nullable=False),
+    Column("sha256", String(64)),
+    Column("created_by", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("evidence_id", String),
+    Column("created_at", DateTime, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+)
+
+upload_chunks = Table(
+    "upload_chunks", metadata,
+    Column("session_id", String, ForeignKey("upload_sessions.id"), primary_key=True),
+    Column("index", Integer, primary_key=True),
+    Column("size_bytes", Integer, nullable=False),
+    Column("received_at", DateTime, nullable=False),
+)
+
+def upgrade(conn):
+    metadata.create_all(conn, tables=[upload_sessions, upload_chunks], checkfirst=True)
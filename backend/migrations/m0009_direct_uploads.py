@@ -0,0 +1,7 @@
+"""upload_sessions.storage_key: direct (pre-signed) uploads straight to the storage backend."""
+from sqlalchemy import Column, String
+
+from migrations import add_column_if_missing
+
+def upgrade(conn):
+    add_column_if_missing(conn, "upload_sessions", Column("storage_key", String))
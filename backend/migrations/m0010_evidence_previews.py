@@ -0,0 +1,9 @@
+"""Evidence previews: render state on evidence_blobs, the finished preview URL on evidences."""
+from sqlalchemy import Column, String
+
+from migrations import add_column_if_missing
+
+def upgrade(conn):
+    add_column_if_missing(conn, "evidence_blobs", Column("preview_status", String))
+    add_column_if_missing(conn, "evidence_blobs", Column("preview_key", String))
+    add_column_if_missing(conn, "evidences", Column("preview_url", String))
@@ -0,0 +1,13 @@
+"""Evidence metadata: EXIF capture time / GPS and PDF page count / text presence, plus per-blob job state."""
+from sqlalchemy import JSON, Boolean, Column, DateTime, Float, Integer, String
+
+from migrations import add_column_if_missing
+
+def upgrade(conn):
+    add_column_if_missing(conn, "evidence_blobs", Column("metadata_status", String))
+    add_column_if_missing(conn, "evidence_blobs", Column("file_metadata", JSON))
+    add_column_if_missing(conn, "evidences", Column("captured_at", DateTime))
+    add_column_if_missing(conn, "evidences", Column("gps_latitude", Float))
+    add_column_if_missing(conn, "evidences", Column("gps_longitude", Float))
+    add_column_if_missing(conn, "evidences", Column("page_count", Integer))
+    add_column_if_missing(conn, "evidences", Column("has_text", Boolean))
@@ -0,0 +1,80 @@
+"""milestones.position: a stable plan order (the (escrow_id, status) index grouped milestones by status).
+
+Existing rows are numbered in the order the ledger records their plan: the CREATE terms, then
+templates applied and change orders as they happened. Milestones the ledger doesn't place follow
+in insertion order (SQLite rowid, Postgres ctid), with id as the last tiebreaker.
+"""
+import re
+
+from sqlalchemy import Column, Integer, MetaData, Table, bindparam, literal_column, select, update
+
+from migrations import add_column_if_missing
+
+def _ledger_plans(conn):
+    """escrow id -> plan entries in ledger order: ("name", milestone name) or ("id", milestone id)."""
+    from database import audit_collection
+    templates = Table("milestone_templates", MetaData(), autoload_with=conn)
+    titles = {name: [m["title"] for m in milestones or []]
+              for name, milestones in conn.execute(select(templates.c.name, templates.c.milestones))}
+
+    plans = {}
+    entries = audit_collection.find(
+        {"event_type": {"$in": ["CREATE", "TEMPLATE_APPLIED", "CHANGE_ORDER_ADDED"]}},
+        {"entity_id": 1, "event_type": 1, "event_data": 1}
+    ).sort([("timestamp", 1), ("_id", 1)])
+    for entry in entries:
+        data = entry.get("event_data") or {}
+        plan = plans.setdefault(entry["entity_id"], [])
+        if entry["event_type"] == "CREATE":
+            plan.extend(("name", m.get("name")) for m in data.get("milestones") or [])
+        elif entry["event_type"] == "TEMPLATE_APPLIED":
+            plan.extend(("name", title) for title in titles.get(data.get("template_name"), []))
+        elif data.get("milestone_id"):
+            plan.append(("id", data["milestone_id"]))
+    return plans
+
+def _insertion_order(conn, milestones):
+    if conn.dialect.name == "sqlite":
+        return literal_column("milestones.rowid")
+    if conn.dialect.name == "postgresql":
+        # Physical position; only a hint, since updates move rows
+        return literal_column("milestones.ctid::text")
+    return milestones.c.id
+
+def _ctid_key(value):
+    return tuple(int(n) for n in re.findall(r"\d+", value)) if isinstance(value, str) else value
+
+def upgrade(conn):
+    if not add_column_if_missing(conn, "milestones", Column("position", Integer)):
+        return
+    milestones = Table("milestones", MetaData(), autoload_with=conn)
+    try:
+        plans = _ledger_plans(conn)
+    except Exception as e:
+        # Ledger unreachable: insertion order only
+        print(f"Ordering existing milestones without the ledger: {e}")
+        plans = {}
+
+    by_escrow = {}
+    rows = conn.execute(select(milestones.c.escrow_id, milestones.c.id, milestones.c.name,
+                               _insertion_order(conn, milestones).label("inserted")))
+    for escrow_id, milestone_id, name, inserted in rows:
+        by_escrow.setdefault(escrow_id, []).append((_ctid_key(inserted), milestone_id, name))
+
+    positions = []
+    for escrow_id, rows in by_escrow.items():
+        unplaced = [(milestone_id, name) for _, milestone_id, name in sorted(rows)]
+        ordered = []
+        for kind, value in plans.get(escrow_id, []):
+            match = next((r for r in unplaced if (r[0] if kind == "id" else r[1]) == value), None)
+            if match:
+                unplaced.remove(match)
+                ordered.append(match)
+        for position, (milestone_id, _) in enumerate(ordered + unplaced):
+            positions.append({"milestone_id": milestone_id, "new_position": position})
+
+    if positions:
+        conn.execute(
+            update(milestones).where(milestones.c.id == bindparam("milestone_id")).values(position=bindparam("new_position")),
+            positions
+        )
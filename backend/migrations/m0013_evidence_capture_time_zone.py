@@ -0,0 +1,10 @@
+"""evidences.captured_at_utc: whether captured_at is UTC or the camera's local time (zone unknown).
+
+Rows extracted before this stay NULL (unknown) and are displayed as recorded.
+"""
+from sqlalchemy import Boolean, Column
+
+from migrations import add_column_if_missing
+
+def upgrade(conn):
+    add_column_if_missing(conn, "evidences", Column("captured_at_utc", Boolean))
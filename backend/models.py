@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Float, Enum, ForeignKey, DateTime, JSON, Integer, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Float, Enum, ForeignKey, DateTime, JSON, Integer, BigInteger, Boolean, Index, event, func, select, update
+from sqlalchemy.orm import relationship, Session
 import enum
 import uuid
 from datetime import datetime
@@ -29,6 +29,8 @@ class User(Base):
     role = Column(Enum(UserRole))
     organization_id = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    # Tokens issued before this instant are revoked (set on role change / deactivation)
+    tokens_valid_after = Column(DateTime, nullable=True)
 
 class AuditEvent(str, enum.Enum):
     CREATE = "CREATE"
@@ -80,14 +82,34 @@ class Escrow(Base):
     funded_amount = Column(Float, default=0.0)
     state = Column(Enum(EscrowState), default=EscrowState.CREATED)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped whenever the escrow or anything in its graph (milestones, evidence, payments) changes.
+    # Together with `version` this is the ETag for conditional GETs.
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # -- Phase 3: Immutability & Versioning --
-    version = Column(Integer, default=1)
+    # Also the optimistic-lock counter: every UPDATE is issued as WHERE id=? AND version=?
+    # and bumps it; a concurrent writer raises StaleDataError (see database.retry_on_conflict).
+    version = Column(Integer, default=1, nullable=False)
     previous_version_hash = Column(String, nullable=True) # Hash of the previous version row
     agreement_hash = Column(String, nullable=True)        # Hash of *this* version's terms
     is_disputed = Column(Boolean, default=False)
+
+    # Portfolio ownership (feeds portfolio_summaries): the creating agent's organization,
+    # and the custodian's organization once funds are first confirmed.
+    organization_id = Column(String, nullable=True)
+    custodian_organization_id = Column(String, nullable=True)
     
-    milestones = relationship("Milestone", back_populates="escrow")
+    # Plan order (position), not the order the (escrow_id, status) index happens to return
+    milestones = relationship("Milestone", back_populates="escrow", order_by="[Milestone.position, Milestone.id]")
+
+    # Keyset pagination for GET /escrows: ORDER BY (created_at, id), optionally filtered
+    __table_args__ = (
+        Index("ix_escrows_created_at_id", "created_at", "id"),
+        Index("ix_escrows_state_created_at_id", "state", "created_at", "id"),
+        Index("ix_escrows_buyer_id_created_at_id", "buyer_id", "created_at", "id"),
+        Index("ix_escrows_provider_id_created_at_id", "provider_id", "created_at", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
 
 class Milestone(Base):
     __tablename__ = "milestones"
@@ -98,6 +120,7 @@ class Milestone(Base):
     amount = Column(Float)
     required_evidence_types = Column(JSON) # List of strings e.g. ["Photo", "Invoice"]
     status = Column(Enum(MilestoneStatus), default=MilestoneStatus.PENDING)
+    position = Column(Integer) # 0-based order within the escrow; change orders append at the end
     
     # Store approval signature here for simplicity
     approval_signature = Column(JSON, nullable=True) 
@@ -105,11 +128,24 @@ class Milestone(Base):
     escrow = relationship("Escrow", back_populates="milestones")
     evidence = relationship("Evidence", back_populates="milestone")
 
+    __table_args__ = (
+        # escrow_id lookups, the CREATED->PENDING activation sweep in confirm_funds,
+        # and the milestone-status filter on GET /escrows (EXISTS per escrow)
+        Index("ix_milestones_escrow_id_status", "escrow_id", "status"),
+        # Cross-escrow status queues (e.g. everything awaiting inspection)
+        Index("ix_milestones_status", "status"),
+    )
+
+def next_milestone_position(db, escrow_id: str) -> int:
+    """Position for a milestone appended to an existing escrow (change orders, templates)."""
+    last = db.execute(select(func.max(Milestone.position)).where(Milestone.escrow_id == escrow_id)).scalar()
+    return 0 if last is None else last + 1
+
 class Evidence(Base):
     __tablename__ = "evidences"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    milestone_id = Column(String, ForeignKey("milestones.id"))
+    milestone_id = Column(String, ForeignKey("milestones.id"), index=True)
     evidence_type = Column(String) # Keeping for backward compat / UI labels (e.g. "Invoice")
     url = Column(String)
     
@@ -118,10 +154,86 @@ class Evidence(Base):
     source_type = Column(Enum(EvidenceSourceType), default=EvidenceSourceType.PHOTO)
     submitted_by_role = Column(String, nullable=True) # e.g. "INSPECTOR"
 
+    # Uploaded files only (NULL for link-only evidence); the content lives in EvidenceBlob
+    sha256 = Column(String(64), nullable=True, index=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    preview_url = Column(String, nullable=True) # set once the blob's preview is rendered (services/preview_service.py)
+
+    # Extracted from the file after upload (services/metadata_service.py); NULL until then or when absent
+    captured_at = Column(DateTime, nullable=True) # EXIF capture time
+    captured_at_utc = Column(Boolean, nullable=True) # False: camera-local time, no offset or GPS clock recorded
+    gps_latitude = Column(Float, nullable=True)
+    gps_longitude = Column(Float, nullable=True)
+    page_count = Column(Integer, nullable=True) # PDFs
+    has_text = Column(Boolean, nullable=True) # PDFs: text layer (vs scanned images only)
+
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     milestone = relationship("Milestone", back_populates="evidence")
 
+class EvidenceBlob(Base):
+    """
+    Uploaded evidence content, stored once per SHA-256 under uploads/ (services/evidence_service.py).
+    ref_count is the number of Evidence rows pointing at it.
+    """
+    __tablename__ = "evidence_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    storage_key = Column(String, nullable=False) # path under uploads/
+    size_bytes = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Thumbnail / first-page preview, stored next to the blob. NULL status: not queued (yet).
+    preview_status = Column(String, nullable=True)
+    preview_key = Column(String, nullable=True)
+    # EXIF / PDF facts, copied onto each Evidence row for this blob
+    metadata_status = Column(String, nullable=True)
+    file_metadata = Column(JSON, nullable=True)
+
+class ProcessingStatus(str, enum.Enum):
+    """Per-blob state of a post-upload job (services/evidence_pool.py). NULL: not queued (yet)."""
+    PENDING = "PENDING" # claimed by one upload, running in the evidence pool
+    READY = "READY"
+    FAILED = "FAILED"
+
+class UploadSessionStatus(str, enum.Enum):
+    OPEN = "OPEN"
+    COMPLETING = "COMPLETING" # claimed by one /complete call
+    COMPLETED = "COMPLETED"
+    ABORTED = "ABORTED"
+
+class UploadSession(Base):
+    """
+    Resumable evidence upload (services/upload_session_service.py). Chunks are written at their
+    offsets into one preallocated file; completion hands it to the evidence store.
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    milestone_id = Column(String, ForeignKey("milestones.id"), index=True)
+    origin = Column(String, nullable=False) # EvidenceOrigin value
+    evidence_type = Column(String, nullable=False)
+    source_type = Column(String, nullable=False) # EvidenceSourceType value
+    filename = Column(String, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    chunk_bytes = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=True) # declared by the client, checked at completion
+    storage_key = Column(String, nullable=True) # direct uploads: object the client PUTs via a pre-signed URL
+    created_by = Column(String, nullable=False) # username
+    status = Column(String, default=UploadSessionStatus.OPEN.value, nullable=False)
+    evidence_id = Column(String, nullable=True) # set on completion
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+
+    session_id = Column(String, ForeignKey("upload_sessions.id"), primary_key=True)
+    index = Column(Integer, primary_key=True)
+    size_bytes = Column(Integer, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 class PaymentStatus(str, enum.Enum):
     INSTRUCTED = "INSTRUCTED" # System generated
     SENT = "SENT"             # Custodian marked as sent
@@ -132,7 +244,7 @@ class PaymentInstruction(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     escrow_id = Column(String, ForeignKey("escrows.id"))
-    milestone_id = Column(String, ForeignKey("milestones.id"))
+    milestone_id = Column(String, ForeignKey("milestones.id"), index=True)
     
     amount = Column(Float)
     currency = Column(String, default="USD")
@@ -153,10 +265,14 @@ class PaymentInstruction(Base):
     sent_at = Column(DateTime, nullable=True)
     settled_at = Column(DateTime, nullable=True)
 
-    milestone = relationship("Milestone")
     milestone = relationship("Milestone")
     escrow = relationship("Escrow")
 
+    # get_by_escrow: WHERE escrow_id = ? ORDER BY created_at DESC
+    __table_args__ = (
+        Index("ix_payment_instructions_escrow_id_created_at", "escrow_id", "created_at"),
+    )
+
 class MilestoneTemplate(Base):
     __tablename__ = "milestone_templates"
 
@@ -166,3 +282,61 @@ class MilestoneTemplate(Base):
     milestones = Column(JSON) # List of {title, percentage, required_evidence}
     is_system = Column(Boolean, default=False)
 
+class PortfolioSummary(Base):
+    """
+    Running totals per (organization, role), maintained in the same transaction as the
+    escrow/milestone changes (services/summary_service.py). GET /summary is a PK lookup.
+    """
+    __tablename__ = "portfolio_summaries"
+
+    organization_id = Column(String, primary_key=True)
+    role = Column(String, primary_key=True) # AGENT (creating org) or CUSTODIAN (funding org)
+
+    escrow_count = Column(Integer, default=0, nullable=False)
+    escrows_created = Column(Integer, default=0, nullable=False)
+    escrows_funded = Column(Integer, default=0, nullable=False)
+    escrows_active = Column(Integer, default=0, nullable=False)
+    escrows_completed = Column(Integer, default=0, nullable=False)
+    escrows_disputed = Column(Integer, default=0, nullable=False)
+    escrows_halted = Column(Integer, default=0, nullable=False)
+
+    total_amount = Column(Float, default=0.0, nullable=False)
+    funded_amount = Column(Float, default=0.0, nullable=False)
+    outstanding_delta = Column(Float, default=0.0, nullable=False) # change orders not yet funded
+    milestones_awaiting_inspection = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# -- Change Tracking --
+# Child rows (milestones, evidence, payment instructions) don't touch their parent escrow row,
+# so we bump Escrow.updated_at ourselves. This keeps ETags honest for every mutation path.
+@event.listens_for(Session, "before_flush")
+def _collect_touched_escrows(session, flush_context, instances):
+    escrow_ids, milestone_ids = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Escrow):
+            continue # onupdate handles the row itself
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, (Milestone, PaymentInstruction)) and obj.escrow_id:
+            escrow_ids.add(obj.escrow_id)
+        elif isinstance(obj, Evidence) and obj.milestone_id:
+            milestone_ids.add(obj.milestone_id)
+    session.info["_pending_escrow_touch"] = (escrow_ids, milestone_ids)
+
+@event.listens_for(Session, "after_flush")
+def _touch_escrows(session, flush_context):
+    escrow_ids, milestone_ids = session.info.pop("_pending_escrow_touch", (set(), set()))
+    conn = session.connection()
+    if milestone_ids:
+        milestones = Milestone.__table__
+        rows = conn.execute(select(milestones.c.escrow_id).where(milestones.c.id.in_(milestone_ids)))
+        escrow_ids.update(r[0] for r in rows)
+    if escrow_ids:
+        escrows = Escrow.__table__
+        conn.execute(update(escrows).where(escrows.c.id.in_(escrow_ids)).values(updated_at=datetime.utcnow()))
+    # Everything this transaction changed, for cache invalidation on commit (services/escrow_cache.py)
+    escrow_ids.update(obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, Escrow))
+    if escrow_ids:
+        session.info.setdefault("touched_escrow_ids", set()).update(escrow_ids)
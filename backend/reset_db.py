@@ -4,19 +4,24 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database import engine, Base
 import models
+import migrations
 
 from sqlalchemy import text
 
 print("Dropping all tables...")
 Base.metadata.drop_all(bind=engine)
+migrations.schema_migrations.drop(bind=engine, checkfirst=True)
 
 # Explicitly drop enums (Postgres specific)
 with engine.connect() as conn:
     conn.execute(text("DROP TYPE IF EXISTS userrole CASCADE;"))
     conn.execute(text("DROP TYPE IF EXISTS escrowstate CASCADE;"))
     conn.execute(text("DROP TYPE IF EXISTS milestonestatus CASCADE;"))
+    conn.execute(text("DROP TYPE IF EXISTS evidenceorigin CASCADE;"))
+    conn.execute(text("DROP TYPE IF EXISTS evidencesourcetype CASCADE;"))
+    conn.execute(text("DROP TYPE IF EXISTS paymentstatus CASCADE;"))
     conn.commit()
 
-print("Creating all tables...")
-Base.metadata.create_all(bind=engine)
+print("Applying migrations...")
+migrations.upgrade(engine)
 print("Database reset complete.")
@@ -0,0 +1,148 @@
+"""
+Hermetic verify runner: boots the API in-process on the embedded profile (SQLite + in-process
+document store) and runs the verify_*.py scripts against it. No Postgres, MongoDB or uvicorn needed.
+
+    python run_verify.py                      # every script
+    python run_verify.py payments disputes    # verify_payments.py, verify_disputes.py
+
+Scripts talk to BASE_URL with `requests`; those calls are dispatched straight into the ASGI app.
+Any other URL (e.g. the webhook stub receiver) still goes over the network.
+"""
+import contextlib
+import glob
+import io
+import os
+import runpy
+import sys
+import time
+
+os.environ.setdefault("BACKEND_PROFILE", "embedded")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("WEBHOOK_ALLOWED_HOSTS", "127.0.0.1") # verify_webhooks' stub receiver
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from fastapi.testclient import TestClient
+
+BASE_URL = "http://localhost:8000"
+
+# Scripts that need infrastructure the embedded profile deliberately doesn't have
+SKIP = {
+    "verify_read_replicas.py": "needs a separate replica database",
+}
+
+class AppAdapter(BaseAdapter):
+    """requests transport adapter that hands BASE_URL requests to a TestClient."""
+
+    def __init__(self, client: TestClient):
+        super().__init__()
+        self.client = client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        res = self.client.request(
+            request.method,
+            request.url[len(BASE_URL):] or "/",
+            content=request.body,
+            headers=dict(request.headers),
+            follow_redirects=False
+        )
+        response = requests.Response()
+        response.status_code = res.status_code
+        response.headers = CaseInsensitiveDict(res.headers)
+        response._content = res.content
+        response.encoding = res.encoding
+        response.url = request.url
+        response.request = request
+        response.reason = res.reason_phrase
+        return response
+
+    def close(self):
+        pass
+
+def install_adapter(client: TestClient):
+    adapter = AppAdapter(client)
+    original = requests.sessions.Session.get_adapter
+
+    def get_adapter(self, url):
+        if url.startswith(BASE_URL):
+            return adapter
+        return original(self, url)
+
+    requests.sessions.Session.get_adapter = get_adapter
+
+class _Tee(io.TextIOBase):
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, data):
+        for s in self.streams:
+            s.write(data)
+        return len(data)
+
+    def flush(self):
+        for s in self.streams:
+            s.flush()
+
+def run_script(path):
+    captured = io.StringIO()
+    started = time.perf_counter()
+    error = None
+    with contextlib.redirect_stdout(_Tee(sys.stdout, captured)):
+        try:
+            runpy.run_path(path, run_name="__main__")
+        except SystemExit as exc:
+            if exc.code not in (None, 0):
+                error = f"exit status {exc.code}"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+    elapsed = time.perf_counter() - started
+    lines = captured.getvalue().splitlines()
+    # Scripts prefix results with "PASS"/"FAIL", some after a ✅/❌ marker
+    passed = sum(1 for l in lines if l.lstrip("✅ \t").startswith("PASS"))
+    failed = sum(1 for l in lines if l.lstrip("❌ \t").startswith("FAIL"))
+    return passed, failed, error, elapsed
+
+def main(selected):
+    import database
+    import main as app_module
+
+    scripts = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "verify_*.py")))
+    if selected:
+        wanted = {f"verify_{name.removeprefix('verify_').removesuffix('.py')}.py" for name in selected}
+        scripts = [s for s in scripts if os.path.basename(s) in wanted]
+
+    print(f"Embedded backend: {database.SQLITE_PATH}")
+    boot = time.perf_counter()
+    results = []
+    with TestClient(app_module.app) as client: # runs startup (migrations, templates)
+        import seed_users
+        seed_users.seed_users()
+        install_adapter(client)
+        print(f"Booted in {time.perf_counter() - boot:.2f}s\n")
+
+        for path in scripts:
+            name = os.path.basename(path)
+            if name in SKIP:
+                results.append((name, "SKIP", SKIP[name], 0.0))
+                continue
+            print(f"=== {name} ===")
+            passed, failed, error, elapsed = run_script(path)
+            status = "ERROR" if error else ("FAIL" if failed else "OK")
+            results.append((name, status, error or f"{passed} passed, {failed} failed", elapsed))
+            print()
+
+    print("=== Summary ===")
+    for name, status, detail, elapsed in results:
+        print(f"{status:<6} {name:<36} {elapsed:7.2f}s  {detail}")
+    print(f"Total: {time.perf_counter() - boot:.2f}s")
+
+    if os.getenv("SQLITE_PATH") == ":memory:": # ephemeral file created by database._sqlite_path
+        for suffix in ("", "-wal", "-shm"):
+            with contextlib.suppress(OSError):
+                os.remove(database.SQLITE_PATH + suffix)
+    return 1 if any(status in ("FAIL", "ERROR") for _, status, _, _ in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
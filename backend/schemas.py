@@ -1,8 +1,20 @@
 from pydantic import BaseModel
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 from datetime import datetime
 from enum import Enum
 
+def from_orm(schema, obj):
+    """orm_mode validation that works on both pydantic v1 and v2."""
+    if hasattr(schema, "model_validate"):
+        return schema.model_validate(obj, from_attributes=True)
+    return schema.from_orm(obj)
+
+def to_json(model) -> bytes:
+    """JSON bytes for a validated model, on both pydantic v1 and v2."""
+    if hasattr(model, "model_dump_json"):
+        return model.model_dump_json().encode()
+    return model.json().encode()
+
 class EscrowState(str, Enum):
     CREATED = "CREATED"
     FUNDED = "FUNDED"
@@ -70,9 +82,59 @@ class Evidence(EvidenceBase):
     id: str
     milestone_id: str
     timestamp: datetime
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
+    preview_url: Optional[str] = None # thumbnail / first page, once rendered
+    # Extracted after upload (NULL until then, or when the file has no such data)
+    captured_at: Optional[datetime] = None
+    captured_at_utc: Optional[bool] = None # False: camera-local time (zone unknown)
+    gps_latitude: Optional[float] = None
+    gps_longitude: Optional[float] = None
+    page_count: Optional[int] = None
+    has_text: Optional[bool] = None
     class Config:
         orm_mode = True
 
+class EvidenceMatch(Evidence):
+    distance_m: Optional[float] = None # with a near_* filter
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size_bytes: int
+    source_type: EvidenceSourceType
+    evidence_type: Optional[str] = None # Contractor uploads: one of the milestone's required types
+    sha256: Optional[str] = None # Whole-file hash, checked at completion when given
+
+class UploadSession(BaseModel):
+    id: str
+    milestone_id: str
+    origin: EvidenceOrigin
+    evidence_type: str
+    source_type: EvidenceSourceType
+    filename: str
+    size_bytes: int
+    chunk_bytes: int
+    total_chunks: int
+    status: str
+    received_bytes: int
+    received_ranges: List[List[int]] # [start, end) byte offsets
+    missing_chunks: List[int]
+    evidence_id: Optional[str] = None
+    expires_at: datetime
+
+class PresignedRequest(BaseModel):
+    method: str
+    url: str
+    headers: Dict[str, str] = {} # Must be sent with the request (they are part of the signature)
+
+class DirectUpload(BaseModel):
+    session_id: str
+    storage_key: str
+    already_stored: bool # This escrow already has the content: skip the upload, just complete
+    upload: Optional[PresignedRequest] = None
+    complete_url: str
+    expires_at: datetime
+
 class ExternalEvidenceRequest(BaseModel):
     # For file uploads, these come from Form Data, but for validation we can keep structure conceptual
     source_type: EvidenceSourceType
@@ -204,3 +266,39 @@ class MilestoneTemplateResponse(BaseModel):
 class ApplyTemplateRequest(BaseModel):
     template_id: str
 
+
+# --- Webhooks ---
+class WebhookSubscriptionCreate(BaseModel):
+    url: str
+    secret: Optional[str] = None # Generated if omitted
+    event_types: List[str] = [] # Empty => all events
+
+class WebhookSubscription(BaseModel):
+    id: str
+    url: str
+    event_types: List[str]
+    is_active: bool
+    created_at: datetime
+
+class WebhookSubscriptionCreated(WebhookSubscription):
+    secret: str # Only returned once, at registration
+
+
+# --- Portfolio Summary ---
+class PortfolioSummary(BaseModel):
+    organization_id: str
+    role: str
+    escrow_count: int = 0
+    escrows_created: int = 0
+    escrows_funded: int = 0
+    escrows_active: int = 0
+    escrows_completed: int = 0
+    escrows_disputed: int = 0
+    escrows_halted: int = 0
+    total_amount: float = 0.0
+    funded_amount: float = 0.0
+    outstanding_delta: float = 0.0
+    milestones_awaiting_inspection: int = 0
+    updated_at: Optional[datetime] = None
+    class Config:
+        orm_mode = True
@@ -2,9 +2,10 @@ from sqlalchemy.orm import Session
 from database import SessionLocal, engine
 import models
 import auth
+import migrations
 
-# Ensure tables exist
-models.Base.metadata.create_all(bind=engine)
+# Ensure the schema is current
+migrations.upgrade(engine)
 
 def seed_users():
     db = SessionLocal()
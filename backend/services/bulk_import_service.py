@@ -0,0 +1,202 @@
+"""
+Bulk escrow import (POST /escrows/bulk): onboarding a lender's book in one request.
+
+Rows are validated up front in a single pass, then written in chunks. Each chunk is one
+transaction: a multi-row INSERT for escrows, one for milestones, one batched ledger append,
+the portfolio summary deltas, and (after commit) one batched notification emit.
+Per-row results are yielded as each chunk commits, so the handler can stream them as NDJSON.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+
+import database
+import models
+import schemas
+from services import summary_service
+from services.ledger_service import calculate_hash, create_attestations
+from services.notification_service import notification_service
+
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "500"))
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "50000"))
+
+# CSV layout: ref,buyer_id,provider_id,total_amount,milestone_name,milestone_amount,required_evidence_types
+# One line per milestone. Lines sharing a `ref` (or, without one, each line) form one escrow;
+# escrow columns are read from its first line. required_evidence_types is ';'-separated.
+
+class BulkImportError(ValueError):
+    """The payload as a whole can't be parsed (row-level problems are reported per row)."""
+
+def _check_size(rows):
+    if not rows:
+        raise BulkImportError("No escrows to import")
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise BulkImportError(f"At most {BULK_IMPORT_MAX_ROWS} escrows per import")
+    return rows
+
+def parse_json(payload):
+    if not isinstance(payload, list):
+        raise BulkImportError("Expected a JSON array of escrows")
+    return _check_size(payload)
+
+def parse_csv(text: str):
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {"buyer_id", "provider_id", "total_amount"} - set(reader.fieldnames or [])
+    if missing:
+        raise BulkImportError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    rows, by_ref = [], {}
+    for line in reader:
+        ref = (line.get("ref") or "").strip()
+        row = by_ref.get(ref) if ref else None
+        if row is None:
+            row = {
+                "buyer_id": line["buyer_id"],
+                "provider_id": line["provider_id"],
+                "total_amount": line["total_amount"],
+                "milestones": []
+            }
+            if ref:
+                row["ref"] = ref
+                by_ref[ref] = row
+            rows.append(row)
+        if (line.get("milestone_name") or "").strip():
+            evidence = line.get("required_evidence_types") or ""
+            row["milestones"].append({
+                "name": line["milestone_name"],
+                "amount": line.get("milestone_amount"),
+                "required_evidence_types": [t.strip() for t in evidence.split(";") if t.strip()]
+            })
+    return _check_size(rows)
+
+def _errors(exc: ValidationError):
+    return [{"field": ".".join(str(p) for p in e["loc"]), "message": e["msg"]} for e in exc.errors()]
+
+def validate(rows):
+    """
+    One pass over the whole payload before anything is written.
+    Returns (valid, rejected): valid is [(index, ref, EscrowCreate)], rejected is per-row result dicts.
+    """
+    valid, rejected = [], []
+    for index, row in enumerate(rows):
+        ref = row.get("ref") if isinstance(row, dict) else None
+        try:
+            escrow = schemas.EscrowCreate(**row) if isinstance(row, dict) else schemas.EscrowCreate.parse_obj(row)
+        except (ValidationError, TypeError) as exc:
+            errors = _errors(exc) if isinstance(exc, ValidationError) else [{"field": "", "message": "Expected an object"}]
+            rejected.append({"row": index, "ref": ref, "status": "error", "errors": errors})
+            continue
+
+        errors = []
+        if escrow.total_amount <= 0:
+            errors.append({"field": "total_amount", "message": "must be positive"})
+        for i, ms in enumerate(escrow.milestones):
+            if ms.amount <= 0:
+                errors.append({"field": f"milestones.{i}.amount", "message": "must be positive"})
+        if errors:
+            rejected.append({"row": index, "ref": ref, "status": "error", "errors": errors})
+        else:
+            valid.append((index, ref, escrow))
+    return valid, rejected
+
+def _write_chunk(db, chunk, actor):
+    """Inserts one chunk of validated escrows in the session's transaction. Returns per-row results."""
+    now = datetime.utcnow()
+    escrow_rows, milestone_rows, attestations, events, results = [], [], [], [], []
+    deltas = defaultdict(lambda: defaultdict(float))
+    summary_keys = summary_service.summary_keys(actor.organization_id, None)
+
+    for index, ref, escrow in chunk:
+        escrow_id = str(uuid.uuid4())
+        milestones = [m.dict() for m in escrow.milestones]
+        # Same terms document and hash as POST /escrows
+        terms_data = {
+            "buyer": escrow.buyer_id,
+            "provider": escrow.provider_id,
+            "amount": escrow.total_amount,
+            "milestones": milestones
+        }
+        agreement_hash = calculate_hash(terms_data)
+
+        escrow_rows.append({
+            "id": escrow_id,
+            "buyer_id": escrow.buyer_id,
+            "provider_id": escrow.provider_id,
+            "total_amount": escrow.total_amount,
+            "funded_amount": 0.0,
+            "state": models.EscrowState.CREATED,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+            "agreement_hash": agreement_hash,
+            "is_disputed": False,
+            "organization_id": actor.organization_id
+        })
+        for position, ms in enumerate(milestones):
+            milestone_rows.append({
+                "id": str(uuid.uuid4()),
+                "escrow_id": escrow_id,
+                "name": ms["name"],
+                "amount": ms["amount"],
+                "required_evidence_types": ms["required_evidence_types"],
+                "status": models.MilestoneStatus.CREATED,
+                "position": position
+            })
+        attestations.append(dict(
+            entity_id=escrow_id, event_type=models.AuditEvent.CREATE, actor_username=actor.username,
+            actor_role=actor.role, data=terms_data, agreement_hash=agreement_hash, agreement_version=1
+        ))
+        events.append(dict(
+            event_type=models.AuditEvent.CREATE, escrow_id=escrow_id, actor_role=actor.role,
+            data={"users": {"CUSTODIAN": "title_co", "AGENT": "alice_agent"}}
+        ))
+        for key in summary_keys:
+            for column, value in summary_service.escrow_contribution(models.EscrowState.CREATED, escrow.total_amount, 0.0).items():
+                deltas[key][column] += value
+        results.append({"row": index, "ref": ref, "status": "created", "id": escrow_id, "agreement_hash": agreement_hash})
+
+    # Core executemany: rendered as multi-row INSERT ... VALUES batches by the dialect.
+    # Bypasses the ORM flush hooks, so the summary deltas are applied explicitly below.
+    db.execute(insert(models.Escrow), escrow_rows)
+    if milestone_rows:
+        db.execute(insert(models.Milestone), milestone_rows)
+    summary_service.apply_deltas(db.connection(), deltas)
+
+    # Ledger first (same ordering as POST /escrows), then commit; notifications after commit
+    create_attestations(attestations)
+    database.after_commit(db, notification_service.emit_notifications, events)
+    db.commit()
+    return results
+
+def import_escrows(rows, actor):
+    """
+    Generator of per-row results: rejected rows first, then created rows chunk by chunk.
+    A chunk that fails to write is reported row by row as errors and the import continues.
+    Uses its own session: it runs while the response is being streamed.
+    """
+    valid, rejected = validate(rows)
+    yield from rejected
+
+    db = database.SessionLocal()
+    try:
+        for start in range(0, len(valid), BULK_IMPORT_CHUNK_SIZE):
+            chunk = valid[start:start + BULK_IMPORT_CHUNK_SIZE]
+            try:
+                yield from _write_chunk(db, chunk, actor)
+            except Exception as exc:
+                db.rollback()
+                for index, ref, _ in chunk:
+                    yield {"row": index, "ref": ref, "status": "error", "errors": [{"field": "", "message": str(exc)}]}
+    finally:
+        db.close()
+
+def ndjson(results):
+    for result in results:
+        yield json.dumps(result, default=str) + "\n"
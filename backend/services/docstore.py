@@ -0,0 +1,338 @@
+"""
+In-process document store implementing the slice of the pymongo API this app uses
+(find/find_one/insert/update/delete/bulk_write with UpdateOne, basic query and update
+operators, sort/skip/limit cursors), plus an asyncio facade matching AsyncMongoClient.
+
+Backs the ledger, notifications and webhooks in the embedded profile (BACKEND_PROFILE=embedded),
+so the API runs hermetically without a MongoDB server. Data lives in process memory only.
+"""
+import copy
+import threading
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, InsertOne, UpdateOne
+
+_MISSING = object()
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+def _compare(op, value, operand):
+    if op == "$eq":
+        return value is not _MISSING and value == operand
+    if op == "$ne":
+        return value is _MISSING or value != operand
+    if op == "$in":
+        return value is not _MISSING and value in operand
+    if op == "$nin":
+        return value is _MISSING or value not in operand
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if value is _MISSING or value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise NotImplementedError(f"Query operator {op} is not supported by the embedded document store")
+
+def matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            if not all(_compare(op, value, operand) for op, operand in condition.items()):
+                return False
+        elif not _compare("$eq", value, condition):
+            return False
+    return True
+
+def _set_path(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+def _apply_update(doc, update, inserting=False):
+    for op, fields in update.items():
+        if op == "$set":
+            for path, value in fields.items():
+                _set_path(doc, path, copy.deepcopy(value))
+        elif op == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(doc, path, copy.deepcopy(value))
+        elif op == "$inc":
+            for path, amount in fields.items():
+                current = _get(doc, path)
+                _set_path(doc, path, (0 if current is _MISSING else current) + amount)
+        elif op == "$unset":
+            for path in fields:
+                parent = _get(doc, path.rsplit(".", 1)[0]) if "." in path else doc
+                if isinstance(parent, dict):
+                    parent.pop(path.rsplit(".", 1)[-1], None)
+        elif op == "$push":
+            for path, value in fields.items():
+                current = _get(doc, path)
+                _set_path(doc, path, ([] if current is _MISSING else current) + [copy.deepcopy(value)])
+        else:
+            raise NotImplementedError(f"Update operator {op} is not supported by the embedded document store")
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    include_id = projection.get("_id", 1)
+    out = {k: copy.deepcopy(doc[k]) for k, on in projection.items() if on and k != "_id" and k in doc}
+    if include_id and "_id" in doc:
+        out["_id"] = doc["_id"]
+    return out
+
+def _sort_key(field):
+    # Mongo orders missing/null before any value
+    def key(doc):
+        value = _get(doc, field)
+        return (0, 0) if value is _MISSING or value is None else (1, value)
+    return key
+
+def _normalize_sort(key_or_list, direction=None):
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or ASCENDING)]
+    return list(key_or_list)
+
+class Cursor:
+    def __init__(self, collection, query, projection=None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def _results(self):
+        docs = self._collection._select(self._query)
+        for field, direction in reversed(self._sort):
+            docs.sort(key=_sort_key(field), reverse=direction == DESCENDING)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    def __iter__(self):
+        return iter(self._results())
+
+class Collection:
+    def __init__(self, name):
+        self.name = name
+        self._docs = {} # _id -> document (insertion ordered)
+        self._lock = threading.RLock()
+
+    def _select(self, query):
+        with self._lock:
+            return [d for d in self._docs.values() if matches(d, query)]
+
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0):
+        cursor = Cursor(self, filter or {}, projection).skip(skip).limit(limit)
+        return cursor.sort(sort) if sort else cursor
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        for doc in self.find(filter, projection, sort=sort, limit=1):
+            return doc
+        return None
+
+    def count_documents(self, filter):
+        return len(self._select(filter))
+
+    def insert_one(self, document):
+        with self._lock:
+            document.setdefault("_id", ObjectId()) # pymongo also mutates the caller's dict
+            if document["_id"] in self._docs:
+                raise ValueError(f"Duplicate key: {document['_id']}")
+            self._docs[document["_id"]] = copy.deepcopy(document)
+        return SimpleNamespace(inserted_id=document["_id"], acknowledged=True)
+
+    def insert_many(self, documents, ordered=True):
+        with self._lock:
+            ids = [self.insert_one(d).inserted_id for d in documents]
+        return SimpleNamespace(inserted_ids=ids, acknowledged=True)
+
+    def _update(self, filter, update, upsert, many):
+        with self._lock:
+            targets = [d for d in self._docs.values() if matches(d, filter)]
+            if not many:
+                targets = targets[:1]
+            for doc in targets:
+                _apply_update(doc, update)
+            upserted_id = None
+            if not targets and upsert:
+                doc = {k: v for k, v in filter.items() if not k.startswith("$") and not isinstance(v, dict)}
+                _apply_update(doc, update, inserting=True)
+                upserted_id = self.insert_one(doc).inserted_id
+            # (modified_count counts matches; the app only checks it for truthiness)
+            return SimpleNamespace(matched_count=len(targets), modified_count=len(targets),
+                                   upserted_id=upserted_id, acknowledged=True)
+
+    def update_one(self, filter, update, upsert=False):
+        return self._update(filter, update, upsert, many=False)
+
+    def update_many(self, filter, update, upsert=False):
+        return self._update(filter, update, upsert, many=True)
+
+    def _delete(self, filter, many):
+        with self._lock:
+            ids = [i for i, d in self._docs.items() if matches(d, filter)]
+            if not many:
+                ids = ids[:1]
+            for i in ids:
+                del self._docs[i]
+            return SimpleNamespace(deleted_count=len(ids), acknowledged=True)
+
+    def delete_one(self, filter):
+        return self._delete(filter, many=False)
+
+    def delete_many(self, filter):
+        return self._delete(filter, many=True)
+
+    def bulk_write(self, requests, ordered=True):
+        inserted = matched = upserted = 0
+        with self._lock:
+            for request in requests:
+                if isinstance(request, InsertOne):
+                    self.insert_one(request._doc)
+                    inserted += 1
+                elif isinstance(request, UpdateOne):
+                    result = self.update_one(request._filter, request._doc, upsert=request._upsert)
+                    matched += result.matched_count
+                    upserted += 1 if result.upserted_id is not None else 0
+                else:
+                    raise NotImplementedError(f"{type(request).__name__} is not supported by the embedded document store")
+        return SimpleNamespace(inserted_count=inserted, matched_count=matched, modified_count=matched,
+                               upserted_count=upserted, acknowledged=True)
+
+    def create_index(self, keys, **kwargs):
+        return "_".join(f"{k}_{d}" for k, d in _normalize_sort(keys))
+
+class Database:
+    def __init__(self, name):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = Collection(name)
+            return self._collections[name]
+
+    __getattr__ = __getitem__
+
+class DocumentClient:
+    """Drop-in for MongoClient (client[db][collection])."""
+
+    def __init__(self):
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = Database(name)
+            return self._databases[name]
+
+    def server_info(self):
+        return {"version": "embedded"}
+
+    def close(self):
+        pass
+
+# -- asyncio facade (operations are in-memory, so they complete without yielding) --
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, key_or_list, direction=None):
+        self._cursor.sort(key_or_list, direction)
+        return self
+
+    def skip(self, n):
+        self._cursor.skip(n)
+        return self
+
+    def limit(self, n):
+        self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        results = self._cursor._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        self._iter = iter(self._cursor._results())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class AsyncCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+class AsyncDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return AsyncCollection(self._database[name])
+
+class AsyncDocumentClient:
+    """Drop-in for AsyncMongoClient, sharing data with a DocumentClient."""
+
+    def __init__(self, client: DocumentClient):
+        self._client = client
+
+    def __getitem__(self, name):
+        return AsyncDatabase(self._client[name])
+
+    async def server_info(self):
+        return self._client.server_info()
@@ -0,0 +1,280 @@
+"""
+Read-through cache for GET /escrows/{id}: the serialized escrow graph (JSON bytes) and its ETag.
+
+Entries are dropped after every commit that touched the escrow or anything in its graph
+(models._touch_escrows records the ids on the session; see _invalidate_committed below), so hits
+are served without a database round trip. Fills race with invalidations: a reader takes a token
+before querying and the fill is refused if the escrow was invalidated after that token.
+
+Two stores:
+- in-process LRU (default): per worker, so other workers' commits are only seen after
+  ESCROW_CACHE_TTL_SECONDS;
+- shared SQLite file (ESCROW_CACHE_SHARED_PATH): one cache for every worker on the host,
+  invalidated by whichever worker commits.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+ESCROW_CACHE_MAX_ENTRIES = int(os.getenv("ESCROW_CACHE_MAX_ENTRIES", "5000")) # 0 disables the cache
+ESCROW_CACHE_TTL_SECONDS = float(os.getenv("ESCROW_CACHE_TTL_SECONDS", "30"))
+ESCROW_CACHE_SHARED_PATH = os.getenv("ESCROW_CACHE_SHARED_PATH", "")
+
+class MemoryStore:
+    """Bounded LRU with per-escrow invalidation epochs."""
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # escrow_id -> (expires_at, etag, body)
+        # escrow_id -> epoch of its last invalidation. Bounded: evicted epochs raise _floor,
+        # which then stands in for every escrow no longer listed.
+        self._invalidated = OrderedDict()
+        self._epoch = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def token(self) -> int:
+        with self._lock:
+            return self._epoch
+
+    def get(self, escrow_id: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(escrow_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[escrow_id]
+                return None
+            self._entries.move_to_end(escrow_id)
+            return entry[1], entry[2]
+
+    def put(self, escrow_id: str, token: int, etag: str, body: bytes) -> bool:
+        with self._lock:
+            if max(self._invalidated.get(escrow_id, 0), self._floor) > token:
+                return False
+            self._entries[escrow_id] = (time.monotonic() + self.ttl_seconds, etag, body)
+            self._entries.move_to_end(escrow_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, escrow_ids) -> int:
+        with self._lock:
+            self._epoch += 1
+            dropped = 0
+            for escrow_id in escrow_ids:
+                dropped += self._entries.pop(escrow_id, None) is not None
+                self._invalidated[escrow_id] = self._epoch
+                self._invalidated.move_to_end(escrow_id)
+            while len(self._invalidated) > self.max_entries:
+                _, epoch = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, epoch)
+            return dropped
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self._epoch += 1
+            self._floor = self._epoch
+
+    def size(self) -> int:
+        return len(self._entries)
+
+class SqliteStore:
+    """
+    Same contract as MemoryStore, in a SQLite file shared by the workers on one host.
+    The epoch counter and floor live in the file too, so the fill check works across processes.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self.evictions = 0
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS escrow_cache (
+                    escrow_id TEXT PRIMARY KEY, etag TEXT NOT NULL, body BLOB NOT NULL, expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_escrow_cache_expires_at ON escrow_cache (expires_at);
+                CREATE TABLE IF NOT EXISTS escrow_cache_invalidations (escrow_id TEXT PRIMARY KEY, epoch INTEGER NOT NULL);
+                CREATE INDEX IF NOT EXISTS ix_escrow_cache_invalidations_epoch ON escrow_cache_invalidations (epoch);
+                CREATE TABLE IF NOT EXISTS escrow_cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                INSERT OR IGNORE INTO escrow_cache_meta VALUES ('epoch', 0), ('floor', 0);
+            """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, conn, name):
+        return conn.execute("SELECT value FROM escrow_cache_meta WHERE name = ?", (name,)).fetchone()[0]
+
+    def token(self) -> int:
+        return self._meta(self._conn(), "epoch")
+
+    def get(self, escrow_id: str) -> Optional[Tuple[str, bytes]]:
+        row = self._conn().execute(
+            "SELECT etag, body FROM escrow_cache WHERE escrow_id = ? AND expires_at >= ?", (escrow_id, time.time())
+        ).fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    def put(self, escrow_id: str, token: int, etag: str, body: bytes) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT epoch FROM escrow_cache_invalidations WHERE escrow_id = ?", (escrow_id,)).fetchone()
+            if max(row[0] if row else 0, self._meta(conn, "floor")) > token:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT OR REPLACE INTO escrow_cache VALUES (?, ?, ?, ?)",
+                         (escrow_id, etag, body, time.time() + self.ttl_seconds))
+            overflow = conn.execute("SELECT COUNT(*) FROM escrow_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                # Approximate LRU: drop the entries closest to expiry (i.e. filled longest ago)
+                conn.execute("DELETE FROM escrow_cache WHERE escrow_id IN "
+                             "(SELECT escrow_id FROM escrow_cache ORDER BY expires_at LIMIT ?)", (overflow,))
+                self.evictions += overflow
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidate(self, escrow_ids) -> int:
+        escrow_ids = list(escrow_ids)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            epoch = conn.execute("UPDATE escrow_cache_meta SET value = value + 1 WHERE name = 'epoch' RETURNING value").fetchone()[0]
+            marks = ",".join("?" * len(escrow_ids))
+            dropped = conn.execute(f"DELETE FROM escrow_cache WHERE escrow_id IN ({marks})", escrow_ids).rowcount
+            conn.executemany("INSERT OR REPLACE INTO escrow_cache_invalidations VALUES (?, ?)", [(i, epoch) for i in escrow_ids])
+            overflow = conn.execute("SELECT COUNT(*) FROM escrow_cache_invalidations").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                cutoff = conn.execute("SELECT epoch FROM escrow_cache_invalidations ORDER BY epoch LIMIT 1 OFFSET ?",
+                                      (overflow - 1,)).fetchone()[0]
+                conn.execute("DELETE FROM escrow_cache_invalidations WHERE epoch <= ?", (cutoff,))
+                conn.execute("UPDATE escrow_cache_meta SET value = MAX(value, ?) WHERE name = 'floor'", (cutoff,))
+            conn.execute("COMMIT")
+            return dropped
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM escrow_cache")
+        conn.execute("DELETE FROM escrow_cache_invalidations")
+        conn.execute("UPDATE escrow_cache_meta SET value = value + 1 WHERE name = 'epoch'")
+        conn.execute("UPDATE escrow_cache_meta SET value = (SELECT value FROM escrow_cache_meta WHERE name = 'epoch') WHERE name = 'floor'")
+        conn.execute("COMMIT")
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM escrow_cache").fetchone()[0]
+
+class EscrowCache:
+    def __init__(self, store=None):
+        self.enabled = store is not None
+        self.store = store
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._fills = 0
+        self._rejected_fills = 0
+        self._invalidations = 0
+
+    def get(self, escrow_id: str) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) or None."""
+        if not self.enabled:
+            return None
+        entry = self.store.get(escrow_id)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return entry
+
+    def token(self) -> Optional[int]:
+        """Take before querying the database; pass to put()."""
+        return self.store.token() if self.enabled else None
+
+    def put(self, escrow_id: str, token: Optional[int], etag: str, body: bytes):
+        if not self.enabled or token is None:
+            return
+        stored = self.store.put(escrow_id, token, etag, body)
+        with self._lock:
+            if stored:
+                self._fills += 1
+            else:
+                self._rejected_fills += 1
+
+    def invalidate(self, escrow_ids):
+        if not self.enabled or not escrow_ids:
+            return
+        dropped = self.store.invalidate(escrow_ids)
+        with self._lock:
+            self._invalidations += dropped
+
+    def clear(self):
+        if self.enabled:
+            self.store.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "store": self.store.name if self.store else None,
+                "size": self.store.size() if self.enabled else 0,
+                "max_entries": self.store.max_entries if self.store else 0,
+                "ttl_seconds": self.store.ttl_seconds if self.store else None,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "fills": self._fills,
+                "rejected_fills": self._rejected_fills, # lost a race with an invalidation
+                "invalidations": self._invalidations,
+                "evictions": self.store.evictions if self.store else 0
+            }
+
+def _make_store():
+    if ESCROW_CACHE_MAX_ENTRIES <= 0:
+        return None
+    if ESCROW_CACHE_SHARED_PATH:
+        return SqliteStore(ESCROW_CACHE_SHARED_PATH, ESCROW_CACHE_MAX_ENTRIES, ESCROW_CACHE_TTL_SECONDS)
+    return MemoryStore(ESCROW_CACHE_MAX_ENTRIES, ESCROW_CACHE_TTL_SECONDS)
+
+escrow_cache = EscrowCache(_make_store())
+
+# -- Invalidation --
+# models._touch_escrows adds every escrow a flush changed (directly or via milestones, evidence,
+# payment instructions) to session.info["touched_escrow_ids"]. Drop them once the commit is durable;
+# a rolled-back transaction changed nothing.
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    escrow_cache.invalidate(session.info.pop("touched_escrow_ids", None))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched(session):
+    session.info.pop("touched_escrow_ids", None)
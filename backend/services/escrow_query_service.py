@@ -0,0 +1,252 @@
+import base64
+import json
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, tuple_, exists
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+
+class InvalidCursor(ValueError):
+    pass
+
+def escrow_graph_options():
+    """
+    Loader strategy for the full escrow graph (escrow -> milestones -> evidence).
+    Always 1 + 2 queries regardless of page size. Anything else that would lazy-load
+    raises instead, so N+1 regressions fail loudly in tests.
+    (sql_only: back-references already in the identity map still resolve.)
+    """
+    return (
+        selectinload(models.Escrow.milestones).options(
+            selectinload(models.Milestone.evidence).raiseload("*", sql_only=True),
+            raiseload("*", sql_only=True),
+        ),
+        raiseload("*", sql_only=True),
+    )
+
+def _escrow_graph_stmt(escrow_id: str):
+    return select(models.Escrow).options(*escrow_graph_options()).where(models.Escrow.id == escrow_id)
+
+def get_escrow_graph(db: Session, escrow_id: str):
+    return db.execute(_escrow_graph_stmt(escrow_id)).scalar_one_or_none()
+
+async def get_escrow_graph_async(db: AsyncSession, escrow_id: str):
+    return (await db.execute(_escrow_graph_stmt(escrow_id))).scalar_one_or_none()
+
+async def get_escrow_stamp_async(db: AsyncSession, escrow_id: str):
+    """(version, updated_at) for conditional GETs: one narrow row, no graph load."""
+    stmt = select(models.Escrow.version, models.Escrow.updated_at).where(models.Escrow.id == escrow_id)
+    return (await db.execute(stmt)).first()
+
+def encode_cursor(escrow: models.Escrow) -> str:
+    raw = json.dumps([escrow.created_at.isoformat(), escrow.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, escrow_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), escrow_id
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+
+def _list_escrows_stmt(limit, cursor, state, buyer_id, provider_id, milestone_status, columns=None):
+    if columns is None:
+        stmt = select(models.Escrow).options(*escrow_graph_options())
+    else:
+        stmt = select(*columns)
+
+    if state is not None:
+        stmt = stmt.where(models.Escrow.state == state)
+    if buyer_id is not None:
+        stmt = stmt.where(models.Escrow.buyer_id == buyer_id)
+    if provider_id is not None:
+        stmt = stmt.where(models.Escrow.provider_id == provider_id)
+    if milestone_status is not None:
+        stmt = stmt.where(exists().where(
+            models.Milestone.escrow_id == models.Escrow.id,
+            models.Milestone.status == milestone_status
+        ))
+    if cursor:
+        created_at, escrow_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(models.Escrow.created_at, models.Escrow.id) < tuple_(created_at, escrow_id))
+
+    # Fetch one extra row to know whether another page exists
+    return stmt.order_by(models.Escrow.created_at.desc(), models.Escrow.id.desc()).limit(limit + 1)
+
+def _page(escrows, limit):
+    next_cursor = None
+    if len(escrows) > limit:
+        escrows = escrows[:limit]
+        next_cursor = encode_cursor(escrows[-1])
+    return escrows, next_cursor
+
+def list_escrows(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    state: Optional[models.EscrowState] = None,
+    buyer_id: Optional[str] = None,
+    provider_id: Optional[str] = None,
+    milestone_status: Optional[models.MilestoneStatus] = None
+):
+    """
+    Keyset page of escrows, newest first, ordered by (created_at, id).
+    Returns (escrows, next_cursor); next_cursor is None on the last page.
+    Each filter is backed by a (<filter>, created_at, id) index, so page N costs the same as page 1.
+    """
+    stmt = _list_escrows_stmt(limit, cursor, state, buyer_id, provider_id, milestone_status)
+    return _page(db.execute(stmt).scalars().all(), limit)
+
+async def list_escrows_async(
+    db: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    state: Optional[models.EscrowState] = None,
+    buyer_id: Optional[str] = None,
+    provider_id: Optional[str] = None,
+    milestone_status: Optional[models.MilestoneStatus] = None
+):
+    """Async variant of list_escrows (same statement, same paging)."""
+    stmt = _list_escrows_stmt(limit, cursor, state, buyer_id, provider_id, milestone_status)
+    return _page((await db.execute(stmt)).scalars().all(), limit)
+
+# -- Projected rows (fast serialization path) --
+# Only the columns schemas.Escrow exposes, in schema field order, as plain dicts.
+ESCROW_COLUMNS = (
+    models.Escrow.id, models.Escrow.buyer_id, models.Escrow.provider_id, models.Escrow.total_amount,
+    models.Escrow.state, models.Escrow.created_at, models.Escrow.version, models.Escrow.agreement_hash,
+    models.Escrow.is_disputed, models.Escrow.funded_amount
+)
+MILESTONE_COLUMNS = (
+    models.Milestone.escrow_id, models.Milestone.name, models.Milestone.amount, models.Milestone.required_evidence_types,
+    models.Milestone.id, models.Milestone.status, models.Milestone.approval_signature
+)
+EVIDENCE_COLUMNS = (
+    models.Evidence.evidence_type, models.Evidence.url, models.Evidence.origin, models.Evidence.source_type,
+    models.Evidence.submitted_by_role, models.Evidence.id, models.Evidence.milestone_id, models.Evidence.timestamp,
+    models.Evidence.sha256, models.Evidence.size_bytes, models.Evidence.preview_url,
+    models.Evidence.captured_at, models.Evidence.captured_at_utc, models.Evidence.gps_latitude,
+    models.Evidence.gps_longitude, models.Evidence.page_count, models.Evidence.has_text
+)
+
+def _escrow_dict(row, milestones):
+    return {
+        "id": row.id,
+        "buyer_id": row.buyer_id,
+        "provider_id": row.provider_id,
+        "total_amount": row.total_amount,
+        "state": row.state,
+        "created_at": row.created_at,
+        "version": row.version,
+        "agreement_hash": row.agreement_hash,
+        "is_disputed": row.is_disputed,
+        "milestones": milestones,
+        "funded_amount": row.funded_amount if row.funded_amount is not None else 0.0
+    }
+
+def _milestone_dict(row, evidence):
+    return {
+        "name": row.name,
+        "amount": row.amount,
+        "required_evidence_types": row.required_evidence_types,
+        "id": row.id,
+        "status": row.status,
+        "approval_signature": row.approval_signature,
+        "evidence": evidence
+    }
+
+async def list_escrow_rows_async(
+    db: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    state: Optional[models.EscrowState] = None,
+    buyer_id: Optional[str] = None,
+    provider_id: Optional[str] = None,
+    milestone_status: Optional[models.MilestoneStatus] = None
+):
+    """
+    list_escrows_async as response-shaped dicts: same filters, paging and 1 + 2 queries,
+    but column tuples instead of ORM instances (no identity map, no instance state).
+    """
+    stmt = _list_escrows_stmt(limit, cursor, state, buyer_id, provider_id, milestone_status, columns=ESCROW_COLUMNS)
+    rows, next_cursor = _page((await db.execute(stmt)).all(), limit)
+    if not rows:
+        return [], next_cursor
+
+    milestone_rows = (await db.execute(
+        select(*MILESTONE_COLUMNS).where(models.Milestone.escrow_id.in_([r.id for r in rows]))
+        .order_by(models.Milestone.position, models.Milestone.id) # same plan order as Escrow.milestones
+    )).all()
+    evidence_by_milestone = defaultdict(list)
+    if milestone_rows:
+        evidence_rows = await db.execute(
+            select(*EVIDENCE_COLUMNS).where(models.Evidence.milestone_id.in_([m.id for m in milestone_rows]))
+        )
+        for e in evidence_rows:
+            evidence_by_milestone[e.milestone_id].append(e._asdict())
+
+    milestones_by_escrow = defaultdict(list)
+    for m in milestone_rows:
+        milestones_by_escrow[m.escrow_id].append(_milestone_dict(m, evidence_by_milestone[m.id]))
+    return [_escrow_dict(r, milestones_by_escrow[r.id]) for r in rows], next_cursor
+
+EARTH_RADIUS_M = 6371008.8
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+async def list_evidence_rows_async(
+    db: AsyncSession,
+    escrow_id: str,
+    milestone_id: Optional[str] = None,
+    source_type: Optional[models.EvidenceSourceType] = None,
+    geotagged: Optional[bool] = None,
+    captured_after: Optional[datetime] = None,
+    captured_before: Optional[datetime] = None,
+    near=None,
+    has_text: Optional[bool] = None,
+    min_pages: Optional[int] = None
+):
+    """
+    Evidence on one escrow as response-shaped dicts, filtered on the extracted file metadata
+    (services/metadata_service.py), oldest first. near = (latitude, longitude, radius_m): a bounding
+    box narrows the rows in SQL, the exact distance is checked here and returned as distance_m.
+    """
+    stmt = (select(*EVIDENCE_COLUMNS)
+            .join(models.Milestone, models.Milestone.id == models.Evidence.milestone_id)
+            .where(models.Milestone.escrow_id == escrow_id))
+    if milestone_id is not None:
+        stmt = stmt.where(models.Evidence.milestone_id == milestone_id)
+    if source_type is not None:
+        stmt = stmt.where(models.Evidence.source_type == source_type)
+    if geotagged is not None:
+        stmt = stmt.where(models.Evidence.gps_latitude.is_not(None) if geotagged else models.Evidence.gps_latitude.is_(None))
+    if captured_after is not None:
+        stmt = stmt.where(models.Evidence.captured_at >= captured_after)
+    if captured_before is not None:
+        stmt = stmt.where(models.Evidence.captured_at < captured_before)
+    if has_text is not None:
+        stmt = stmt.where(models.Evidence.has_text == has_text)
+    if min_pages is not None:
+        stmt = stmt.where(models.Evidence.page_count >= min_pages)
+    if near is not None:
+        lat, lon, radius_m = near
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        stmt = stmt.where(models.Evidence.gps_latitude.between(lat - dlat, lat + dlat),
+                          models.Evidence.gps_longitude.between(lon - dlon, lon + dlon))
+
+    rows = [r._asdict() for r in await db.execute(stmt.order_by(models.Evidence.timestamp, models.Evidence.id))]
+    if near is not None:
+        for row in rows:
+            row["distance_m"] = round(distance_m(lat, lon, row["gps_latitude"], row["gps_longitude"]), 1)
+        rows = [row for row in rows if row["distance_m"] <= radius_m]
+    return rows
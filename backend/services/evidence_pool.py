@@ -0,0 +1,180 @@
+"""
+Bounded process pool for the CPU-bound work that follows an upload: preview rendering
+(services/preview_service.py) and metadata extraction (services/metadata_service.py).
+
+Jobs are queued once the evidence commits, so uploads never wait for them. Each job works on a
+blob (content-addressed, so duplicate uploads share the result) and tracks its state in a status
+column on evidence_blobs: NULL (not queued yet) -> PENDING -> READY / FAILED. Jobs beyond
+EVIDENCE_MAX_QUEUE are dropped and stay PENDING; resume() re-queues them at the next startup,
+together with blobs stored before the job (or its library) existed.
+
+Workers are spawned processes that only import services/evidence_workers.py.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+import database
+import models
+from services import evidence_workers
+
+logger = logging.getLogger(__name__)
+
+def _setting(name: str, legacy: str, default: str) -> int:
+    # The pool used to render previews only; its PREVIEW_* settings are still honoured
+    return int(os.getenv(name) or os.getenv(legacy) or default)
+
+EVIDENCE_WORKERS = _setting("EVIDENCE_WORKERS", "PREVIEW_WORKERS", "2")
+EVIDENCE_MAX_QUEUE = _setting("EVIDENCE_MAX_QUEUE", "PREVIEW_MAX_QUEUE", "256")
+EVIDENCE_TASKS_PER_WORKER = _setting("EVIDENCE_TASKS_PER_WORKER", "PREVIEW_TASKS_PER_WORKER", "200") # recycle decoders' memory
+
+Status = models.ProcessingStatus
+
+class EvidencePool:
+    def __init__(self, max_workers: int = EVIDENCE_WORKERS, max_queue: int = EVIDENCE_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = None # created on first job: most requests never need it
+        # Results are written back from one thread, off the pool's result-handling thread
+        self._recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evidence-record")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._stats = defaultdict(lambda: {"completed": 0, "failed": 0, "dropped": 0, "busy_seconds": 0.0})
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: forking a process that runs the event loop and DB/Mongo pools isn't safe
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                             max_tasks_per_child=EVIDENCE_TASKS_PER_WORKER)
+        return self._pool
+
+    def submit(self, job: str, fn, args: tuple, on_done) -> bool:
+        """
+        Runs fn(*args) in a worker, then on_done(db, result) on the recorder thread with a fresh
+        session; result is None when fn raised. Non-blocking; False when the queue is full.
+        """
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._stats[job]["dropped"] += 1
+                return False
+            self._pending += 1
+            executor = self._executor()
+        try:
+            future = executor.submit(evidence_workers.timed, fn, *args)
+        except RuntimeError: # pool shut down or broken; the blob stays PENDING for resume()
+            logger.exception("Could not queue %s job", job)
+            with self._lock:
+                self._pending -= 1
+                self._stats[job]["dropped"] += 1
+            return False
+        future.add_done_callback(lambda f: self._recorder.submit(self._record, job, args, f, on_done))
+        return True
+
+    def _record(self, job: str, args: tuple, future, on_done):
+        try:
+            elapsed, result = future.result()
+        except Exception as e: # unreadable / corrupt file: expected now and then, not a server error
+            logger.warning("%s job failed for %s: %s", job, args[0], e)
+            elapsed, result = None, None
+        try:
+            db = database.SessionLocal()
+            try:
+                on_done(db, result)
+            finally:
+                db.close()
+        except Exception:
+            logger.exception("Could not record %s result for %s", job, args[0])
+        with self._lock:
+            stats = self._stats[job]
+            if elapsed is None:
+                stats["failed"] += 1
+            else:
+                stats["completed"] += 1
+                stats["busy_seconds"] += elapsed
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self):
+        with self._lock:
+            jobs = {}
+            for job, stats in self._stats.items():
+                completed = stats["completed"]
+                jobs[job] = {
+                    "completed": completed,
+                    "failed": stats["failed"],
+                    "dropped": stats["dropped"],
+                    "avg_ms": round(stats["busy_seconds"] / completed * 1000, 2) if completed else None
+                }
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "jobs": jobs,
+                "libraries": evidence_workers.libraries()
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._recorder.shutdown(wait=False)
+
+evidence_pool = EvidencePool()
+
+# Optional library -> what evidence processing loses without it
+LIBRARY_FEATURES = {
+    "image": ("Pillow", "photos get no thumbnails and no EXIF capture time or GPS position"),
+    "pdf": ("PyMuPDF", "PDFs get no first-page previews and no page count or text detection"),
+}
+
+def warn_missing_libraries():
+    """Startup: say which previews / metadata will be skipped (both libraries are in requirements.txt)."""
+    for kind, available in evidence_workers.libraries().items():
+        if not available:
+            package, lost = LIBRARY_FEATURES[kind]
+            logger.warning("%s is not installed: %s (pip install %s).", package, lost, package)
+
+def claim(db: Session, status_column, sha256: str):
+    """First upload of a blob marks the job PENDING (in the caller's transaction, under the blob row lock)."""
+    blobs = models.EvidenceBlob.__table__
+    db.execute(update(blobs).where(blobs.c.sha256 == sha256).values({status_column.key: Status.PENDING.value}))
+
+def resume(db: Session, status_column, submit) -> int:
+    """
+    Startup: re-queues PENDING jobs lost with a previous process, and claims blobs that never had
+    one. submit(sha256, storage_key, kind) -> bool; stops once the pool's queue is full.
+    """
+    if not any(evidence_workers.libraries().values()):
+        return 0
+    blobs = models.EvidenceBlob
+    rows = db.execute(
+        select(blobs.sha256, blobs.storage_key, status_column.label("status"))
+        .where(or_(status_column.is_(None), status_column == Status.PENDING.value))
+        .order_by(blobs.created_at.desc())
+    ).all()
+    queued = 0
+    for row in rows:
+        kind = evidence_workers.file_kind(row.storage_key)
+        if kind is None:
+            continue
+        if row.status is None:
+            table = blobs.__table__
+            claimed = db.execute(update(table).where(table.c.sha256 == row.sha256, table.c[status_column.key].is_(None))
+                                 .values({status_column.key: Status.PENDING.value})).rowcount
+            db.commit()
+            if not claimed:
+                continue
+        if not submit(row.sha256, row.storage_key, kind):
+            break
+        queued += 1
+    return queued
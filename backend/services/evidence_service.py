@@ -0,0 +1,265 @@
+"""
+Evidence file uploads: read in fixed-size chunks, hashed (SHA-256) as the bytes go by, capped in
+size, and stored content-addressed.
+
+Storage: each distinct file is kept once, under the key blobs/<aa>/<sha256><ext> in the
+configured backend (services/evidence_storage.py: local uploads/ or S3), with an evidence_blobs
+row counting the Evidence rows that point at it. The upload is hashed first (reading the spooled
+request body, no write); a hash that is already stored skips the write entirely, and new content
+is staged to a .part file and moved into place. A blob's name is its hash, so any later change
+to the bytes is detectable by rehashing.
+
+Two layers enforce the limits:
+- UploadLimitMiddleware sits in front of the multipart parser. It rejects a declared
+  Content-Length over the cap before reading anything, stops reading once the received body
+  passes the cap (413), and aborts a client that goes quiet mid-body (408), so a slow or huge
+  upload never gets spooled in full.
+- save_upload() re-checks the file's own size while hashing it.
+"""
+import hashlib
+import os
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import anyio
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import models
+from services.evidence_storage import storage
+
+BLOB_DIR = "blobs" # key prefix in the storage backend
+ALLOWED_EXTENSIONS = (".pdf", ".jpg", ".png", ".jpeg")
+
+EVIDENCE_MAX_BYTES = int(os.getenv("EVIDENCE_MAX_BYTES", str(25 * 1024 * 1024)))
+EVIDENCE_CHUNK_BYTES = int(os.getenv("EVIDENCE_CHUNK_BYTES", str(1024 * 1024)))
+# Longest gap between two body chunks before the upload is considered stalled
+EVIDENCE_STALL_TIMEOUT_SECONDS = float(os.getenv("EVIDENCE_STALL_TIMEOUT_SECONDS", "15"))
+# Room for the multipart boundaries and the small form fields next to the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class StoredFile(NamedTuple):
+    storage_key: str # path under uploads/
+    filename: str # as uploaded by the client
+    size_bytes: int
+    sha256: str
+    deduplicated: bool # content was already stored; nothing was written
+
+def check_extension(filename: str):
+    if not (filename or "").lower().endswith(ALLOWED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Only PDF, JPG, and PNG files are allowed.")
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"Evidence file exceeds {EVIDENCE_MAX_BYTES} bytes.")
+
+def blob_key(sha256: str, filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    ext = ".jpg" if ext == ".jpeg" else ext
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256}{ext}"
+
+def find_blob(db: Session, sha256: str) -> Optional[str]:
+    """Storage key of already stored content, or None."""
+    key = db.execute(select(models.EvidenceBlob.storage_key).where(models.EvidenceBlob.sha256 == sha256)).scalar()
+    if key and storage.exists(key):
+        return key
+    return None
+
+async def _hash_upload(upload: UploadFile):
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await upload.read(EVIDENCE_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > EVIDENCE_MAX_BYTES:
+            raise _too_large()
+        digest.update(chunk)
+    return digest.hexdigest(), size
+
+async def _write_upload(upload: UploadFile, key: str):
+    partial = storage.staging_path(key)
+    try:
+        await upload.seek(0)
+        async with await anyio.open_file(partial, "wb") as out:
+            while True:
+                chunk = await upload.read(EVIDENCE_CHUNK_BYTES)
+                if not chunk:
+                    break
+                await out.write(chunk)
+        await run_in_threadpool(storage.put_file, partial, key)
+    except Exception as e:
+        discard_path(partial)
+        raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
+
+async def save_upload(upload: UploadFile, db: Session) -> StoredFile:
+    """Hashes the upload, then stores it unless the same content is already stored."""
+    sha256, size = await _hash_upload(upload)
+    key = await run_in_threadpool(find_blob, db, sha256)
+    deduplicated = key is not None
+    if not deduplicated:
+        key = blob_key(sha256, upload.filename)
+        # Same name = same bytes, so a file already there (e.g. from a request that failed
+        # after storing it) is reused as is
+        deduplicated = await run_in_threadpool(storage.exists, key)
+        if not deduplicated:
+            await _write_upload(upload, key)
+    return StoredFile(key, os.path.basename(upload.filename), size, sha256, deduplicated)
+
+async def receive_signed_upload(key: str, size: int, sha256: str, body):
+    """
+    Local backend's stand-in for a pre-signed PUT: streams the body (async iterable of bytes) into
+    place, accepting it only if it is exactly `size` bytes hashing to `sha256`.
+    """
+    partial = storage.staging_path(key)
+    digest = hashlib.sha256()
+    received = 0
+    try:
+        async with await anyio.open_file(partial, "wb") as out:
+            async for chunk in body:
+                received += len(chunk)
+                if received > size:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds the signed size of {size} bytes.")
+                digest.update(chunk)
+                await out.write(chunk)
+        if received != size or digest.hexdigest() != sha256:
+            raise HTTPException(status_code=400, detail="Upload does not match the signed size and SHA-256.")
+        await run_in_threadpool(storage.put_file, partial, key)
+    finally:
+        discard_path(partial)
+
+def hash_file(path: str):
+    """(sha256, size) of a file on disk, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(EVIDENCE_CHUNK_BYTES), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+def adopt_file(db: Session, path: str, sha256: str, size: int, filename: str) -> StoredFile:
+    """
+    Stores a file already on disk (e.g. an assembled resumable upload) by content: moved into
+    the backend when new (a rename for local storage on the same filesystem), dropped when the
+    content is already stored.
+    """
+    key = find_blob(db, sha256)
+    if key is None:
+        key = blob_key(sha256, filename)
+    deduplicated = storage.exists(key)
+    if deduplicated:
+        discard_path(path)
+    else:
+        storage.put_file(path, key)
+    return StoredFile(key, os.path.basename(filename), size, sha256, deduplicated)
+
+def discard_path(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+# -- Reference counting --
+def add_reference(db: Session, stored: StoredFile):
+    """
+    Counts a new Evidence row against its blob, in the caller's transaction. Returns the blob's
+    post-upload job state (preview_status, metadata_status, file_metadata), read under the row
+    lock the upsert takes (see preview_service.attach).
+    """
+    conn = db.connection()
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    table = models.EvidenceBlob.__table__
+    stmt = insert(table).values(sha256=stored.sha256, storage_key=stored.storage_key, size_bytes=stored.size_bytes,
+                                ref_count=1, created_at=datetime.utcnow())
+    return conn.execute(stmt.on_conflict_do_update(index_elements=["sha256"], set_={"ref_count": table.c.ref_count + 1})
+                        .returning(table.c.preview_status, table.c.metadata_status, table.c.file_metadata)).one()
+
+# Deleted Evidence rows release their reference in the same flush. Blobs left at zero stay on
+# disk: evidence is additive-only, and removing a file would race with an upload that just
+# matched it.
+@event.listens_for(Session, "after_flush")
+def _release_references(session, flush_context):
+    released = {}
+    for obj in session.deleted:
+        if isinstance(obj, models.Evidence) and obj.sha256:
+            released[obj.sha256] = released.get(obj.sha256, 0) + 1
+    if not released:
+        return
+    table = models.EvidenceBlob.__table__
+    conn = session.connection()
+    for sha256, count in released.items():
+        conn.execute(update(table).where(table.c.sha256 == sha256).values(ref_count=table.c.ref_count - count))
+
+def blob_stats(db: Session):
+    blobs = models.EvidenceBlob
+    count, references, stored = db.execute(
+        select(func.count(), func.coalesce(func.sum(blobs.ref_count), 0), func.coalesce(func.sum(blobs.size_bytes), 0))
+    ).one()
+    referenced = db.execute(
+        select(func.coalesce(func.sum(models.Evidence.size_bytes), 0)).where(models.Evidence.sha256.is_not(None))
+    ).scalar()
+    return {
+        "blobs": count,
+        "references": references,
+        "unreferenced_blobs": db.execute(select(func.count()).select_from(blobs).where(blobs.ref_count == 0)).scalar(),
+        "stored_bytes": stored,
+        "referenced_bytes": referenced, # what per-upload copies would have used
+        "saved_bytes": max(referenced - stored, 0)
+    }
+
+# Bodies the upload limits apply to: form uploads and raw resumable-upload chunks
+LIMITED_CONTENT_TYPES = (b"multipart/form-data", b"application/octet-stream")
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware for upload request bodies: size cap and stall timeout.
+    Errors are raised as HTTPException from receive(), which FastAPI's form parsing re-raises
+    as-is, so the client gets a normal 413/408 JSON response.
+    """
+
+    def __init__(self, app, max_body_bytes: int = None, stall_timeout: float = None):
+        self.app = app
+        self.max_body_bytes = max_body_bytes or EVIDENCE_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+        self.stall_timeout = stall_timeout or EVIDENCE_STALL_TIMEOUT_SECONDS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(LIMITED_CONTENT_TYPES):
+            return await self.app(scope, receive, send)
+
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_body_bytes:
+            response = JSONResponse(status_code=413, content={"detail": f"Evidence file exceeds {EVIDENCE_MAX_BYTES} bytes."},
+                                    headers={"Connection": "close"})
+            return await response(scope, receive, send)
+
+        received = 0
+        body_done = False
+
+        async def limited_receive():
+            nonlocal received, body_done
+            if body_done:
+                # After the body: streaming responses wait here for a client disconnect
+                return await receive()
+            try:
+                with anyio.fail_after(self.stall_timeout):
+                    message = await receive()
+            except TimeoutError:
+                raise HTTPException(status_code=408, detail="Upload stalled; no data received in time.")
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    raise _too_large()
+                body_done = not message.get("more_body", False)
+            else:
+                body_done = True # http.disconnect
+            return message
+
+        await self.app(scope, limited_receive, send)
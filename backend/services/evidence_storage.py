@@ -0,0 +1,198 @@
+"""
+Where evidence blobs live. Keys are content-addressed (evidence_service.blob_key), so every
+backend only needs put / exists / verify / move / local_copy / signed URLs.
+
+- local (default): files under uploads/, served by the API's /uploads mount. "Pre-signed"
+  uploads go to PUT /storage/{key} with an HMAC-signed query string that pins size and SHA-256.
+- s3: any S3-compatible store (AWS, MinIO locally via S3_ENDPOINT_URL). Clients PUT/GET the
+  bucket directly through pre-signed URLs; uploads are signed with x-amz-checksum-sha256, so
+  the store itself rejects bytes that don't match the declared hash. Requires boto3.
+
+PUBLIC_BASE_URL is the externally reachable address of the API, used in every URL we hand out.
+"""
+import base64
+import contextlib
+import hashlib
+import hmac
+import mimetypes
+import os
+import tempfile
+import time
+import uuid
+from typing import Optional
+from urllib.parse import urlencode
+
+import auth
+
+try:
+    import boto3
+except ImportError: # optional: only needed for EVIDENCE_STORAGE=s3
+    boto3 = None
+
+EVIDENCE_STORAGE = os.getenv("EVIDENCE_STORAGE", "local") # local | s3
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000").rstrip("/")
+STORAGE_PRESIGN_TTL_SECONDS = int(os.getenv("STORAGE_PRESIGN_TTL_SECONDS", "900"))
+STORAGE_SIGNING_KEY = os.getenv("STORAGE_SIGNING_KEY", auth.SECRET_KEY)
+LOCAL_STORAGE_DIR = "uploads"
+S3_BUCKET = os.getenv("S3_BUCKET", "escrow-evidence")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+
+def content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+def _b64_sha256(sha256_hex: str) -> str:
+    return base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def staging_path(self, key: str) -> str:
+        """Scratch file that put_file() can rename into place (same filesystem)."""
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        return f"{self.path(key)}.{uuid.uuid4().hex}.part"
+
+    def put_file(self, local_path: str, key: str):
+        """Moves a finished local file to key (consumes local_path)."""
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        os.replace(local_path, self.path(key)) # atomic: readers never see a half-written blob
+
+    def move(self, key: str, new_key: str):
+        os.makedirs(os.path.dirname(self.path(new_key)), exist_ok=True)
+        os.replace(self.path(key), self.path(new_key))
+
+    def verify(self, key: str, sha256: str, size: int) -> bool:
+        from services.evidence_service import hash_file
+        return self.exists(key) and hash_file(self.path(key)) == (sha256, size)
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextlib.contextmanager
+    def local_copy(self, key: str):
+        """Readable local path for key (the stored file itself)."""
+        yield self.path(key)
+
+    def download_url(self, key: str, filename: str = None) -> str:
+        return f"{PUBLIC_BASE_URL}/uploads/{key}"
+
+    # -- Signed direct uploads (PUT /storage/{key}) --
+    def _signature(self, key: str, size: int, sha256: str, expires: int) -> str:
+        message = f"{key}|{size}|{sha256}|{expires}".encode()
+        return hmac.new(STORAGE_SIGNING_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    def presign_upload(self, key: str, size: int, sha256: str):
+        expires = int(time.time()) + STORAGE_PRESIGN_TTL_SECONDS
+        query = urlencode({"size": size, "sha256": sha256, "expires": expires,
+                           "signature": self._signature(key, size, sha256, expires)})
+        return {"method": "PUT", "url": f"{PUBLIC_BASE_URL}/storage/{key}?{query}",
+                "headers": {"Content-Type": content_type(key)}}
+
+    def check_signature(self, key: str, size: int, sha256: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, size, sha256, expires), signature)
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self, bucket: str = S3_BUCKET, endpoint_url: Optional[str] = S3_ENDPOINT_URL, region: str = S3_REGION):
+        if boto3 is None:
+            raise RuntimeError("EVIDENCE_STORAGE=s3 requires boto3 (pip install boto3).")
+        self.bucket = bucket
+        # Credentials come from the standard AWS environment / config chain
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def _head(self, key: str, checksums: bool = False):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key, **({"ChecksumMode": "ENABLED"} if checksums else {}))
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def staging_path(self, key: str) -> str:
+        fd, path = tempfile.mkstemp(suffix=".part")
+        os.close(fd)
+        return path
+
+    def put_file(self, local_path: str, key: str):
+        try:
+            self.client.upload_file(local_path, self.bucket, key, ExtraArgs={
+                "ContentType": content_type(key), "ChecksumAlgorithm": "SHA256"
+            })
+        finally:
+            os.unlink(local_path)
+
+    def move(self, key: str, new_key: str):
+        # Server-side copy (recomputing the SHA-256 checksum that verify() reads), then delete
+        self.client.copy_object(Bucket=self.bucket, Key=new_key, CopySource={"Bucket": self.bucket, "Key": key},
+                                ContentType=content_type(new_key), MetadataDirective="REPLACE", ChecksumAlgorithm="SHA256")
+        self.delete(key)
+
+    def verify(self, key: str, sha256: str, size: int) -> bool:
+        head = self._head(key, checksums=True)
+        if head is None or head.get("ContentLength") != size:
+            return False
+        # Present when the object was uploaded with a SHA-256 checksum (all our upload paths)
+        return head.get("ChecksumSHA256") == _b64_sha256(sha256)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    @contextlib.contextmanager
+    def local_copy(self, key: str):
+        """Downloads key to a temporary file for the duration of the block."""
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, key, path)
+            yield path
+        finally:
+            os.unlink(path)
+
+    def download_url(self, key: str, filename: str = None) -> str:
+        params = {"Bucket": self.bucket, "Key": key, "ResponseContentType": content_type(key)}
+        if filename:
+            params["ResponseContentDisposition"] = f'inline; filename="{filename}"'
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=STORAGE_PRESIGN_TTL_SECONDS)
+
+    def presign_upload(self, key: str, size: int, sha256: str):
+        checksum = _b64_sha256(sha256)
+        url = self.client.generate_presigned_url("put_object", Params={
+            "Bucket": self.bucket, "Key": key, "ContentType": content_type(key),
+            "ContentLength": size, "ChecksumSHA256": checksum
+        }, ExpiresIn=STORAGE_PRESIGN_TTL_SECONDS)
+        return {"method": "PUT", "url": url,
+                "headers": {"Content-Type": content_type(key), "x-amz-checksum-sha256": checksum}}
+
+def _make_storage():
+    if EVIDENCE_STORAGE == "s3":
+        return S3Storage()
+    if EVIDENCE_STORAGE != "local":
+        raise RuntimeError(f"Unknown EVIDENCE_STORAGE {EVIDENCE_STORAGE!r} (expected local or s3).")
+    return LocalStorage()
+
+storage = _make_storage()
+
+def evidence_url(evidence_id: str) -> str:
+    """Stable, backend-independent URL recorded on Evidence: redirects to a (signed) download URL."""
+    return f"{PUBLIC_BASE_URL}/evidence/{evidence_id}/download"
+
+def preview_url(evidence_id: str) -> str:
+    return f"{PUBLIC_BASE_URL}/evidence/{evidence_id}/preview"
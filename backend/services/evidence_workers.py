@@ -0,0 +1,145 @@
+"""
+Code that runs inside the evidence processing pool (services/evidence_pool.py): preview
+rendering and metadata extraction.
+
+Workers are spawned processes that import only this module, so keep its imports light: no
+database or Mongo clients, just the storage backend and the optional file libraries.
+Pillow handles photos and PyMuPDF handles PDFs; without them, files of that kind are skipped.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from services.evidence_storage import storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError: # optional: photo thumbnails and EXIF
+    Image = None
+
+try:
+    import pymupdf
+except ImportError: # optional: PDF first-page previews and page/text info
+    pymupdf = None
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+PDF_TEXT_SCAN_PAGES = 10 # text presence is decided on the first pages only
+
+# EXIF tags (numeric, as stored in the file)
+EXIF_IFD, GPS_IFD = 0x8769, 0x8825
+MAKE, MODEL = 0x010F, 0x0110
+DATETIME_ORIGINAL, OFFSET_TIME_ORIGINAL = 0x9003, 0x9011
+GPS_LATITUDE_REF, GPS_LATITUDE, GPS_LONGITUDE_REF, GPS_LONGITUDE = 1, 2, 3, 4
+GPS_TIMESTAMP, GPS_DATESTAMP = 7, 29
+
+def file_kind(filename: str):
+    """'image', 'pdf', or None when there is no library to open the file."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in IMAGE_EXTENSIONS and Image is not None:
+        return "image"
+    if ext == ".pdf" and pymupdf is not None:
+        return "pdf"
+    return None
+
+def libraries():
+    return {"image": Image is not None, "pdf": pymupdf is not None}
+
+def timed(fn, *args):
+    """(seconds spent, result): the pool reports time spent working, not waiting in the queue."""
+    started_at = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started_at, result
+
+# -- Previews --
+def _render_image(src: str, dest: str, max_edge: int):
+    with Image.open(src) as img:
+        img.draft("RGB", (max_edge, max_edge)) # JPEG: decode at reduced scale instead of full size
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_edge, max_edge))
+        img.convert("RGB").save(dest, "JPEG", quality=80, optimize=True)
+
+def _render_pdf(src: str, dest: str, max_edge: int):
+    with pymupdf.open(src) as doc:
+        page = doc.load_page(0)
+        zoom = max_edge / max(page.rect.width, page.rect.height)
+        page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False).save(dest, output="png")
+
+def render_preview(storage_key: str, target_key: str, kind: str, max_edge: int) -> str:
+    """Renders a thumbnail / first-page preview into the storage backend under target_key."""
+    staging = storage.staging_path(target_key)
+    try:
+        with storage.local_copy(storage_key) as src:
+            (_render_image if kind == "image" else _render_pdf)(src, staging, max_edge)
+        storage.put_file(staging, target_key)
+    finally:
+        if os.path.exists(staging):
+            os.unlink(staging)
+    return target_key
+
+# -- Metadata --
+def _degrees(value, ref) -> float:
+    degrees, minutes, seconds = (float(v) for v in value)
+    result = degrees + minutes / 60 + seconds / 3600
+    return -result if ref in ("S", "W") else result
+
+def _gps_position(gps):
+    try:
+        lat = _degrees(gps[GPS_LATITUDE], gps.get(GPS_LATITUDE_REF))
+        lon = _degrees(gps[GPS_LONGITUDE], gps.get(GPS_LONGITUDE_REF))
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat, lon) == (0.0, 0.0):
+        return None, None # missing fix written as zeros by some cameras
+    return round(lat, 7), round(lon, 7)
+
+def _capture_time(exif_ifd, gps):
+    """
+    (capture time, is UTC): DateTimeOriginal with its offset, else the GPS clock, else the
+    camera-local time with no known zone.
+    """
+    try:
+        local = datetime.strptime(str(exif_ifd[DATETIME_ORIGINAL]).strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except (KeyError, ValueError):
+        local = None
+    offset = str(exif_ifd.get(OFFSET_TIME_ORIGINAL, "")).strip("\x00 ")
+    if local and offset:
+        try:
+            return (local - datetime.strptime(offset.replace(":", ""), "%z").utcoffset()).isoformat(), True
+        except ValueError:
+            pass
+    try:
+        hours, minutes, seconds = (float(v) for v in gps[GPS_TIMESTAMP])
+        day = datetime.strptime(str(gps[GPS_DATESTAMP]).strip("\x00 "), "%Y:%m:%d")
+        return (day + timedelta(hours=hours, minutes=minutes, seconds=int(seconds))).isoformat(), True
+    except (KeyError, TypeError, ValueError):
+        pass
+    return (local.isoformat(), False) if local else (None, None)
+
+def _image_metadata(src: str):
+    with Image.open(src) as img:
+        exif = img.getexif()
+        exif_ifd, gps = exif.get_ifd(EXIF_IFD), exif.get_ifd(GPS_IFD)
+        lat, lon = _gps_position(gps)
+        captured_at, captured_at_utc = _capture_time(exif_ifd, gps)
+        return {
+            "kind": "image",
+            "width": img.width,
+            "height": img.height,
+            "camera": " ".join(str(exif[t]).strip("\x00 ") for t in (MAKE, MODEL) if exif.get(t)) or None,
+            "captured_at": captured_at,
+            "captured_at_utc": captured_at_utc,
+            "gps_latitude": lat,
+            "gps_longitude": lon
+        }
+
+def _pdf_metadata(src: str):
+    with pymupdf.open(src) as doc:
+        has_text = None
+        if not doc.needs_pass:
+            has_text = any(doc.load_page(i).get_text("text").strip() for i in range(min(doc.page_count, PDF_TEXT_SCAN_PAGES)))
+        return {"kind": "pdf", "page_count": doc.page_count, "has_text": has_text}
+
+def extract_metadata(storage_key: str, kind: str) -> dict:
+    """Structured facts about the file (see metadata_service.EVIDENCE_FIELDS); JSON-serializable."""
+    with storage.local_copy(storage_key) as src:
+        return (_image_metadata if kind == "image" else _pdf_metadata)(src)
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import auth
+
+# bcrypt releases the GIL while hashing, so a thread pool gets real parallelism
+# without the pickling/startup cost of a process pool.
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(os.cpu_count() or 2)))
+AUTH_HASH_MAX_QUEUE = int(os.getenv("AUTH_HASH_MAX_QUEUE", "64"))
+
+class HashingPoolSaturated(Exception):
+    """Raised when the password hashing queue is full (caller should answer 503)."""
+    pass
+
+class HashingPool:
+    """
+    Bounded executor for CPU-heavy auth work (bcrypt verify/hash).
+    Keeps the event loop free and caps how much a login storm can queue up.
+    """
+
+    def __init__(self, max_workers: int = AUTH_HASH_WORKERS, max_queue: int = AUTH_HASH_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auth-hash")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._busy_total = 0.0
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise HashingPoolSaturated()
+            self._queued += 1
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            waited = started_at - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._busy_total += time.perf_counter() - started_at
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+
+    async def verify_password(self, plain_password, hashed_password) -> bool:
+        return await self.run(auth.verify_password, plain_password, hashed_password)
+
+    async def hash_password(self, password) -> str:
+        return await self.run(auth.get_password_hash, password)
+
+    def stats(self):
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / completed * 1000, 2) if completed else None,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "avg_hash_ms": round(self._busy_total / completed * 1000, 2) if completed else None
+            }
+
+hashing_pool = HashingPool()
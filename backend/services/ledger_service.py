@@ -4,20 +4,14 @@ import hashlib
 from typing import Any
 from pymongo import MongoClient
 import models
-from database import audit_collection
+from database import audit_collection, async_audit_collection
 
 def calculate_hash(data: Any) -> str:
     """Returns SHA-256 hash of JSON-encoded data."""
     json_str = json.dumps(data, sort_keys=True, default=str)
     return hashlib.sha256(json_str.encode()).hexdigest()
 
-def create_attestation(db, entity_id, event_type, actor_username, actor_role, data, agreement_hash=None, agreement_version=None):
-    """Creates a cryptographically chained attestation (audit log) in MongoDB."""
-    # 1. Get previous log hash from Mongo
-    last_entry = audit_collection.find_one(sort=[("timestamp", -1)])
-    prev_hash = last_entry["current_hash"] if last_entry and "current_hash" in last_entry else "0" * 64
-    
-    # 2. Calculate Current Hash
+def _entry(seq, prev_hash, entity_id, event_type, actor_username, actor_role, data, agreement_hash, agreement_version, timestamp):
     # We include all strict fields in the hash payload
     current_payload = {
         "prev": prev_hash,
@@ -30,9 +24,7 @@ def create_attestation(db, entity_id, event_type, actor_username, actor_role, da
         "version": agreement_version
     }
     current_hash = calculate_hash(current_payload)
-    
-    # 3. Save to Mongo (Ledger First)
-    log_entry = {
+    return {
         "entity_id": entity_id,
         "event_type": event_type.value if hasattr(event_type, "value") else str(event_type),
         "actor_id": actor_username, # Keeping generic field name for API compatibility
@@ -42,7 +34,74 @@ def create_attestation(db, entity_id, event_type, actor_username, actor_role, da
         "event_data": data,
         "agreement_hash": agreement_hash,
         "agreement_version": agreement_version,
-        "timestamp": datetime.utcnow()
+        "timestamp": timestamp,
+        "seq": seq
     }
+
+# Chain order. Timestamps only keep milliseconds in BSON, so a batch shares one; seq is explicit
+# and _id breaks ties between entries written before seq existed (those sort after seq'd ones).
+LEDGER_ORDER = [("seq", -1), ("timestamp", -1), ("_id", -1)]
+
+def _head():
+    """(seq, current_hash) of the newest ledger entry, or (0, genesis hash) for an empty ledger."""
+    last_entry = audit_collection.find_one(sort=LEDGER_ORDER)
+    if not last_entry or "current_hash" not in last_entry:
+        return 0, "0" * 64
+    return last_entry.get("seq") or 0, last_entry["current_hash"]
+
+def ensure_indexes():
+    audit_collection.create_index(LEDGER_ORDER, name="ledger_order")
+
+def create_attestation(db, entity_id, event_type, actor_username, actor_role, data, agreement_hash=None, agreement_version=None):
+    """Creates a cryptographically chained attestation (audit log) in MongoDB."""
+    # 1. Get previous log hash from Mongo
+    seq, prev_hash = _head()
+    
+    # 2. Calculate Current Hash
+    log_entry = _entry(seq + 1, prev_hash, entity_id, event_type, actor_username, actor_role, data,
+                       agreement_hash, agreement_version, datetime.utcnow())
+    
+    # 3. Save to Mongo (Ledger First)
     audit_collection.insert_one(log_entry)
     return log_entry
+
+def create_attestations(events):
+    """
+    Batched append: chains a list of attestations (dicts of create_attestation's keyword arguments,
+    minus db) onto the ledger head and writes them with one insert_many.
+    Entries share one timestamp; their seq numbers carry the chain order.
+    """
+    if not events:
+        return []
+    seq, prev_hash = _head()
+    now = datetime.utcnow()
+    entries = []
+    for i, e in enumerate(events, start=1):
+        entry = _entry(seq + i, prev_hash, e["entity_id"], e["event_type"], e["actor_username"], e["actor_role"], e["data"],
+                       e.get("agreement_hash"), e.get("agreement_version"), now)
+        entries.append(entry)
+        prev_hash = entry["current_hash"]
+    audit_collection.insert_many(entries, ordered=True)
+    return entries
+
+def _attestation_out(l):
+    return {
+        "entity_id": l["entity_id"],
+        "event_type": l["event_type"],
+        "actor_id": l["actor_id"],
+        "event_data": l["event_data"],
+        "timestamp": l["timestamp"],
+        "previous_hash": l["previous_hash"],
+        "current_hash": l["current_hash"]
+    }
+
+# Fields schemas.AuditLogRead exposes; the rest (agreement hash/version, role) stays on the server
+ATTESTATION_PROJECTION = {
+    "_id": 0, "entity_id": 1, "event_type": 1, "actor_id": 1, "event_data": 1,
+    "timestamp": 1, "previous_hash": 1, "current_hash": 1
+}
+
+async def list_attestations(skip: int = 0, limit: int = 100):
+    """Latest ledger entries first (async client; does not hold a worker thread)."""
+    cursor = async_audit_collection.find({}, ATTESTATION_PROJECTION).sort(LEDGER_ORDER).skip(skip).limit(limit)
+    return [_attestation_out(l) async for l in cursor]
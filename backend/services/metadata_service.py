@@ -0,0 +1,64 @@
+"""
+Structured facts about uploaded evidence, so inspectors can filter and check it without opening
+files: EXIF capture time and GPS position for photos ("Geotagged Photo"), page count and whether
+there is a text layer for PDFs (a typed city inspection card vs a phone scan).
+
+Extraction runs in the evidence processing pool (services/evidence_pool.py) after the evidence
+commits. The result is kept per blob (evidence_blobs.file_metadata, so duplicate uploads reuse it)
+and copied onto the queryable Evidence columns of every row for that blob. Capture times are UTC
+when the camera recorded an offset or a GPS clock, camera-local time otherwise.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import database
+import models
+from services import evidence_pool, evidence_workers
+
+# Evidence columns filled from the extracted metadata
+EVIDENCE_FIELDS = ("captured_at", "captured_at_utc", "gps_latitude", "gps_longitude", "page_count", "has_text")
+
+Status = models.ProcessingStatus
+
+def submit(sha256: str, storage_key: str, kind: str) -> bool:
+    return evidence_pool.evidence_pool.submit(
+        "metadata", evidence_workers.extract_metadata, (storage_key, kind),
+        lambda db, metadata: finish(db, sha256, metadata)
+    )
+
+def apply(evidence: models.Evidence, metadata: Optional[dict]):
+    for field in EVIDENCE_FIELDS:
+        value = (metadata or {}).get(field)
+        if field == "captured_at" and value:
+            value = datetime.fromisoformat(value)
+        setattr(evidence, field, value)
+
+def attach(db: Session, evidence: models.Evidence, storage_key: str, filename: str, blob):
+    """Same contract as preview_service.attach: copy finished metadata, or claim and queue the extraction."""
+    if blob.metadata_status == Status.READY.value:
+        apply(evidence, blob.file_metadata)
+        return
+    kind = evidence_workers.file_kind(filename)
+    if blob.metadata_status is not None or kind is None:
+        return
+    evidence_pool.claim(db, models.EvidenceBlob.metadata_status, evidence.sha256)
+    database.after_commit(db, submit, evidence.sha256, storage_key, kind)
+
+def finish(db: Session, sha256: str, metadata: Optional[dict]):
+    """Stores the blob's metadata (FAILED when None) and fills in its evidence rows."""
+    blob = db.get(models.EvidenceBlob, sha256, with_for_update=True)
+    if blob is None:
+        return
+    blob.metadata_status = Status.READY.value if metadata is not None else Status.FAILED.value
+    blob.file_metadata = metadata
+    if metadata is not None:
+        # ORM updates, as in preview_service.finish: the escrows' ETags and cached graphs follow
+        for row in db.execute(select(models.Evidence).where(models.Evidence.sha256 == sha256)).scalars():
+            apply(row, metadata)
+    db.commit()
+
+def resume(db: Session) -> int:
+    return evidence_pool.resume(db, models.EvidenceBlob.metadata_status, submit)
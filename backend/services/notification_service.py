@@ -1,5 +1,5 @@
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 import models
 import schemas
 import enum
@@ -8,11 +8,19 @@ from database import audit_collection, get_db
 # Assuming we use the same mongo client as database.py
 # But database.py exports 'audit_collection' directly. 
 # We should probably export the client or create a new collection similarly.
-from database import mongo_client as client
+from database import mongo_client as client, async_mongo_client as async_client
 
 notification_collection = client["escrow_db"]["notifications"]
+# One tiny doc per user: {_id: username, seq, updated_at}. Bumped on every change to
+# that user's notifications so polls can be answered from the watermark alone.
+notification_watermark_collection = client["escrow_db"]["notification_watermarks"]
 
-from services.ledger_service import create_attestation
+# Same collections on the asyncio client, for the polling endpoints
+async_notification_collection = async_client["escrow_db"]["notifications"]
+async_notification_watermark_collection = async_client["escrow_db"]["notification_watermarks"]
+
+from services.ledger_service import create_attestations
+from services.webhook_service import webhook_service
 
 class NotificationSeverity(str, enum.Enum):
     INFO = "INFO"
@@ -22,59 +30,74 @@ class NotificationSeverity(str, enum.Enum):
 class NotificationService:
     def __init__(self):
         self.notification_collection = notification_collection
+        self.watermark_collection = notification_watermark_collection
+        self.async_notification_collection = async_notification_collection
+        self.async_watermark_collection = async_notification_watermark_collection
 
     def emit_notification(self, event_type: models.AuditEvent, escrow_id: str, actor_role: models.UserRole, data: dict = None, milestone_id: str = None):
         """
         Core logic to determine recipients and persist notification.
         """
-        recipients = self._resolve_recipients(event_type, actor_role, data)
-        
-        if not recipients:
-            return
+        self.emit_notifications([dict(event_type=event_type, escrow_id=escrow_id, actor_role=actor_role, data=data, milestone_id=milestone_id)])
 
-        severity = self._determine_severity(event_type)
-        message = self._generate_message(event_type, data)
-        
+    def emit_notifications(self, events):
+        """
+        Batched emit_notification (list of its keyword arguments): one insert_many for all
+        notifications, one watermark bump per recipient, one webhook dispatch and one chained
+        ledger append for the NOTIFICATION_ISSUED attestations.
+        """
         timestamp = datetime.utcnow()
-        
-        # 1. Create Notifications for each recipient
-        notifications = []
-        for username, role in recipients.items():
-            notification = {
-                "user_id": username,
-                "role": role,
-                "escrow_id": escrow_id,
-                "milestone_id": milestone_id,
+        notifications, recipient_ids, attestations = [], set(), []
+        for e in events:
+            event_type, data = e["event_type"], e.get("data")
+            recipients = self._resolve_recipients(event_type, e["actor_role"], data)
+            
+            if not recipients:
+                continue
+
+            severity = self._determine_severity(event_type)
+            message = self._generate_message(event_type, data)
+            
+            # 1. Create Notifications for each recipient
+            for username, role in recipients.items():
+                notification = {
+                    "user_id": username,
+                    "role": role,
+                    "escrow_id": e["escrow_id"],
+                    "milestone_id": e.get("milestone_id"),
+                    "event_type": event_type,
+                    "message": message,
+                    "severity": severity,
+                    "is_read": False,
+                    "created_at": timestamp
+                }
+                notifications.append(notification)
+            recipient_ids.update(recipients)
+                
+            # 2. Audit Log (Ledger) - STRICT CHAINING via Service
+            # We pass minimal context as Notifications are often side effects.
+            # Entity ID is Escrow ID.
+            safe_data = {
                 "event_type": event_type,
-                "message": message,
-                "severity": severity,
-                "is_read": False,
-                "created_at": timestamp
+                "recipients": list(recipients.keys()),
+                "severity": severity
             }
-            notifications.append(notification)
-            
+            if data:
+                safe_data.update(data)
+            attestations.append(dict(
+                entity_id=e["escrow_id"],
+                event_type=models.AuditEvent.NOTIFICATION_ISSUED,
+                actor_username="SYSTEM",
+                actor_role=models.UserRole.SYSTEM if hasattr(models.UserRole, 'SYSTEM') else "SYSTEM",
+                data=safe_data
+            ))
+
         if notifications:
             self.notification_collection.insert_many(notifications)
-            
-        # 2. Audit Log (Ledger) - STRICT CHAINING via Service
-        # We pass minimal context as Notifications are often side effects.
-        # Entity ID is Escrow ID.
-        safe_data = {
-            "event_type": event_type,
-            "recipients": list(recipients.keys()),
-            "severity": severity
-        }
-        if data:
-            safe_data.update(data)
-            
-        create_attestation(
-            db=None, # Not needed for Mongo-only insert
-            entity_id=escrow_id,
-            event_type=models.AuditEvent.NOTIFICATION_ISSUED,
-            actor_username="SYSTEM",
-            actor_role=models.UserRole.SYSTEM if hasattr(models.UserRole, 'SYSTEM') else "SYSTEM",
-            data=safe_data
-        )
+            self._bump_watermarks(sorted(recipient_ids), timestamp)
+            # Push to integrator endpoints (async, never blocks the request)
+            webhook_service.dispatch(notifications)
+        create_attestations(attestations)
 
     def get_notifications(self, user_id: str, role: str):
         """Fetch notifications for a user, sorted by date desc."""
@@ -82,12 +105,37 @@ class NotificationService:
             {"user_id": user_id}
         ).sort("created_at", -1))
 
+    async def get_notifications_async(self, user_id: str, role: str):
+        cursor = self.async_notification_collection.find({"user_id": user_id}).sort("created_at", -1)
+        return [n async for n in cursor]
+
     def mark_read(self, notification_id: str, user_id: str):
         from bson import ObjectId
-        self.notification_collection.update_one(
+        result = self.notification_collection.update_one(
             {"_id": ObjectId(notification_id), "user_id": user_id},
             {"$set": {"is_read": True}}
         )
+        if result.modified_count:
+            self._bump_watermarks([user_id], datetime.utcnow())
+
+    def get_watermark(self, user_id: str):
+        """Returns (seq, updated_at) for the user's notification feed. Single _id lookup."""
+        doc = self.watermark_collection.find_one({"_id": user_id})
+        if not doc:
+            return 0, None
+        return doc["seq"], doc["updated_at"]
+
+    async def get_watermark_async(self, user_id: str):
+        doc = await self.async_watermark_collection.find_one({"_id": user_id})
+        if not doc:
+            return 0, None
+        return doc["seq"], doc["updated_at"]
+
+    def _bump_watermarks(self, user_ids, timestamp):
+        self.watermark_collection.bulk_write([
+            UpdateOne({"_id": uid}, {"$inc": {"seq": 1}, "$set": {"updated_at": timestamp}}, upsert=True)
+            for uid in user_ids
+        ], ordered=False)
 
     def _resolve_recipients(self, event: models.AuditEvent, actor: str, data: dict):
         """
@@ -1,10 +1,22 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from datetime import datetime
 import models
 import schemas
 from services.ledger_service import create_attestation
 from services.notification_service import notification_service
+from database import after_commit
+
+# schemas.PaymentInstruction fields, in schema order (fast serialization path)
+PAYMENT_INSTRUCTION_COLUMNS = (
+    models.PaymentInstruction.payee_name, models.PaymentInstruction.payee_role, models.PaymentInstruction.amount,
+    models.PaymentInstruction.currency, models.PaymentInstruction.method, models.PaymentInstruction.memo,
+    models.PaymentInstruction.id, models.PaymentInstruction.escrow_id, models.PaymentInstruction.milestone_id,
+    models.PaymentInstruction.status, models.PaymentInstruction.created_at, models.PaymentInstruction.sent_at,
+    models.PaymentInstruction.settled_at
+)
 
 class PaymentService:
     def create_instruction(self, db: Session, milestone_id: str):
@@ -45,6 +57,7 @@ class PaymentService:
             created_by="SYSTEM"
         )
         db.add(instruction)
+        db.flush() # assign ID; the caller owns the commit
         
         # Log to Ledger (PAYMENT_INSTRUCTED)
         create_attestation(
@@ -63,11 +76,8 @@ class PaymentService:
             agreement_version=escrow.version
         )
         
-        db.commit()
-        db.refresh(instruction)
-        
-        # Notify
-        notification_service.emit_notification(
+        # Notify (once the caller's transaction commits)
+        after_commit(db, notification_service.emit_notification,
             event_type=models.AuditEvent.PAYMENT_INSTRUCTED,
             escrow_id=escrow.id,
             milestone_id=milestone.id,
@@ -127,11 +137,8 @@ class PaymentService:
             agreement_version=instruction.escrow.version
         )
         
-        db.commit()
-        db.refresh(instruction)
-        
-        # Notify
-        notification_service.emit_notification(
+        # Notify (after commit)
+        after_commit(db, notification_service.emit_notification,
             event_type=event_type,
             escrow_id=instruction.escrow_id,
             milestone_id=instruction.milestone_id,
@@ -143,9 +150,22 @@ class PaymentService:
             }
         )
         
+        db.commit()
+        db.refresh(instruction)
         return instruction
 
     def get_by_escrow(self, db: Session, escrow_id: str):
         return db.query(models.PaymentInstruction).filter(models.PaymentInstruction.escrow_id == escrow_id).order_by(models.PaymentInstruction.created_at.desc()).all()
 
+    async def get_by_escrow_async(self, db: AsyncSession, escrow_id: str):
+        stmt = select(models.PaymentInstruction).where(models.PaymentInstruction.escrow_id == escrow_id).order_by(
+            models.PaymentInstruction.created_at.desc())
+        return (await db.execute(stmt)).scalars().all()
+
+    async def get_by_escrow_rows_async(self, db: AsyncSession, escrow_id: str):
+        """get_by_escrow_async as response-shaped dicts (schemas.PaymentInstruction columns only)."""
+        stmt = select(*PAYMENT_INSTRUCTION_COLUMNS).where(models.PaymentInstruction.escrow_id == escrow_id).order_by(
+            models.PaymentInstruction.created_at.desc())
+        return [row._asdict() for row in await db.execute(stmt)]
+
 payment_service = PaymentService()
@@ -0,0 +1,179 @@
+import contextvars
+import threading
+import time
+
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Standalone (no `database` import): database.py wires these in when it builds the engine/client.
+
+class _WaitStats:
+    """Counters shared by both pool monitors (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else None,
+                "max_wait_ms": round(self.wait_max * 1000, 3)
+            }
+
+class SqlPoolMonitor:
+    """Live gauges for the SQLAlchemy engine pool plus checkout wait times (via InstrumentedQueuePool)."""
+
+    def __init__(self):
+        self.waits = _WaitStats()
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.invalidations = 0
+        self._engine = None
+
+    def attach(self, engine):
+        self._engine = engine
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def stats(self):
+        pool = self._engine.pool if self._engine is not None else None
+        gauges = {"pool_class": type(pool).__name__ if pool is not None else None}
+        if isinstance(pool, QueuePool):
+            gauges.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                # Negative while the pool is still filling up to pool_size
+                "overflow": pool.overflow(),
+                "timeout_seconds": pool.timeout()
+            })
+        with self._lock:
+            gauges.update({"connects": self.connects, "invalidations": self.invalidations})
+        gauges.update(self.waits.snapshot())
+        return gauges
+
+sql_pool_monitor = SqlPoolMonitor()
+async_sql_pool_monitor = SqlPoolMonitor()
+
+class _TimedCheckout:
+    """Pool mixin that times every checkout (queue wait + connect), including the ones that time out."""
+    monitor = None
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.monitor.waits.record_timeout()
+            raise
+        self.monitor.waits.record_wait(time.perf_counter() - started_at)
+        return connection
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    monitor = sql_pool_monitor
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    monitor = async_sql_pool_monitor
+
+def instrumented_async_pool(monitor: SqlPoolMonitor):
+    """InstrumentedAsyncQueuePool reporting to its own monitor (one per read replica engine)."""
+    return type("InstrumentedReplicaQueuePool", (_TimedCheckout, AsyncAdaptedQueuePool), {"monitor": monitor})
+
+class MongoPoolMonitor(monitoring.ConnectionPoolListener):
+    """pymongo CMAP listener: open/in-use connections per server and checkout wait times."""
+
+    def __init__(self):
+        self.waits = _WaitStats()
+        self._lock = threading.Lock()
+        # Checkout events fire synchronously in the requesting thread/task, so a context
+        # variable pairs "started" with "checked out" for both MongoClient and AsyncMongoClient.
+        self._started_at = contextvars.ContextVar(f"mongo_checkout_started_{id(self)}", default=None)
+        self.max_pool_size = None
+        self.open = 0
+        self.checked_out = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        self.max_pool_size = event.options.get("maxPoolSize")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        self._started_at.set(time.perf_counter())
+
+    def connection_check_out_failed(self, event):
+        self._started_at.set(None)
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            self.waits.record_timeout()
+
+    def connection_checked_out(self, event):
+        started_at = self._started_at.get()
+        self._started_at.set(None)
+        if started_at is not None:
+            self.waits.record_wait(time.perf_counter() - started_at)
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self):
+        with self._lock:
+            gauges = {
+                "max_pool_size": self.max_pool_size,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "pool_clears": self.pool_clears
+            }
+        gauges.update(self.waits.snapshot())
+        return gauges
+
+mongo_pool_monitor = MongoPoolMonitor()
+async_mongo_pool_monitor = MongoPoolMonitor()
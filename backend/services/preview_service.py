@@ -0,0 +1,85 @@
+"""
+Thumbnails for photo evidence and first-page previews for PDFs, so inspectors can triage a
+milestone without downloading every full-size file.
+
+Rendering runs in the evidence processing pool (services/evidence_pool.py) after the evidence
+commits; uploads never wait for it. Previews are per blob (content-addressed:
+previews/<aa>/<sha256>.jpg|png next to the blob in the storage backend), so a re-uploaded permit
+reuses the existing preview. When one is ready, every Evidence row for the blob gets preview_url
+(-> GET /evidence/{id}/preview), which also invalidates the cached escrow graphs.
+
+Pillow renders photos and PyMuPDF renders PDFs (services/evidence_workers.py); both are optional,
+so without them files of that kind simply get no preview.
+"""
+import os
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import database
+import models
+from services import evidence_pool, evidence_workers
+from services.evidence_storage import preview_url
+
+PREVIEW_MAX_EDGE = int(os.getenv("PREVIEW_MAX_EDGE", "480")) # longest side, in pixels
+PREVIEW_DIR = "previews"
+
+Status = models.ProcessingStatus
+
+def preview_key(sha256: str, kind: str) -> str:
+    return f"{PREVIEW_DIR}/{sha256[:2]}/{sha256}{'.jpg' if kind == 'image' else '.png'}"
+
+def submit(sha256: str, storage_key: str, kind: str) -> bool:
+    return evidence_pool.evidence_pool.submit(
+        "preview", evidence_workers.render_preview, (storage_key, preview_key(sha256, kind), kind, PREVIEW_MAX_EDGE),
+        lambda db, key: finish(db, sha256, key)
+    )
+
+def attach(db: Session, evidence: models.Evidence, storage_key: str, filename: str, blob):
+    """
+    Called right after evidence_service.add_reference (whose upsert locks the blob row, so this
+    can't interleave with finish()). Copies a finished preview onto the new row; otherwise the
+    first upload of previewable content claims the blob and queues the render once it commits.
+    """
+    if blob.preview_status == Status.READY.value:
+        evidence.preview_url = preview_url(evidence.id)
+        return
+    kind = evidence_workers.file_kind(filename)
+    if blob.preview_status is not None or kind is None:
+        return # already queued (the render will fill this row in too), failed, or no renderer
+    evidence_pool.claim(db, models.EvidenceBlob.preview_status, evidence.sha256)
+    database.after_commit(db, submit, evidence.sha256, storage_key, kind)
+
+def finish(db: Session, sha256: str, key):
+    """Marks the blob READY (or FAILED when key is None) and links the preview from its evidence."""
+    blob = db.get(models.EvidenceBlob, sha256, with_for_update=True)
+    if blob is None:
+        return
+    blob.preview_status = Status.READY.value if key else Status.FAILED.value
+    blob.preview_key = key
+    if key:
+        # ORM updates (not a bulk UPDATE) so the escrows' ETags move and cached graphs are dropped
+        evidence = db.execute(
+            select(models.Evidence).where(models.Evidence.sha256 == sha256, models.Evidence.preview_url.is_(None))
+        ).scalars()
+        for row in evidence:
+            row.preview_url = preview_url(row.id)
+    db.commit()
+
+def resume(db: Session) -> int:
+    return evidence_pool.resume(db, models.EvidenceBlob.preview_status, submit)
+
+def stats():
+    """Preview jobs in the shape GET /metrics/previews had before the pool also extracted metadata."""
+    pool = evidence_pool.evidence_pool.stats()
+    previews = pool["jobs"].get("preview", {})
+    return {
+        "workers": pool["workers"],
+        "max_queue": pool["max_queue"],
+        "pending": pool["pending"], # shared queue: includes metadata jobs
+        "rendered": previews.get("completed", 0),
+        "failed": previews.get("failed", 0),
+        "dropped": previews.get("dropped", 0),
+        "avg_render_ms": previews.get("avg_ms"),
+        "renderers": pool["libraries"]
+    }
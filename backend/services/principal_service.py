@@ -0,0 +1,242 @@
+import calendar
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session
+
+import auth
+import database
+import models
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+class Principal:
+    """
+    Detached, read-only view of an authenticated user.
+    Safe to share across requests/threads (unlike a session-bound models.User).
+    """
+    __slots__ = ("id", "username", "role", "organization_id", "is_active")
+
+    def __init__(self, id, username, role, organization_id=None, is_active=True):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.organization_id = organization_id
+        self.is_active = is_active
+
+    @classmethod
+    def from_user(cls, user: models.User):
+        return cls(user.id, user.username, user.role, user.organization_id, user.is_active)
+
+class PrincipalCache:
+    """Bounded LRU of resolved principals keyed by token subject, with a TTL per entry."""
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # username -> (expires_at, Principal)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, username: str) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[username]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.username] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, username: str):
+        with self._lock:
+            if self._entries.pop(username, None) is not None:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
+
+principal_cache = PrincipalCache()
+
+class RevocationList:
+    """
+    Compact in-memory view of revoked subjects for stateless auth.
+    Holds only users that are deactivated or whose tokens were cut off recently
+    (older cutoffs are irrelevant once every token issued before them has expired).
+    Refreshed from the users table by a background thread.
+    """
+    DEACTIVATED = float("inf")
+
+    def __init__(self, refresh_seconds: float = auth.REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._cutoffs = {} # username -> epoch seconds; tokens with iat < cutoff are revoked
+        self._local = {} # username -> (revoked at, cutoff) for revoke() calls in this process
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._refreshed_at = None
+        self._refresh_count = 0
+        self._refresh_errors = 0
+
+    def is_revoked(self, username: str, issued_at: Optional[int]) -> bool:
+        cutoff = self._cutoffs.get(username)
+        if cutoff is None:
+            return False
+        return (issued_at or 0) < cutoff
+
+    def revoke(self, username: str, cutoff: Optional[datetime] = None):
+        """Immediate local revocation (this process). cutoff=None => deactivated."""
+        value = self.DEACTIVATED if cutoff is None else _epoch(cutoff)
+        with self._lock:
+            self._cutoffs[username] = value
+            self._local[username] = (datetime.utcnow(), value)
+
+    def refresh(self):
+        started = datetime.utcnow()
+        horizon = started - timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+        with self._lock:
+            local = {u: value for u, (at, value) in self._local.items() if at >= horizon}
+        db = database.SessionLocal()
+        try:
+            rows = db.query(models.User.username, models.User.is_active, models.User.tokens_valid_after).filter(
+                or_(models.User.is_active == False, models.User.tokens_valid_after >= horizon)
+            ).all()
+            cutoffs = {}
+            for username, is_active, valid_after in rows:
+                cutoffs[username] = self.DEACTIVATED if is_active is False else _epoch(valid_after)
+            # Deleted users have no row left to revoke them by; keep this process's revocations
+            # of them until every token issued before is expired.
+            unlisted = [u for u in local if u not in cutoffs]
+            existing = set(db.scalars(select(models.User.username).where(models.User.username.in_(unlisted)))) if unlisted else set()
+        finally:
+            db.close()
+        for username in unlisted:
+            if username not in existing:
+                cutoffs[username] = local[username]
+        with self._lock:
+            self._local = {u: (at, value) for u, (at, value) in self._local.items() if at >= horizon}
+            # Revocations committed while the query ran may not be in its snapshot
+            cutoffs.update({u: value for u, (at, value) in self._local.items() if at >= started})
+            self._cutoffs = cutoffs
+            self._refreshed_at = time.time()
+            self._refresh_count += 1
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="revocation-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last known set; the next tick retries.
+                self._refresh_errors += 1
+                print(f"Revocation list refresh failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": auth.STATELESS_AUTH,
+                "entries": len(self._cutoffs),
+                "refresh_seconds": self.refresh_seconds,
+                "staleness_seconds": round(time.time() - self._refreshed_at, 3) if self._refreshed_at else None,
+                "refreshes": self._refresh_count,
+                "refresh_errors": self._refresh_errors
+            }
+
+def _epoch(dt: datetime) -> int:
+    # Token iat has 1s resolution, so the cutoff is rounded up: a token minted in the cutoff
+    # second is rejected even if it came after the change (a login in that second must retry).
+    return calendar.timegm(dt.utctimetuple()) + (1 if dt.microsecond else 0)
+
+revocation_list = RevocationList()
+
+# -- Invalidation --
+# Any commit that deactivates a user, changes their role/org or deletes them drops the cached
+# principal immediately (in this process). Other workers converge within the TTL.
+# Role changes and deactivation also cut off previously issued tokens (stateless mode).
+# Changes are collected at flush time in session.info["principal_invalidations"] and applied
+# after the commit: a request racing the transaction must not re-cache the old row, and a
+# rolled-back transaction changed nothing.
+_SECURITY_ATTRS = ("role", "is_active", "organization_id", "username")
+_TOKEN_CLAIM_ATTRS = ("role", "is_active", "organization_id")
+
+@event.listens_for(Session, "before_flush")
+def _cut_off_stale_tokens(session, flush_context, instances):
+    for obj in session.dirty:
+        if not isinstance(obj, models.User):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[a].history.has_changes() for a in _TOKEN_CLAIM_ATTRS):
+            obj.tokens_valid_after = datetime.utcnow()
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_principals(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, models.User):
+            continue
+        state = inspect(obj)
+        if obj in session.deleted or any(state.attrs[a].history.has_changes() for a in _SECURITY_ATTRS):
+            pending = session.info.setdefault("principal_invalidations", {}) # username -> (revoke, cutoff)
+            if obj in session.deleted or obj.is_active is False:
+                pending[obj.username] = (True, None)
+            elif state.attrs.tokens_valid_after.history.has_changes() and obj.tokens_valid_after:
+                pending[obj.username] = (True, obj.tokens_valid_after)
+            else:
+                pending.setdefault(obj.username, (False, None))
+            # Renames: also drop the old subject
+            for name in state.attrs.username.history.deleted or ():
+                pending[name] = (True, None)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session):
+    for username, (revoke, cutoff) in session.info.pop("principal_invalidations", {}).items():
+        principal_cache.invalidate(username)
+        if revoke:
+            revocation_list.revoke(username, cutoff)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_principals(session):
+    session.info.pop("principal_invalidations", None)
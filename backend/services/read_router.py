@@ -0,0 +1,137 @@
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from jose import JWTError, jwt
+
+import database
+
+# After a user's own successful write, their reads stay on the primary for this long
+# (covers replica lag so they always see their own changes).
+READ_STICKINESS_SECONDS = float(os.getenv("READ_STICKINESS_SECONDS", "5"))
+# A replica that failed to hand out a connection is skipped for this long
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Set on successful write responses for READ_STICKINESS_SECONDS: pins that client's reads to the
+# primary even when the reads carry no token (e.g. the public escrow detail GET).
+PRIMARY_COOKIE = "read_primary"
+
+def subject_from_request(request) -> Optional[str]:
+    """Token subject for routing only (signature is verified by get_current_user, not here)."""
+    header = request.headers.get("authorization", "")
+    if not header.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.get_unverified_claims(header[7:]).get("sub")
+    except JWTError:
+        return None
+
+def pinned_to_primary(request) -> bool:
+    return request.cookies.get(PRIMARY_COOKIE) == "1"
+
+class ReadRouter:
+    """
+    Picks the session for read-only requests: a replica (round robin) unless the caller wrote
+    recently, in which case the primary. Stickiness is per worker process.
+    """
+
+    def __init__(self, replica_sessions, stickiness_seconds: float = READ_STICKINESS_SECONDS,
+                 retry_seconds: float = REPLICA_RETRY_SECONDS):
+        self.replica_sessions = list(replica_sessions)
+        self.stickiness_seconds = stickiness_seconds
+        self.retry_seconds = retry_seconds
+        self._round_robin = itertools.cycle(range(len(self.replica_sessions)))
+        self._sticky = {} # subject -> monotonic expiry
+        self._down_until = {} # replica index -> monotonic time
+        self._lock = threading.Lock()
+        self._primary_reads = 0
+        self._replica_reads = 0
+        self._sticky_reads = 0
+        self._replica_failures = 0
+
+    def mark_write(self, subject: Optional[str]):
+        if not subject or not self.replica_sessions:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._sticky[subject] = now + self.stickiness_seconds
+            if len(self._sticky) > 10000:
+                self._sticky = {s: t for s, t in self._sticky.items() if t > now}
+
+    def pin_response(self, response):
+        """Cookie counterpart of mark_write, for clients whose reads aren't tied to a subject."""
+        if self.replica_sessions:
+            response.set_cookie(PRIMARY_COOKIE, "1", max_age=max(1, math.ceil(self.stickiness_seconds)),
+                                httponly=True, samesite="lax")
+
+    def is_sticky(self, subject: Optional[str]) -> bool:
+        if not subject:
+            return False
+        expires_at = self._sticky.get(subject)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def _next_replica(self):
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.replica_sessions)):
+                index = next(self._round_robin)
+                if self._down_until.get(index, 0) <= now:
+                    return index
+        return None
+
+    @asynccontextmanager
+    async def session(self, subject: Optional[str], pinned: bool = False):
+        index = None
+        if self.replica_sessions:
+            if pinned or self.is_sticky(subject):
+                with self._lock:
+                    self._sticky_reads += 1
+            else:
+                index = self._next_replica()
+
+        if index is not None:
+            db = self.replica_sessions[index]()
+            try:
+                await db.connection() # fail over now rather than mid-handler
+            except Exception as e:
+                await db.close()
+                with self._lock:
+                    self._replica_failures += 1
+                    self._down_until[index] = time.monotonic() + self.retry_seconds
+                print(f"Read replica {index} unavailable, using primary: {e}")
+                index = None
+            else:
+                with self._lock:
+                    self._replica_reads += 1
+                db.info["read_replica"] = index # may lag the primary (see escrow_cache fills)
+                try:
+                    yield db
+                finally:
+                    await db.close()
+                return
+
+        with self._lock:
+            self._primary_reads += 1
+        async with database.AsyncSessionLocal() as db:
+            yield db
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "replicas": len(self.replica_sessions),
+                "replicas_down": sorted(i for i, t in self._down_until.items() if t > now),
+                "stickiness_seconds": self.stickiness_seconds,
+                "sticky_subjects": sum(1 for t in self._sticky.values() if t > now),
+                "primary_reads": self._primary_reads,
+                "replica_reads": self._replica_reads,
+                "sticky_reads": self._sticky_reads,
+                "replica_failures": self._replica_failures
+            }
+
+read_router = ReadRouter(database.ReplicaSessionLocals)
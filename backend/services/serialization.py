@@ -0,0 +1,42 @@
+"""
+Fast response path for list endpoints: rows are projected to plain dicts shaped exactly like the
+response schemas and encoded straight to JSON bytes, skipping ORM objects and response_model
+re-validation. Only use it for data read from our own database (already valid by construction).
+
+orjson when installed (several times faster than json on large pages); stdlib json otherwise.
+"""
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError: # optional: the stdlib fallback produces the same JSON, slower
+    orjson = None
+
+def _default(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    """JSONResponse replacement for pre-shaped content (dicts/lists of trusted rows)."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def enum_value(value):
+    return value.value if isinstance(value, enum.Enum) else value
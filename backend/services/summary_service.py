@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+# Escrow state -> counter column on portfolio_summaries
+STATE_COLUMNS = {
+    models.EscrowState.CREATED: "escrows_created",
+    models.EscrowState.FUNDED: "escrows_funded",
+    models.EscrowState.ACTIVE: "escrows_active",
+    models.EscrowState.COMPLETED: "escrows_completed",
+    models.EscrowState.DISPUTED: "escrows_disputed",
+    models.EscrowState.HALTED: "escrows_halted",
+}
+AMOUNT_COLUMNS = ("total_amount", "funded_amount", "outstanding_delta")
+COUNTER_COLUMNS = ["escrow_count", *STATE_COLUMNS.values(), *AMOUNT_COLUMNS, "milestones_awaiting_inspection"]
+# Delta funding is only "outstanding" once the escrow has been funded the first time
+DELTA_FUNDING_STATES = (models.EscrowState.FUNDED, models.EscrowState.ACTIVE)
+AWAITING_INSPECTION = models.MilestoneStatus.EVIDENCE_SUBMITTED
+
+def summary_keys(organization_id, custodian_organization_id):
+    """The (organization_id, role) rows an escrow counts towards."""
+    keys = []
+    if organization_id:
+        keys.append((organization_id, models.UserRole.AGENT.value))
+    if custodian_organization_id:
+        keys.append((custodian_organization_id, models.UserRole.CUSTODIAN.value))
+    return keys
+
+def escrow_contribution(state, total_amount, funded_amount):
+    total, funded = total_amount or 0.0, funded_amount or 0.0
+    contribution = {"escrow_count": 1, "total_amount": total, "funded_amount": funded}
+    if state in STATE_COLUMNS:
+        contribution[STATE_COLUMNS[state]] = 1
+    if state in DELTA_FUNDING_STATES:
+        contribution["outstanding_delta"] = max(total - funded, 0.0)
+    return contribution
+
+def apply_deltas(conn, deltas):
+    """Upsert {(org, role): {column: delta}} as `col = col + delta` (single statement per key)."""
+    table = models.PortfolioSummary.__table__
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    now = datetime.utcnow()
+    for (organization_id, role), delta in deltas.items():
+        delta = {k: (v if k in AMOUNT_COLUMNS else int(v)) for k, v in delta.items() if v}
+        if not delta:
+            continue
+        values = {c: 0 for c in COUNTER_COLUMNS}
+        values.update(delta)
+        stmt = insert(table).values(organization_id=organization_id, role=role, updated_at=now, **values)
+        set_ = {c: table.c[c] + v for c, v in delta.items()}
+        set_["updated_at"] = now
+        conn.execute(stmt.on_conflict_do_update(index_elements=["organization_id", "role"], set_=set_))
+
+def _add(deltas, keys, contribution, sign):
+    for key in keys:
+        for column, value in contribution.items():
+            deltas[key][column] += sign * value
+
+def _old(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), attr)
+
+# -- Maintenance --
+# Runs inside the flush, on the flush's connection: the summary commits or rolls back together
+# with the escrow/milestone rows. Core/bulk writes bypass this; call apply_deltas yourself.
+@event.listens_for(Session, "after_flush")
+def _update_summaries(session, flush_context):
+    deltas = defaultdict(lambda: defaultdict(float))
+    rekeyed = {} # escrow_id -> (old keys, new keys)
+    awaiting_delta = defaultdict(int) # escrow_id -> net change of milestones awaiting inspection
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Escrow):
+            state = inspect(obj)
+            new_keys = summary_keys(obj.organization_id, obj.custodian_organization_id)
+            new = escrow_contribution(obj.state, obj.total_amount, obj.funded_amount)
+            if obj in session.new:
+                _add(deltas, new_keys, new, +1)
+                continue
+            old_keys = summary_keys(_old(state, "organization_id"), _old(state, "custodian_organization_id"))
+            old = escrow_contribution(_old(state, "state"), _old(state, "total_amount"), _old(state, "funded_amount"))
+            _add(deltas, old_keys, old, -1)
+            if obj not in session.deleted:
+                _add(deltas, new_keys, new, +1)
+            if old_keys != new_keys:
+                rekeyed[obj.id] = (old_keys, new_keys if obj not in session.deleted else [])
+
+        elif isinstance(obj, models.Milestone) and obj.escrow_id:
+            state = inspect(obj)
+            was = obj not in session.new and _old(state, "status") == AWAITING_INSPECTION
+            now = obj not in session.deleted and obj.status == AWAITING_INSPECTION
+            if was != now:
+                awaiting_delta[obj.escrow_id] += 1 if now else -1
+
+    conn = session.connection()
+    # Escrows that moved between summary rows carry their awaiting-inspection milestones along
+    if rekeyed:
+        milestones = models.Milestone.__table__
+        rows = conn.execute(
+            select(milestones.c.escrow_id, func.count()).where(
+                milestones.c.escrow_id.in_(rekeyed.keys()), milestones.c.status == AWAITING_INSPECTION
+            ).group_by(milestones.c.escrow_id)
+        )
+        current = dict(rows.all())
+        for escrow_id, (old_keys, new_keys) in rekeyed.items():
+            after = current.get(escrow_id, 0)
+            before = after - awaiting_delta.pop(escrow_id, 0)
+            _add(deltas, old_keys, {"milestones_awaiting_inspection": before}, -1)
+            _add(deltas, new_keys, {"milestones_awaiting_inspection": after}, +1)
+
+    if awaiting_delta:
+        escrows = models.Escrow.__table__
+        rows = conn.execute(
+            select(escrows.c.id, escrows.c.organization_id, escrows.c.custodian_organization_id)
+            .where(escrows.c.id.in_(awaiting_delta.keys()))
+        )
+        for escrow_id, organization_id, custodian_organization_id in rows:
+            _add(deltas, summary_keys(organization_id, custodian_organization_id),
+                 {"milestones_awaiting_inspection": awaiting_delta[escrow_id]}, +1)
+
+    if deltas:
+        apply_deltas(conn, deltas)
+
+# -- Reads / repair --
+async def get_summary_async(db: AsyncSession, organization_id: str, role: str):
+    """Primary-key lookup; None when the organization has no escrows in that role yet."""
+    return await db.get(models.PortfolioSummary, (organization_id, role))
+
+def rebuild(conn):
+    """Recompute every summary row from escrows/milestones (backfill, or repair after bulk SQL)."""
+    escrows = models.Escrow.__table__
+    milestones = models.Milestone.__table__
+    conn.execute(models.PortfolioSummary.__table__.delete())
+
+    awaiting = (
+        select(milestones.c.escrow_id, func.count().label("n"))
+        .where(milestones.c.status == AWAITING_INSPECTION)
+        .group_by(milestones.c.escrow_id)
+        .subquery()
+    )
+    rows = conn.execute(
+        select(escrows.c.organization_id, escrows.c.custodian_organization_id, escrows.c.state,
+               escrows.c.total_amount, escrows.c.funded_amount, func.coalesce(awaiting.c.n, 0))
+        .outerjoin(awaiting, awaiting.c.escrow_id == escrows.c.id)
+        .where((escrows.c.organization_id.isnot(None)) | (escrows.c.custodian_organization_id.isnot(None)))
+    )
+    deltas = defaultdict(lambda: defaultdict(float))
+    for organization_id, custodian_organization_id, state, total, funded, n_awaiting in rows:
+        contribution = escrow_contribution(models.EscrowState(state) if state else None, total, funded)
+        contribution["milestones_awaiting_inspection"] = n_awaiting
+        _add(deltas, summary_keys(organization_id, custodian_organization_id), contribution, +1)
+    apply_deltas(conn, deltas)
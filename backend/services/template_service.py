@@ -1,5 +1,7 @@
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 import models
 import services.ledger_service as ledger_service # Using ledger service directly for strict audit chaining? 
@@ -34,6 +36,9 @@ def seed_templates(db: Session):
 def get_all_templates(db: Session):
     return db.query(models.MilestoneTemplate).all()
 
+async def get_all_templates_async(db: AsyncSession):
+    return (await db.execute(select(models.MilestoneTemplate))).scalars().all()
+
 def apply_template(db: Session, escrow_id: str, template_id: str, current_user: models.User):
     # 1. Validate User Role
     if current_user.role != models.UserRole.AGENT:
@@ -64,6 +69,7 @@ def apply_template(db: Session, escrow_id: str, template_id: str, current_user:
         pass 
 
     created_count = 0
+    position = models.next_milestone_position(db, escrow.id)
     for tm in template.milestones:
         amount = (escrow.total_amount * tm["percentage"]) / 100.0
         
@@ -72,7 +78,8 @@ def apply_template(db: Session, escrow_id: str, template_id: str, current_user:
             name=tm["title"],
             amount=amount,
             required_evidence_types=tm["required_evidence"],
-            status=models.MilestoneStatus.CREATED
+            status=models.MilestoneStatus.CREATED,
+            position=position + created_count
         )
         db.add(milestone)
         created_count += 1
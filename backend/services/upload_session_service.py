@@ -0,0 +1,280 @@
+"""
+Resumable evidence uploads for flaky (mobile) connections.
+
+    POST   /milestones/{id}/upload-sessions       declare filename/size -> session id, chunk size
+    PUT    /upload-sessions/{id}/chunks/{index}    raw chunk bytes (any order, re-sendable)
+    GET    /upload-sessions/{id}                   received byte ranges + missing chunk indexes
+    POST   /upload-sessions/{id}/complete          -> Evidence (same row + attestation as a form upload)
+
+Direct uploads (POST /milestones/{id}/direct-uploads) use the same session row without chunks:
+the client declares the SHA-256 up front, PUTs the file to a pre-signed storage URL and then
+calls /complete, which only checks the stored object against the declared size and hash.
+A hash is public (it is in the ledger), so it only skips the upload when the same escrow
+already holds that content; otherwise known content is uploaded to a per-session key under
+incoming/ as proof of possession and deduplicated into the existing blob on completion.
+
+The session file is preallocated at the declared size and every chunk is written straight to
+its offset (pwrite), so there is no assembly copy: completion hashes the file once and renames
+it into the content-addressed store (evidence_service.adopt_file). With local storage, keep the
+session directory on the same filesystem as uploads/ so that move is a rename.
+"""
+import hashlib
+import math
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import anyio
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import models
+from services import evidence_service
+from services.evidence_storage import storage
+
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", "upload_sessions")
+UPLOAD_SESSION_CHUNK_BYTES = int(os.getenv("UPLOAD_SESSION_CHUNK_BYTES", str(4 * 1024 * 1024)))
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+INCOMING_DIR = "incoming" # storage key prefix for direct uploads of already stored content
+
+Status = models.UploadSessionStatus
+
+def session_path(upload: models.UploadSession) -> str:
+    return os.path.join(UPLOAD_SESSION_DIR, f"{upload.id}.part")
+
+def total_chunks(upload: models.UploadSession) -> int:
+    return math.ceil(upload.size_bytes / upload.chunk_bytes)
+
+def chunk_length(upload: models.UploadSession, index: int) -> int:
+    return min(upload.chunk_bytes, upload.size_bytes - index * upload.chunk_bytes)
+
+def _new_session(db: Session, milestone_id: str, origin: models.EvidenceOrigin, evidence_type: str, request,
+                 created_by: str, **fields) -> models.UploadSession:
+    evidence_service.check_extension(request.filename)
+    if request.size_bytes <= 0:
+        raise HTTPException(status_code=400, detail="size_bytes must be positive.")
+    if request.size_bytes > evidence_service.EVIDENCE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Evidence file exceeds {evidence_service.EVIDENCE_MAX_BYTES} bytes.")
+    purge_expired(db)
+
+    now = datetime.utcnow()
+    fields.setdefault("chunk_bytes", UPLOAD_SESSION_CHUNK_BYTES)
+    upload = models.UploadSession(
+        milestone_id=milestone_id,
+        origin=origin.value,
+        evidence_type=evidence_type,
+        source_type=request.source_type.value,
+        filename=os.path.basename(request.filename),
+        size_bytes=request.size_bytes,
+        sha256=request.sha256.lower() if request.sha256 else None,
+        created_by=created_by,
+        status=Status.OPEN.value,
+        created_at=now,
+        expires_at=now + timedelta(hours=UPLOAD_SESSION_TTL_HOURS),
+        **fields
+    )
+    db.add(upload)
+    db.flush()
+    return upload
+
+def create_session(db: Session, milestone_id: str, origin: models.EvidenceOrigin, evidence_type: str, request,
+                   created_by: str) -> models.UploadSession:
+    """Validates the declared file and preallocates it. Milestone checks are the caller's."""
+    upload = _new_session(db, milestone_id, origin, evidence_type, request, created_by)
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    with open(session_path(upload), "wb") as f:
+        f.truncate(upload.size_bytes) # sparse; chunks fill it in place
+    db.commit()
+    return upload
+
+def create_direct_session(db: Session, milestone_id: str, origin: models.EvidenceOrigin, evidence_type: str, request,
+                          created_by: str):
+    """
+    Session for a direct upload to the storage backend: (session, pre-signed request or None).
+    None means the content is already stored, so the client can go straight to /complete.
+    """
+    if not request.sha256 or len(request.sha256) != 64:
+        raise HTTPException(status_code=400, detail="sha256 (hex) is required for direct uploads.")
+    sha256 = request.sha256.lower()
+    key = evidence_service.blob_key(sha256, request.filename)
+    stored_key = evidence_service.find_blob(db, sha256)
+    if stored_key and _on_escrow(db, milestone_id, sha256):
+        key = stored_key
+    elif stored_key:
+        key = f"{INCOMING_DIR}/{uuid.uuid4().hex}{os.path.splitext(key)[1]}"
+    upload = _new_session(db, milestone_id, origin, evidence_type, request, created_by,
+                          chunk_bytes=request.size_bytes, storage_key=key)
+    db.commit()
+    if key == stored_key:
+        return upload, None
+    return upload, storage.presign_upload(key, upload.size_bytes, sha256)
+
+def _on_escrow(db: Session, milestone_id: str, sha256: str) -> bool:
+    """Whether evidence with this content is already attached to the milestone's escrow."""
+    escrow_id = select(models.Milestone.escrow_id).where(models.Milestone.id == milestone_id).scalar_subquery()
+    return db.execute(
+        select(models.Evidence.id)
+        .join(models.Milestone, models.Milestone.id == models.Evidence.milestone_id)
+        .where(models.Evidence.sha256 == sha256, models.Milestone.escrow_id == escrow_id)
+        .limit(1)
+    ).first() is not None
+
+def _incoming(upload: models.UploadSession) -> bool:
+    return bool(upload.storage_key) and upload.storage_key.startswith(f"{INCOMING_DIR}/")
+
+def get_session(db: Session, session_id: str, username: str, writable: bool = False) -> models.UploadSession:
+    upload = db.get(models.UploadSession, session_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if upload.created_by != username:
+        raise HTTPException(status_code=403, detail="Upload session belongs to another user.")
+    if writable:
+        if upload.status != Status.OPEN.value:
+            raise HTTPException(status_code=409, detail=f"Upload session is {upload.status}.")
+        if upload.expires_at < datetime.utcnow() or (not upload.storage_key and not os.path.exists(session_path(upload))):
+            raise HTTPException(status_code=410, detail="Upload session expired.")
+    return upload
+
+def received_chunks(db: Session, upload: models.UploadSession):
+    return sorted(db.execute(select(models.UploadChunk.index).where(models.UploadChunk.session_id == upload.id)).scalars())
+
+def describe(db: Session, upload: models.UploadSession):
+    received = received_chunks(db, upload)
+    ranges = []
+    for index in received:
+        start = index * upload.chunk_bytes
+        end = start + chunk_length(upload, index)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return {
+        "id": upload.id,
+        "milestone_id": upload.milestone_id,
+        "origin": upload.origin,
+        "evidence_type": upload.evidence_type,
+        "source_type": upload.source_type,
+        "filename": upload.filename,
+        "size_bytes": upload.size_bytes,
+        "chunk_bytes": upload.chunk_bytes,
+        "total_chunks": total_chunks(upload),
+        "status": upload.status,
+        "received_bytes": sum(end - start for start, end in ranges),
+        "received_ranges": ranges, # [start, end) byte offsets
+        "missing_chunks": sorted(set(range(total_chunks(upload))) - set(received)),
+        "evidence_id": upload.evidence_id,
+        "expires_at": upload.expires_at
+    }
+
+def _pwrite_all(fd, data, offset):
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+async def write_chunk(upload: models.UploadSession, index: int, body, expected_sha256: str = None) -> int:
+    """Streams one chunk (async iterable of bytes) to its offset in the session file."""
+    if upload.storage_key:
+        raise HTTPException(status_code=409, detail="Direct upload session: PUT the file to its pre-signed URL.")
+    if not 0 <= index < total_chunks(upload):
+        raise HTTPException(status_code=400, detail=f"Chunk index must be between 0 and {total_chunks(upload) - 1}.")
+    expected = chunk_length(upload, index)
+    offset = index * upload.chunk_bytes
+    digest = hashlib.sha256()
+    written = 0
+    fd = os.open(session_path(upload), os.O_WRONLY)
+    try:
+        async for piece in body:
+            if not piece:
+                continue
+            if written + len(piece) > expected:
+                raise HTTPException(status_code=413, detail=f"Chunk {index} must be {expected} bytes.")
+            await anyio.to_thread.run_sync(_pwrite_all, fd, piece, offset + written)
+            digest.update(piece)
+            written += len(piece)
+    finally:
+        os.close(fd)
+    if written != expected:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected} bytes, got {written}.")
+    if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+        raise HTTPException(status_code=400, detail=f"Chunk {index} does not match its SHA-256.")
+    return written
+
+def record_chunk(db: Session, upload: models.UploadSession, index: int, size: int):
+    """Idempotent: a re-sent chunk overwrote the same bytes."""
+    conn = db.connection()
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    now = datetime.utcnow()
+    stmt = insert(models.UploadChunk.__table__).values(session_id=upload.id, index=index, size_bytes=size, received_at=now)
+    conn.execute(stmt.on_conflict_do_update(index_elements=["session_id", "index"], set_={"received_at": now}))
+    db.commit()
+
+def claim_for_completion(db: Session, upload: models.UploadSession):
+    """Moves OPEN -> COMPLETING (compare-and-set) so concurrent /complete calls can't both finish it."""
+    missing = [] if upload.storage_key else describe(db, upload)["missing_chunks"]
+    if missing:
+        raise HTTPException(status_code=409, detail={"message": "Upload incomplete.", "missing_chunks": missing})
+    table = models.UploadSession.__table__
+    claimed = db.execute(
+        update(table).where(table.c.id == upload.id, table.c.status == Status.OPEN.value).values(status=Status.COMPLETING.value)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Upload session is already being completed.")
+
+def store_file(db: Session, upload: models.UploadSession) -> evidence_service.StoredFile:
+    """Hashes the assembled file and moves it into the evidence store."""
+    if upload.storage_key:
+        return _check_direct(db, upload)
+    path = session_path(upload)
+    sha256, size = evidence_service.hash_file(path)
+    if upload.sha256 and sha256 != upload.sha256:
+        raise HTTPException(status_code=400, detail="Assembled file does not match the declared SHA-256.")
+    return evidence_service.adopt_file(db, path, sha256, size, upload.filename)
+
+def _check_direct(db: Session, upload: models.UploadSession) -> evidence_service.StoredFile:
+    # The bytes never passed through the API: the backend vouches for size and SHA-256
+    if not storage.verify(upload.storage_key, upload.sha256, upload.size_bytes):
+        raise HTTPException(status_code=409, detail="File not uploaded yet, or it does not match the declared size and SHA-256.")
+    if not _incoming(upload):
+        return evidence_service.StoredFile(upload.storage_key, upload.filename, upload.size_bytes, upload.sha256, False)
+    # Possession proven; keep one copy of the content
+    existing = evidence_service.find_blob(db, upload.sha256)
+    if existing:
+        storage.delete(upload.storage_key)
+        return evidence_service.StoredFile(existing, upload.filename, upload.size_bytes, upload.sha256, True)
+    key = evidence_service.blob_key(upload.sha256, upload.filename)
+    storage.move(upload.storage_key, key) # the blob was dropped since the session started
+    return evidence_service.StoredFile(key, upload.filename, upload.size_bytes, upload.sha256, False)
+
+def release_claim(db: Session, upload: models.UploadSession):
+    """Completion failed before the evidence committed: back to OPEN so the client can retry."""
+    db.rollback()
+    table = models.UploadSession.__table__
+    db.execute(update(table).where(table.c.id == upload.id, table.c.status == Status.COMPLETING.value)
+               .values(status=Status.OPEN.value))
+    db.commit()
+
+def abort(db: Session, upload: models.UploadSession):
+    upload.status = Status.ABORTED.value
+    _drop(db, upload)
+    db.commit()
+
+def _drop(db: Session, upload: models.UploadSession):
+    db.query(models.UploadChunk).filter(models.UploadChunk.session_id == upload.id).delete(synchronize_session=False)
+    evidence_service.discard_path(session_path(upload))
+    if _incoming(upload):
+        storage.delete(upload.storage_key)
+
+def purge_expired(db: Session):
+    """Expired open sessions give back their disk space."""
+    expired = db.execute(
+        select(models.UploadSession).where(models.UploadSession.status == Status.OPEN.value,
+                                           models.UploadSession.expires_at < datetime.utcnow())
+    ).scalars().all()
+    for upload in expired:
+        upload.status = Status.ABORTED.value
+        _drop(db, upload)
@@ -0,0 +1,339 @@
+from datetime import datetime
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from bson import ObjectId
+from bson.errors import InvalidId
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from database import mongo_client as client
+
+webhook_subscription_collection = client["escrow_db"]["webhook_subscriptions"]
+webhook_dead_letter_collection = client["escrow_db"]["webhook_dead_letters"]
+
+# Delivery tuning (env overridable)
+WEBHOOK_MAX_WORKERS = int(os.getenv("WEBHOOK_MAX_WORKERS", "16"))
+WEBHOOK_POOL_MAXSIZE = int(os.getenv("WEBHOOK_POOL_MAXSIZE", "32"))
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "5"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+WEBHOOK_BACKOFF_BASE_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_BASE_SECONDS", "0.5"))
+WEBHOOK_BACKOFF_MAX_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_MAX_SECONDS", "60"))
+# Hosts exempt from the private-address check (e.g. "127.0.0.1" for a local test receiver)
+WEBHOOK_ALLOWED_HOSTS = {h.strip().lower() for h in os.getenv("WEBHOOK_ALLOWED_HOSTS", "").split(",") if h.strip()}
+
+SIGNATURE_HEADER = "X-VeriDraw-Signature"
+TIMESTAMP_HEADER = "X-VeriDraw-Timestamp"
+DELIVERY_HEADER = "X-VeriDraw-Delivery"
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """HMAC-SHA256 over '<timestamp>.<body>' so receivers can reject replays."""
+    mac = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256)
+    return "sha256=" + mac.hexdigest()
+
+
+class InvalidWebhookURL(ValueError):
+    pass
+
+def validate_url(url: str):
+    """
+    Subscribers choose where the server sends requests, so only public http(s) endpoints are
+    accepted: no loopback, private, link-local (cloud metadata, 169.254.169.254) or reserved
+    addresses, for the literal host or anything it resolves to.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidWebhookURL("Webhook URL must be http(s).")
+    host = parts.hostname.lower()
+    if host in WEBHOOK_ALLOWED_HOSTS:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise InvalidWebhookURL(f"Webhook host {host} cannot be resolved.")
+    for address in addresses:
+        ip = _non_public(address)
+        if ip:
+            raise InvalidWebhookURL(f"Webhook URL must not target a private, loopback or link-local address ({ip}).")
+
+def _non_public(address: str):
+    """The address if it is not a public unicast one (IPv4-mapped IPv6 is checked as IPv4), else None."""
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip if not ip.is_global or ip.is_multicast else None
+
+# validate_url only sees what the host resolves to at registration; DNS can change afterwards
+# (rebinding). Delivery connections re-check the peer they actually connected to.
+class _PublicPeerMixin:
+    def _new_conn(self):
+        sock = super()._new_conn()
+        if self.host.lower() not in WEBHOOK_ALLOWED_HOSTS:
+            ip = _non_public(sock.getpeername()[0])
+            if ip:
+                sock.close()
+                raise NewConnectionError(self, f"Webhook host {self.host} resolved to a non-public address ({ip}).")
+        return sock
+
+class _PublicHTTPConnection(_PublicPeerMixin, HTTPConnection):
+    pass
+
+class _PublicHTTPSConnection(_PublicPeerMixin, HTTPSConnection):
+    pass
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+class _PublicOnlyAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections refuse non-public peers (see _PublicPeerMixin)."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _PublicHTTPConnectionPool, "https": _PublicHTTPSConnectionPool}
+
+def _object_id(value: str):
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+class WebhookService:
+    """
+    Outbound delivery channel for notifications.
+
+    Every notification written by NotificationService is fanned out to the
+    recipient's registered endpoints. Deliveries run concurrently on a bounded
+    worker pool sharing one keep-alive connection pool, failed attempts are
+    retried with exponential backoff, and exhausted deliveries land in a
+    dead-letter collection for inspection / redelivery.
+    """
+
+    def __init__(self, max_workers: int = WEBHOOK_MAX_WORKERS, pool_maxsize: int = WEBHOOK_POOL_MAXSIZE,
+                 timeout: float = WEBHOOK_TIMEOUT_SECONDS, max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+                 backoff_base: float = WEBHOOK_BACKOFF_BASE_SECONDS, backoff_max: float = WEBHOOK_BACKOFF_MAX_SECONDS):
+        self.subscription_collection = webhook_subscription_collection
+        self.dead_letter_collection = webhook_dead_letter_collection
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="webhook")
+
+        # One Session => pooled keep-alive connections per host, shared by all workers.
+        # Retries are handled by us (with backoff), not by urllib3.
+        # No proxies from the environment: the peer check must see the webhook host itself.
+        self._http = requests.Session()
+        self._http.trust_env = False
+        adapter = _PublicOnlyAdapter(pool_connections=max_workers, pool_maxsize=pool_maxsize, max_retries=0)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._stats = {
+            "delivered": 0,
+            "failed_attempts": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+        }
+        self._first_delivery_at = None
+        self._last_delivery_at = None
+
+    # --- Subscriptions ---
+    def register(self, user_id: str, role: str, url: str, secret: str = None, event_types: list = None):
+        """Raises InvalidWebhookURL for URLs validate_url rejects."""
+        validate_url(url)
+        subscription = {
+            "user_id": user_id,
+            "role": role,
+            "url": url,
+            "secret": secret or secrets.token_hex(32),
+            "event_types": event_types or [],  # empty => all events
+            "is_active": True,
+            "created_at": datetime.utcnow()
+        }
+        result = self.subscription_collection.insert_one(subscription)
+        subscription["_id"] = result.inserted_id
+        return subscription
+
+    def list_subscriptions(self, user_id: str):
+        return list(self.subscription_collection.find({"user_id": user_id}).sort("created_at", -1))
+
+    def remove(self, subscription_id: str, user_id: str):
+        object_id = _object_id(subscription_id)
+        if object_id is None:
+            return False # malformed id: same as not found
+        result = self.subscription_collection.delete_one({"_id": object_id, "user_id": user_id})
+        return result.deleted_count > 0
+
+    # --- Delivery ---
+    def dispatch(self, notifications: list):
+        """
+        Fan out freshly issued notifications to matching subscriptions.
+        Non-blocking: returns once deliveries are queued.
+        """
+        user_ids = list({n["user_id"] for n in notifications})
+        if not user_ids:
+            return 0
+
+        subscriptions = list(self.subscription_collection.find({"user_id": {"$in": user_ids}, "is_active": True}))
+        if not subscriptions:
+            return 0
+
+        queued = 0
+        for notification in notifications:
+            event_type = getattr(notification["event_type"], "value", notification["event_type"])
+            for sub in subscriptions:
+                if sub["user_id"] != notification["user_id"]:
+                    continue
+                if sub["event_types"] and event_type not in sub["event_types"]:
+                    continue
+                self.enqueue(sub, self._build_payload(notification, event_type))
+                queued += 1
+        return queued
+
+    def enqueue(self, subscription: dict, payload: dict, attempt: int = 1, delivery_id: str = None):
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(self._deliver, subscription, payload, attempt, delivery_id or str(uuid.uuid4()))
+
+    def _build_payload(self, notification: dict, event_type: str):
+        return {
+            "notification_id": str(notification.get("_id", "")),
+            "event_type": event_type,
+            "escrow_id": notification.get("escrow_id"),
+            "milestone_id": notification.get("milestone_id"),
+            "message": notification.get("message"),
+            "severity": getattr(notification.get("severity"), "value", notification.get("severity")),
+            "recipient": notification["user_id"],
+            "created_at": notification.get("created_at")
+        }
+
+    def _deliver(self, subscription: dict, payload: dict, attempt: int, delivery_id: str):
+        body = json.dumps(payload, sort_keys=True, default=str).encode()
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            SIGNATURE_HEADER: sign_payload(subscription["secret"], timestamp, body),
+            TIMESTAMP_HEADER: timestamp,
+            DELIVERY_HEADER: delivery_id,
+        }
+
+        error = None
+        try:
+            # No redirects: they could point a validated endpoint at an internal address
+            res = self._http.post(subscription["url"], data=body, headers=headers, timeout=self.timeout,
+                                  allow_redirects=False)
+            if 200 <= res.status_code < 300:
+                self._record_success()
+                return
+            error = f"HTTP {res.status_code}"
+        except requests.RequestException as e:
+            error = str(e)
+        except Exception as e:
+            error = f"Unexpected: {e}"
+
+        with self._lock:
+            self._stats["failed_attempts"] += 1
+
+        if attempt < self.max_attempts:
+            # Exponential backoff; the timer keeps the worker free while waiting.
+            delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+            with self._lock:
+                self._stats["retried"] += 1
+                self._pending += 1
+            timer = threading.Timer(delay, self._executor.submit,
+                                    args=(self._deliver, subscription, payload, attempt + 1, delivery_id))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._dead_letter(subscription, payload, delivery_id, attempt, error)
+
+        self._done()
+
+    def _record_success(self):
+        now = time.monotonic()
+        with self._lock:
+            self._stats["delivered"] += 1
+            if self._first_delivery_at is None:
+                self._first_delivery_at = now
+            self._last_delivery_at = now
+        self._done()
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _dead_letter(self, subscription: dict, payload: dict, delivery_id: str, attempts: int, error: str):
+        with self._lock:
+            self._stats["dead_lettered"] += 1
+        try:
+            self.dead_letter_collection.insert_one({
+                "delivery_id": delivery_id,
+                "subscription_id": subscription.get("_id"),
+                "user_id": subscription["user_id"],
+                "url": subscription["url"],
+                "payload": payload,
+                "attempts": attempts,
+                "last_error": error,
+                "failed_at": datetime.utcnow()
+            })
+        except Exception as e:
+            print(f"Webhook dead-letter write failed for {delivery_id}: {e}")
+
+    # --- Dead letters ---
+    def get_dead_letters(self, user_id: str):
+        return list(self.dead_letter_collection.find({"user_id": user_id}).sort("failed_at", -1))
+
+    def redeliver(self, dead_letter_id: str, user_id: str):
+        object_id = _object_id(dead_letter_id)
+        if object_id is None:
+            return False
+        entry = self.dead_letter_collection.find_one({"_id": object_id, "user_id": user_id})
+        if not entry:
+            return False
+        subscription = self.subscription_collection.find_one({"_id": entry["subscription_id"], "is_active": True})
+        if not subscription:
+            return False
+        self.dead_letter_collection.delete_one({"_id": entry["_id"]})
+        self.enqueue(subscription, entry["payload"], delivery_id=entry["delivery_id"])
+        return True
+
+    # --- Observability ---
+    def wait_idle(self, timeout: float = None):
+        """Blocks until every queued delivery (including scheduled retries) has finished."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["pending"] = self._pending
+            elapsed = None
+            if self._first_delivery_at is not None:
+                elapsed = self._last_delivery_at - self._first_delivery_at
+        snapshot["deliveries_per_second"] = round(snapshot["delivered"] / elapsed, 2) if elapsed else None
+        return snapshot
+
+webhook_service = WebhookService()
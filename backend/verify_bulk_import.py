@@ -0,0 +1,157 @@
+import requests
+import sys
+import os
+import json
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+import httpx
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from services import bulk_import_service, evidence_service
+
+BASE_URL = "http://localhost:8000"
+BULK_ESCROWS = int(os.getenv("BULK_ESCROWS", "5000"))
+TARGET_PER_MINUTE = 10000
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+def read_results(res):
+    return [json.loads(line) for line in res.text.splitlines() if line.strip()]
+
+async def slow_streamed_import(csv_text, pause=0.1, stall_timeout=0.2):
+    """
+    A multipart CSV import whose NDJSON results take longer than the upload stall timeout,
+    served behind UploadLimitMiddleware (ASGI spec < 2.4: the response also waits on receive()).
+    """
+    async def app(scope, receive, send):
+        form = await Request(scope, receive).form()
+        rows = bulk_import_service.parse_csv((await form["file"].read()).decode("utf-8-sig"))
+
+        def results():
+            for i, row in enumerate(rows):
+                time.sleep(pause)
+                yield {"row": i, "ref": row.get("ref"), "status": "created"}
+
+        await StreamingResponse(bulk_import_service.ndjson(results()), media_type="application/x-ndjson")(scope, receive, send)
+
+    middleware = evidence_service.UploadLimitMiddleware(app, stall_timeout=stall_timeout)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url=BASE_URL) as client:
+        return await client.post("/escrows/bulk", files={"file": ("book.csv", csv_text, "text/csv")})
+
+def verify_bulk_import():
+    print("--- Verifying Bulk Escrow Import ---")
+    agent = get_auth_headers("alice_agent", "AGENT")
+
+    # 1. JSON array with one bad row
+    print("\n[1] JSON import with an invalid row...")
+    rows = [
+        {"buyer_id": "bulk_buyer", "provider_id": "bulk_provider", "total_amount": 1000,
+         "milestones": [{"name": "Phase 1", "amount": 600, "required_evidence_types": ["Invoice"]},
+                        {"name": "Phase 2", "amount": 400, "required_evidence_types": ["Photo"]}]},
+        {"buyer_id": "bulk_buyer", "provider_id": "bulk_provider", "total_amount": -5, "milestones": []},
+        {"buyer_id": "bulk_buyer", "total_amount": 100, "milestones": []},
+    ]
+    res = requests.post(f"{BASE_URL}/escrows/bulk", headers=agent, json=rows)
+    results = {r["row"]: r for r in read_results(res)}
+    if res.status_code == 200 and res.headers["content-type"].startswith("application/x-ndjson"):
+        print("PASS: Streamed NDJSON results.")
+    else:
+        print(f"FAIL: Expected NDJSON 200, got {res.status_code} {res.headers.get('content-type')}")
+    if results.get(0, {}).get("status") == "created" and results.get(1, {}).get("status") == "error" \
+            and results.get(2, {}).get("status") == "error":
+        print("PASS: Valid row created, invalid rows reported per row.")
+    else:
+        print(f"FAIL: Unexpected results {results}")
+
+    # 2. Created escrow is indistinguishable from POST /escrows
+    escrow_id = results.get(0, {}).get("id")
+    e = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=agent).json()
+    if e.get("state") == "CREATED" and [m["status"] for m in e.get("milestones", [])] == ["CREATED", "CREATED"] \
+            and e.get("agreement_hash") == results[0]["agreement_hash"]:
+        print("PASS: Escrow and milestones stored like a single create.")
+    else:
+        print(f"FAIL: Unexpected escrow {e}")
+
+    logs = requests.get(f"{BASE_URL}/audit-logs", headers=agent, params={"limit": 1000}).json()
+    if any(l["entity_id"] == escrow_id and l["event_type"] == "CREATE" for l in logs):
+        print("PASS: CREATE attestation written to the ledger.")
+    else:
+        print("FAIL: No CREATE attestation for the imported escrow.")
+
+    # 3. CSV upload (two lines grouped by ref -> one escrow with two milestones)
+    print("\n[2] CSV upload...")
+    csv_text = (
+        "ref,buyer_id,provider_id,total_amount,milestone_name,milestone_amount,required_evidence_types\n"
+        "loan-1,csv_buyer,csv_provider,500,Foundation,200,Photo;Invoice\n"
+        "loan-1,csv_buyer,csv_provider,500,Framing,300,Photo\n"
+        "loan-2,csv_buyer,csv_provider,250,,,\n"
+    )
+    res = requests.post(f"{BASE_URL}/escrows/bulk", headers=agent,
+                        files={"file": ("book.csv", csv_text, "text/csv")})
+    results = read_results(res)
+    by_ref = {r["ref"]: r for r in results}
+    if len(results) == 2 and all(r["status"] == "created" for r in results):
+        e = requests.get(f"{BASE_URL}/escrows/{by_ref['loan-1']['id']}", headers=agent).json()
+        if sorted(m["name"] for m in e["milestones"]) == ["Foundation", "Framing"]:
+            print("PASS: CSV rows grouped into escrows by ref.")
+        else:
+            print(f"FAIL: Unexpected milestones {e['milestones']}")
+    else:
+        print(f"FAIL: Unexpected CSV results {results}")
+
+    # 4. Results that stream for longer than the upload stall timeout are not cut off
+    slow_csv = "ref,buyer_id,provider_id,total_amount\n" + "".join(
+        f"slow-{i},csv_buyer,csv_provider,100\n" for i in range(5))
+    try:
+        res = asyncio.run(slow_streamed_import(slow_csv))
+        streamed = read_results(res)
+    except Exception as e:
+        res, streamed = None, f"{type(e).__name__}: {e}"
+    if res is not None and res.status_code == 200 and len(streamed) == 5:
+        print("PASS: Slow multipart import streamed all rows past the stall timeout.")
+    else:
+        print(f"FAIL: Slow import cut off mid-stream: {streamed}")
+
+    # 5. Authorization
+    res = requests.post(f"{BASE_URL}/escrows/bulk", headers=get_auth_headers("rick_contractor", "CONTRACTOR"), json=rows)
+    if res.status_code == 403:
+        print("PASS: Non-agent blocked (403).")
+    else:
+        print(f"FAIL: Expected 403, got {res.status_code}")
+
+    # 6. Throughput
+    print(f"\n[3] Throughput ({BULK_ESCROWS} escrows x 3 milestones)...")
+    book = [
+        {"buyer_id": f"buyer_{i}", "provider_id": "bulk_provider", "total_amount": 3000,
+         "milestones": [{"name": f"Phase {p}", "amount": 1000, "required_evidence_types": ["Invoice"]} for p in range(3)]}
+        for i in range(BULK_ESCROWS)
+    ]
+    started = time.time()
+    res = requests.post(f"{BASE_URL}/escrows/bulk", headers=agent, json=book)
+    results = read_results(res)
+    elapsed = time.time() - started
+    created = sum(1 for r in results if r["status"] == "created")
+    rate = created / elapsed * 60
+    print(f"Imported {created} in {elapsed:.2f}s -> {rate:,.0f} escrows/min")
+    if created == BULK_ESCROWS and rate >= TARGET_PER_MINUTE:
+        print(f"PASS: >= {TARGET_PER_MINUTE:,} escrows/min.")
+    else:
+        print(f"FAIL: Expected {BULK_ESCROWS} created at >= {TARGET_PER_MINUTE:,}/min")
+
+    # 7. Batched attestations share a timestamp; the ledger must still list as one unbroken chain
+    logs = requests.get(f"{BASE_URL}/audit-logs", headers=agent, params={"limit": BULK_ESCROWS + 10}).json()
+    broken = [i for i in range(len(logs) - 1) if logs[i]["previous_hash"] != logs[i + 1]["current_hash"]]
+    if not broken and len(logs) > BULK_ESCROWS:
+        print(f"PASS: Latest {len(logs)} ledger entries form one hash chain.")
+    else:
+        print(f"FAIL: Ledger chain broken at positions {broken[:5]}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_bulk_import()
@@ -0,0 +1,66 @@
+import requests
+
+# Configuration
+BASE_URL = "http://localhost:8000"
+
+def get_token(username, password):
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"Failed to login {username}: {response.text}")
+        return None
+    return response.json()["access_token"]
+
+def check_304(label, url, headers):
+    res = requests.get(url, headers=headers)
+    etag = res.headers.get("ETag")
+    if res.status_code != 200 or not etag:
+        print(f"FAIL: {label} returned {res.status_code} without ETag")
+        return None
+    res = requests.get(url, headers={**headers, "If-None-Match": etag})
+    if res.status_code == 304 and not res.content:
+        print(f"PASS: {label} revalidates with empty 304.")
+    else:
+        print(f"FAIL: {label} expected 304, got {res.status_code}")
+    return etag
+
+def main():
+    print("--- Starting Conditional GET Verification ---")
+    agent = {"Authorization": f"Bearer {get_token('alice_agent', 'password123')}"}
+    custodian = {"Authorization": f"Bearer {get_token('title_co', 'password123')}"}
+
+    print("\n[1] Creating Escrow...")
+    escrow_data = {
+        "buyer_id": "alice_buyer",
+        "provider_id": "rick_contractor",
+        "total_amount": 1000.0,
+        "milestones": [{"name": "M1", "amount": 1000.0, "required_evidence_types": ["PHOTO"]}]
+    }
+    escrow_id = requests.post(f"{BASE_URL}/escrows", json=escrow_data, headers=agent).json()["id"]
+
+    print("\n[2] Escrow detail...")
+    etag = check_304("GET /escrows/{id}", f"{BASE_URL}/escrows/{escrow_id}", agent)
+
+    print("\n[3] Mutation invalidates ETag...")
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", json={"confirmation_code": "WIRE", "custodian_id": "title_co"}, headers=custodian)
+    res = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers={**agent, "If-None-Match": etag})
+    if res.status_code == 200 and res.headers.get("ETag") != etag:
+        print("PASS: Funding produced a fresh ETag and full body.")
+    else:
+        print(f"FAIL: Stale ETag still matched ({res.status_code}).")
+
+    print("\n[4] Notifications...")
+    etag = check_304("GET /notifications", f"{BASE_URL}/notifications", agent)
+    notes = requests.get(f"{BASE_URL}/notifications", headers=agent).json()
+    unread = [n for n in notes if not n["is_read"]]
+    if unread:
+        requests.post(f"{BASE_URL}/notifications/{unread[0]['_id']}/read", headers=agent)
+        res = requests.get(f"{BASE_URL}/notifications", headers={**agent, "If-None-Match": etag})
+        if res.status_code == 200:
+            print("PASS: Mark-read bumps the watermark.")
+        else:
+            print(f"FAIL: Expected 200 after mark-read, got {res.status_code}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import requests
+import sys
+import os
+import hashlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+AGENT = get_auth_headers("alice_agent", "AGENT")
+CONTRACTOR = get_auth_headers("rick_contractor", "CONTRACTOR")
+INSPECTOR = get_auth_headers("rob_inspector", "INSPECTOR")
+CUSTODIAN = get_auth_headers("title_co", "CUSTODIAN")
+
+def local(url):
+    # Pre-signed URLs point at PUBLIC_BASE_URL (or the bucket); the local backend serves them here
+    return url.replace("http://localhost:8000", BASE_URL)
+
+def start(milestone_id, content, filename="photo.jpg", headers=CONTRACTOR, **extra):
+    return requests.post(f"{BASE_URL}/milestones/{milestone_id}/direct-uploads", headers=headers, json={
+        "filename": filename, "size_bytes": len(content), "source_type": "PHOTO", "evidence_type": "Photo",
+        "sha256": hashlib.sha256(content).hexdigest(), **extra
+    })
+
+def send(direct, content):
+    presigned = direct["upload"]
+    return requests.request(presigned["method"], local(presigned["url"]), data=content, headers=presigned["headers"])
+
+def verify_direct_uploads():
+    print("--- Verifying Storage Backend and Direct Uploads ---")
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": 1000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Photo"]}]
+    })
+    escrow_id = res.json()["id"]
+    milestone_id = res.json()["milestones"][0]["id"]
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+
+    # 1. Direct upload round trip
+    print("\n[1] Pre-signed upload...")
+    content = b"\xff\xd8\xff\xe0 site photo " + os.urandom(64 * 1024)
+    direct = start(milestone_id, content).json()
+    if direct.get("upload") and not direct["already_stored"]:
+        print(f"PASS: Pre-signed {direct['upload']['method']} issued.")
+    else:
+        print(f"FAIL: Expected a pre-signed request, got {direct}")
+        return
+
+    res = requests.post(local(direct["complete_url"]), headers=CONTRACTOR)
+    if res.status_code == 409:
+        print("PASS: Completion before the upload refused (409).")
+    else:
+        print(f"FAIL: Expected 409, got {res.status_code}")
+    res = requests.put(f"{BASE_URL}/upload-sessions/{direct['session_id']}/chunks/0", data=content,
+                       headers={**CONTRACTOR, "Content-Type": "application/octet-stream"})
+    if res.status_code == 409:
+        print("PASS: Direct session does not accept chunks (409).")
+    else:
+        print(f"FAIL: Expected 409, got {res.status_code}")
+
+    tampered = requests.request("PUT", local(direct["upload"]["url"]).replace("signature=", "signature=0"), data=content)
+    wrong = send(direct, content[:-1] + b"!")
+    if tampered.status_code == 403 and wrong.status_code == 400:
+        print("PASS: Bad signature (403) and mismatching bytes (400) rejected.")
+    else:
+        print(f"FAIL: Expected 403/400, got {tampered.status_code}/{wrong.status_code}")
+
+    res = send(direct, content)
+    if res.status_code in (200, 204):
+        print("PASS: File uploaded to storage.")
+    else:
+        print(f"FAIL: Upload returned {res.status_code} {res.text[:200]}")
+
+    res = requests.post(local(direct["complete_url"]), headers=CONTRACTOR)
+    evidence = res.json()
+    if res.status_code == 200 and evidence.get("sha256") == hashlib.sha256(content).hexdigest():
+        print("PASS: Evidence recorded with the attested hash.")
+    else:
+        print(f"FAIL: Completion returned {res.status_code} {res.text[:200]}")
+        return
+
+    logs = requests.get(f"{BASE_URL}/audit-logs", headers=AGENT, params={"limit": 20}).json()
+    if any(l["entity_id"] == escrow_id and l["event_type"] == "UPLOAD_EVIDENCE"
+           and l["event_data"].get("sha256") == evidence["sha256"] for l in logs):
+        print("PASS: UPLOAD_EVIDENCE attestation written.")
+    else:
+        print("FAIL: No UPLOAD_EVIDENCE attestation with the hash.")
+
+    # 2. Downloads redirect to storage
+    print("\n[2] Download redirect...")
+    res = requests.get(local(evidence["url"]), allow_redirects=False)
+    if "/evidence/" in evidence["url"] and res.status_code == 307 and evidence["sha256"] in res.headers.get("Location", ""):
+        print("PASS: Evidence URL redirects to the stored blob.")
+    else:
+        print(f"FAIL: Unexpected redirect {res.status_code} {res.headers.get('Location')}")
+    res = requests.get(local(evidence["url"]))
+    if res.content == content:
+        print("PASS: Downloaded bytes match the upload.")
+    else:
+        print("FAIL: Downloaded bytes differ.")
+    res = requests.get(f"{BASE_URL}/evidence/does-not-exist/download", allow_redirects=False)
+    if res.status_code == 404:
+        print("PASS: Unknown evidence 404.")
+    else:
+        print(f"FAIL: Expected 404, got {res.status_code}")
+
+    # 3. Known content skips the upload entirely
+    print("\n[3] Already stored content...")
+    again = start(milestone_id, content, filename="same-photo.jpg").json()
+    res = requests.post(local(again["complete_url"]), headers=CONTRACTOR)
+    if again["already_stored"] and again["upload"] is None and res.status_code == 200:
+        print("PASS: Duplicate completed without uploading.")
+    else:
+        print(f"FAIL: Expected already_stored, got {again} / {res.status_code}")
+
+    # 4. On another escrow, knowing the hash (it is in the public ledger) is not enough
+    print("\n[4] Proof of possession...")
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_eve",
+        "provider_id": "rick_contractor",
+        "total_amount": 500,
+        "milestones": [{"name": "Phase 1", "amount": 500, "required_evidence_types": ["Photo"]}]
+    })
+    other_escrow, other_milestone = res.json()["id"], res.json()["milestones"][0]["id"]
+    requests.post(f"{BASE_URL}/escrows/{other_escrow}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+    claim = start(other_milestone, content).json()
+    early = requests.post(local(claim["complete_url"]), headers=CONTRACTOR)
+    if not claim["already_stored"] and claim["upload"] and early.status_code == 409:
+        print("PASS: Known hash on another escrow still requires the upload (409 without it).")
+    else:
+        print(f"FAIL: Expected an upload to be required, got {claim} / {early.status_code}")
+    send(claim, content)
+    res = requests.post(local(claim["complete_url"]), headers=CONTRACTOR)
+    proven = res.json()
+    download = requests.get(local(proven.get("url", "")), allow_redirects=False) if res.status_code == 200 else None
+    if res.status_code == 200 and download is not None and evidence["sha256"] in download.headers.get("Location", "") \
+            and "incoming/" not in download.headers.get("Location", ""):
+        print("PASS: Uploaded copy deduplicated into the existing blob.")
+    else:
+        print(f"FAIL: Unexpected completion {res.status_code} {res.text[:200]}")
+
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/direct-uploads", headers=CONTRACTOR, json={
+        "filename": "photo.jpg", "size_bytes": 10, "source_type": "PHOTO", "evidence_type": "Photo"
+    })
+    if res.status_code == 400:
+        print("PASS: Direct upload without a SHA-256 rejected.")
+    else:
+        print(f"FAIL: Expected 400, got {res.status_code}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_direct_uploads()
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+import database
+import schemas
+from models import Escrow, Milestone, Evidence, EscrowState, MilestoneStatus
+from services import escrow_query_service
+
+ESCROWS = 25
+MILESTONES_PER_ESCROW = 4
+EVIDENCE_PER_MILESTONE = 2
+
+statements = []
+
+def count_statements(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+def verify_eager_loading():
+    print("--- Verifying Escrow Graph Loading (Direct DB) ---")
+    db = database.SessionLocal()
+    created = []
+    try:
+        # 1. Setup
+        print(f"[1] Setup: {ESCROWS} escrows x {MILESTONES_PER_ESCROW} milestones x {EVIDENCE_PER_MILESTONE} evidence...")
+        for i in range(ESCROWS):
+            escrow = Escrow(buyer_id="b", provider_id="p", total_amount=1000.0, state=EscrowState.FUNDED,
+                            version=1, agreement_hash="h", funded_amount=1000.0)
+            db.add(escrow)
+            db.flush()
+            created.append(escrow.id)
+            for m in range(MILESTONES_PER_ESCROW):
+                ms = Milestone(escrow_id=escrow.id, name=f"M{m}", amount=250.0,
+                               required_evidence_types=["PHOTO"], status=MilestoneStatus.PENDING)
+                db.add(ms)
+                db.flush()
+                for _ in range(EVIDENCE_PER_MILESTONE):
+                    db.add(Evidence(milestone_id=ms.id, evidence_type="PHOTO", url="http://x"))
+        db.commit()
+        db.expunge_all()
+
+        # 2. List + serialize, counting SQL statements
+        print("\n[2] Loading + serializing escrow list...")
+        event.listen(database.engine, "before_cursor_execute", count_statements)
+        try:
+            escrows, _ = escrow_query_service.list_escrows(db, 100)
+            payload = [schemas.from_orm(schemas.Escrow, e) for e in escrows]
+        finally:
+            event.remove(database.engine, "before_cursor_execute", count_statements)
+
+        print(f"Serialized {len(payload)} escrows with {len(statements)} queries")
+        if len(statements) <= 3:
+            print("PASS: Fixed number of queries (no N+1).")
+        else:
+            print(f"FAIL: Expected <= 3 queries, got {len(statements)}")
+
+        # 3. Lazy loads on the hot path must raise
+        print("\n[3] Lazy load guard...")
+        db.expunge_all()
+        escrow = escrow_query_service.get_escrow_graph(db, created[0])
+        milestone = escrow.milestones[0]
+        db.expunge(escrow) # parent no longer in the identity map => access would need SQL
+        try:
+            _ = milestone.escrow
+            print("FAIL: Relationship lazily loaded instead of raising.")
+        except InvalidRequestError:
+            print("PASS: Lazy load raised on hot path.")
+    finally:
+        # Cleanup
+        db.rollback()
+        for escrow_id in created:
+            ms_ids = [m.id for m in db.query(Milestone.id).filter(Milestone.escrow_id == escrow_id)]
+            db.query(Evidence).filter(Evidence.milestone_id.in_(ms_ids)).delete(synchronize_session=False)
+            db.query(Milestone).filter(Milestone.escrow_id == escrow_id).delete(synchronize_session=False)
+            db.query(Escrow).filter(Escrow.id == escrow_id).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_eager_loading()
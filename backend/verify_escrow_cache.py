@@ -0,0 +1,114 @@
+import requests
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+AGENT = get_auth_headers("alice_agent", "AGENT")
+CONTRACTOR = get_auth_headers("rick_contractor", "CONTRACTOR")
+INSPECTOR = get_auth_headers("rob_inspector", "INSPECTOR")
+CUSTODIAN = get_auth_headers("title_co", "CUSTODIAN")
+ADMIN = get_auth_headers("admin", "ADMIN")
+
+def cache_stats():
+    return requests.get(f"{BASE_URL}/metrics/escrow-cache", headers=ADMIN).json()
+
+def read(escrow_id):
+    return requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=AGENT)
+
+def check_fresh(label, escrow_id, predicate):
+    """Warm the cache, then confirm the mutation that follows is visible on the next read."""
+    e = read(escrow_id).json()
+    if predicate(e):
+        print(f"PASS: {label} visible after invalidation.")
+    else:
+        print(f"FAIL: Stale escrow after {label}: {e}")
+    return e
+
+def verify_escrow_cache():
+    print("--- Verifying Escrow Detail Cache ---")
+    stats = cache_stats()
+    if not stats.get("enabled"):
+        print("SKIP: Escrow cache disabled (ESCROW_CACHE_MAX_ENTRIES=0).")
+        return
+
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": 1000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Invoice"]}]
+    })
+    escrow_id = res.json()["id"]
+
+    # 1. Fill, then hit
+    print("\n[1] Repeated reads are served from the cache...")
+    first = read(escrow_id)
+    before = cache_stats()
+    reads = [read(escrow_id) for _ in range(20)]
+    after = cache_stats()
+    if after["hits"] - before["hits"] >= 20 and all(r.content == first.content for r in reads):
+        print("PASS: 20 reads served as cache hits with identical bodies.")
+    else:
+        print(f"FAIL: Expected 20 hits, got {after['hits'] - before['hits']}")
+    if all(r.headers.get("ETag") == first.headers.get("ETag") for r in reads):
+        res = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers={**AGENT, "If-None-Match": first.headers["ETag"]})
+        if res.status_code == 304:
+            print("PASS: Cached ETag revalidates with 304.")
+        else:
+            print(f"FAIL: Expected 304 from cached ETag, got {res.status_code}")
+
+    # 2. Every mutation path invalidates
+    print("\n[2] Mutations invalidate the cached graph...")
+    read(escrow_id)
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+    e = check_fresh("Funding", escrow_id, lambda e: e["state"] == "FUNDED")
+    milestone_id = e["milestones"][0]["id"]
+
+    requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence", headers=CONTRACTOR,
+                  json={"evidence_type": "Invoice", "url": "http://example.com/invoice.pdf"})
+    check_fresh("Evidence", escrow_id, lambda e: len(e["milestones"][0]["evidence"]) == 1
+                and e["milestones"][0]["status"] == "EVIDENCE_SUBMITTED")
+
+    requests.post(f"{BASE_URL}/milestones/{milestone_id}/approve", headers=INSPECTOR,
+                  json={"approver_id": "rob_inspector", "signature": "sig"})
+    check_fresh("Approval", escrow_id, lambda e: e["milestones"][0]["status"] == "PAID")
+
+    before = cache_stats()["invalidations"]
+    instructions = requests.get(f"{BASE_URL}/escrows/{escrow_id}/payment-instructions", headers=AGENT).json()
+    if instructions:
+        requests.post(f"{BASE_URL}/payment-instructions/{instructions[0]['id']}/mark-sent", headers=CUSTODIAN)
+        if cache_stats()["invalidations"] > before:
+            print("PASS: Payment status change invalidated the escrow.")
+        else:
+            print("FAIL: Payment status change left the cached escrow in place.")
+    else:
+        print("FAIL: No payment instruction generated on approval.")
+
+    read(escrow_id)
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/change-budget", headers=AGENT,
+                  json={"amount_delta": 500, "milestone_name": "Extra", "evidence_type": "Invoice"})
+    check_fresh("Change order", escrow_id, lambda e: e["total_amount"] == 1500 and len(e["milestones"]) == 2)
+
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/dispute", headers=AGENT)
+    check_fresh("Dispute", escrow_id, lambda e: e["is_disputed"] or e["state"] in ("DISPUTED", "HALTED"))
+
+    # 3. Unknown ids are not cached
+    res = requests.get(f"{BASE_URL}/escrows/does-not-exist", headers=AGENT)
+    if res.status_code == 404:
+        print("PASS: Missing escrow still 404.")
+    else:
+        print(f"FAIL: Expected 404, got {res.status_code}")
+
+    print(f"\nCache: {cache_stats()}")
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_escrow_cache()
@@ -0,0 +1,108 @@
+import requests
+import sys
+import os
+import hashlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+UPLOADS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+AGENT = get_auth_headers("alice_agent", "AGENT")
+CONTRACTOR = get_auth_headers("rick_contractor", "CONTRACTOR")
+INSPECTOR = get_auth_headers("rob_inspector", "INSPECTOR")
+CUSTODIAN = get_auth_headers("title_co", "CUSTODIAN")
+ADMIN = get_auth_headers("admin", "ADMIN")
+
+def blob_stats():
+    return requests.get(f"{BASE_URL}/metrics/evidence-blobs", headers=ADMIN).json()
+
+def upload(milestone_id, filename, content):
+    return requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence/upload", headers=CONTRACTOR,
+                         data={"evidence_type": "Invoice", "source_type": "PDF"},
+                         files={"file": (filename, content, "application/pdf")})
+
+def blob_location(evidence):
+    """Evidence URLs are per-row download links; the redirect target is the stored blob."""
+    url = evidence["url"].replace("http://localhost:8000", BASE_URL)
+    return requests.get(url, allow_redirects=False).headers.get("Location", "")
+
+def local_path(location):
+    return os.path.join(UPLOADS, location.split("/uploads/", 1)[1])
+
+def verify_evidence_dedup():
+    print("--- Verifying Content-Addressed Evidence Store ---")
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": 2000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Invoice"]},
+                       {"name": "Phase 2", "amount": 1000, "required_evidence_types": ["Invoice"]}]
+    })
+    escrow_id = res.json()["id"]
+    first_ms, second_ms = [m["id"] for m in res.json()["milestones"]]
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+
+    content = b"%PDF-1.4 building permit #4411 " + os.urandom(256 * 1024)
+    sha256 = hashlib.sha256(content).hexdigest()
+    before = blob_stats()
+
+    # 1. First upload stores the blob under its hash
+    print("\n[1] First upload...")
+    first = upload(first_ms, "permit.pdf", content).json()
+    location = blob_location(first)
+    path = local_path(location)
+    if sha256 in location and os.path.exists(path):
+        print("PASS: Blob stored under its content hash.")
+    else:
+        print(f"FAIL: Unexpected storage location {location}")
+    written = os.stat(path).st_mtime_ns
+
+    # 2. Same bytes on another milestone (and under another name) reuse it
+    print("\n[2] Re-uploads of the same permit...")
+    second = upload(second_ms, "permit-copy.pdf", content).json()
+    third = upload(first_ms, "scan 2.pdf", content).json()
+    locations = [blob_location(e) for e in (first, second, third)]
+    if len(set(locations)) == 1 and len({first["id"], second["id"], third["id"]}) == 3:
+        print("PASS: Three evidence rows share one blob.")
+    else:
+        print(f"FAIL: Expected a shared blob, got {locations}")
+    if os.stat(path).st_mtime_ns == written:
+        print("PASS: Identical uploads skipped the write.")
+    else:
+        print("FAIL: Blob was rewritten by a duplicate upload.")
+
+    after = blob_stats()
+    if after["blobs"] - before["blobs"] == 1 and after["references"] - before["references"] == 3:
+        print("PASS: One blob, three references.")
+    else:
+        print(f"FAIL: Expected +1 blob / +3 references, got {before} -> {after}")
+    if after["saved_bytes"] - before["saved_bytes"] == 2 * len(content):
+        print(f"PASS: Deduplication saved {2 * len(content)} bytes.")
+    else:
+        print(f"FAIL: Unexpected savings {before['saved_bytes']} -> {after['saved_bytes']}")
+
+    # 3. Different content gets its own blob
+    other = upload(second_ms, "permit.pdf", content + b"\n%%EOF").json()
+    if blob_location(other) != location and other["sha256"] != sha256:
+        print("PASS: Different content stored separately.")
+    else:
+        print("FAIL: Different content collided with the existing blob.")
+
+    # 4. Tamper evidence: the stored bytes still hash to the blob name
+    with open(path, "rb") as f:
+        if hashlib.sha256(f.read()).hexdigest() == os.path.basename(path).split(".")[0]:
+            print("PASS: Blob content matches its name.")
+        else:
+            print("FAIL: Blob content does not match its name.")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_evidence_dedup()
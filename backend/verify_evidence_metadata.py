@@ -0,0 +1,183 @@
+import requests
+import sys
+import os
+import io
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+AGENT = get_auth_headers("alice_agent", "AGENT")
+CONTRACTOR = get_auth_headers("rick_contractor", "CONTRACTOR")
+INSPECTOR = get_auth_headers("rob_inspector", "INSPECTOR")
+CUSTODIAN = get_auth_headers("title_co", "CUSTODIAN")
+ADMIN = get_auth_headers("admin", "ADMIN")
+
+SITE = (40.4461944, -79.9822222) # the job site the photo is tagged with
+
+def geotagged_photo():
+    from PIL import Image
+    exif = Image.Exif()
+    exif[0x010F], exif[0x0110] = "Acme", "FieldCam 2"
+    exif_ifd = exif.get_ifd(0x8769)
+    exif_ifd[0x9003], exif_ifd[0x9011] = "2026:03:14 09:30:00", "-05:00" # DateTimeOriginal, OffsetTimeOriginal
+    gps = exif.get_ifd(0x8825)
+    gps[1], gps[2] = "N", (40.0, 26.0, 46.3)
+    gps[3], gps[4] = "W", (79.0, 58.0, 56.0)
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480), (120, 90, 60)).save(buf, "JPEG", exif=exif, comment=os.urandom(8))
+    return buf.getvalue()
+
+def camera_local_photo():
+    # DateTimeOriginal only: no offset and no GPS clock, so the zone is unknown
+    from PIL import Image
+    exif = Image.Exif()
+    exif.get_ifd(0x8769)[0x9003] = "2026:03:10 08:00:00"
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480), (90, 120, 60)).save(buf, "JPEG", exif=exif, comment=os.urandom(8))
+    return buf.getvalue()
+
+def plain_photo():
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480), (60, 90, 120)).save(buf, "JPEG", comment=os.urandom(8))
+    return buf.getvalue()
+
+def typed_pdf():
+    import pymupdf
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), f"City of Pittsburgh - Inspection Card {os.urandom(4).hex()}")
+    return doc.tobytes()
+
+def scanned_pdf(pages=3):
+    import pymupdf
+    doc = pymupdf.open()
+    for _ in range(pages):
+        doc.new_page().draw_rect(pymupdf.Rect(72, 72, 300, 300), color=(0, 0, 0), fill=(0.5, 0.5, 0.5))
+    doc.set_metadata({"title": os.urandom(4).hex()})
+    return doc.tobytes()
+
+def upload(milestone_id, evidence_type, filename, content, mime):
+    return requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence/upload", headers=CONTRACTOR,
+                         data={"evidence_type": evidence_type, "source_type": "PDF" if mime == "application/pdf" else "PHOTO"},
+                         files={"file": (filename, content, mime)})
+
+def search(escrow_id, **params):
+    return requests.get(f"{BASE_URL}/escrows/{escrow_id}/evidence", headers=INSPECTOR, params=params)
+
+def ids(res):
+    return {e["id"] for e in res.json()}
+
+def wait_idle(timeout=60):
+    deadline = time.time() + timeout
+    while requests.get(f"{BASE_URL}/metrics/evidence-pool", headers=ADMIN).json()["pending"] and time.time() < deadline:
+        time.sleep(0.25)
+
+def verify_evidence_metadata():
+    print("--- Verifying Evidence Metadata Extraction ---")
+    libraries = requests.get(f"{BASE_URL}/metrics/evidence-pool", headers=ADMIN).json()["libraries"]
+    if not (libraries["image"] and libraries["pdf"]):
+        print(f"SKIP: Pillow and PyMuPDF are needed to extract metadata (available: {libraries})")
+        return
+
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": 2000,
+        "milestones": [{"name": "Framing", "amount": 1000, "required_evidence_types": ["Geotagged Photo", "Inspection Card"]},
+                       {"name": "Drywall", "amount": 1000, "required_evidence_types": ["Geotagged Photo"]}]
+    })
+    escrow_id = res.json()["id"]
+    first_ms, second_ms = [m["id"] for m in res.json()["milestones"]]
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+
+    # 1. Uploads return at once; extraction fills the columns in the background
+    print("\n[1] Extraction...")
+    photo = geotagged_photo()
+    tagged = upload(first_ms, "Geotagged Photo", "site.jpg", photo, "image/jpeg").json()
+    untagged = upload(second_ms, "Geotagged Photo", "selfie.jpg", plain_photo(), "image/jpeg").json()
+    local = upload(first_ms, "Geotagged Photo", "phone.jpg", camera_local_photo(), "image/jpeg").json()
+    typed = upload(first_ms, "Inspection Card", "card.pdf", typed_pdf(), "application/pdf").json()
+    scanned = upload(first_ms, "Inspection Card", "card-scan.pdf", scanned_pdf(), "application/pdf").json()
+    if tagged.get("captured_at") is None and tagged.get("gps_latitude") is None:
+        print("PASS: Upload returned before extraction.")
+    else:
+        print(f"FAIL: Upload response already had metadata: {tagged}")
+
+    wait_idle()
+    rows = {e["id"]: e for e in search(escrow_id).json()}
+    photo_row = rows[tagged["id"]]
+    if (photo_row["captured_at"] or "").startswith("2026-03-14T14:30:00") and photo_row["captured_at_utc"] is True \
+            and abs(photo_row["gps_latitude"] - SITE[0]) < 1e-5 and abs(photo_row["gps_longitude"] - SITE[1]) < 1e-5:
+        print("PASS: EXIF capture time (UTC) and GPS position extracted.")
+    else:
+        print(f"FAIL: Unexpected photo metadata {photo_row}")
+    local_row = rows[local["id"]]
+    if (local_row["captured_at"] or "").startswith("2026-03-10T08:00:00") and local_row["captured_at_utc"] is False:
+        print("PASS: Capture time without an offset kept as camera-local time and flagged as such.")
+    else:
+        print(f"FAIL: Unexpected camera-local metadata {local_row}")
+    if rows[typed["id"]]["page_count"] == 1 and rows[typed["id"]]["has_text"] is True \
+            and rows[scanned["id"]]["page_count"] == 3 and rows[scanned["id"]]["has_text"] is False:
+        print("PASS: PDF page counts and text presence extracted.")
+    else:
+        print(f"FAIL: Unexpected PDF metadata {rows[typed['id']]} / {rows[scanned['id']]}")
+    if rows[untagged["id"]]["gps_latitude"] is None and rows[untagged["id"]]["captured_at"] is None:
+        print("PASS: Photo without EXIF has no geotag.")
+    else:
+        print(f"FAIL: Unexpected metadata on a plain photo {rows[untagged['id']]}")
+
+    # 2. Query by metadata
+    print("\n[2] Filters...")
+    if ids(search(escrow_id, geotagged="true")) == {tagged["id"]} and tagged["id"] not in ids(search(escrow_id, geotagged="false")):
+        print("PASS: geotagged filter.")
+    else:
+        print("FAIL: geotagged filter returned the wrong rows.")
+    near = search(escrow_id, near_lat=SITE[0] + 0.001, near_lon=SITE[1], radius_m=250).json()
+    far = search(escrow_id, near_lat=40.7128, near_lon=-74.0060, radius_m=5000).json()
+    if [e["id"] for e in near] == [tagged["id"]] and 100 < near[0]["distance_m"] < 125 and far == []:
+        print(f"PASS: Photo found {near[0]['distance_m']} m from the site, not near another city.")
+    else:
+        print(f"FAIL: Unexpected proximity results {near} / {far}")
+    after = ids(search(escrow_id, captured_after="2026-03-14T14:00:00Z"))
+    before = ids(search(escrow_id, captured_after="2026-03-14T09:35:00-05:00"))
+    if after == {tagged["id"]} and before == set():
+        print("PASS: captured_after honours time zones.")
+    else:
+        print(f"FAIL: Unexpected capture-time results {after} / {before}")
+    if ids(search(escrow_id, has_text="true")) == {typed["id"]} and ids(search(escrow_id, min_pages=2)) == {scanned["id"]}:
+        print("PASS: has_text and min_pages filters.")
+    else:
+        print("FAIL: PDF filters returned the wrong rows.")
+    if ids(search(escrow_id, milestone_id=second_ms, source_type="PHOTO")) == {untagged["id"]}:
+        print("PASS: milestone and source type filters.")
+    else:
+        print("FAIL: milestone / source type filters returned the wrong rows.")
+    bad = search(escrow_id, near_lat=SITE[0], near_lon=SITE[1])
+    missing = search("no-such-escrow")
+    if bad.status_code == 400 and missing.status_code == 404:
+        print("PASS: Incomplete proximity filter (400) and unknown escrow (404) rejected.")
+    else:
+        print(f"FAIL: Expected 400/404, got {bad.status_code}/{missing.status_code}")
+
+    # 3. Duplicate content reuses the extraction, and the escrow graph carries it
+    print("\n[3] Reuse...")
+    again = upload(second_ms, "Geotagged Photo", "site-again.jpg", photo, "image/jpeg").json()
+    escrow = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=AGENT).json()
+    graph = {e["id"]: e for m in escrow["milestones"] for e in m["evidence"]}
+    if again.get("gps_latitude") == photo_row["gps_latitude"] and graph[tagged["id"]]["gps_latitude"] == photo_row["gps_latitude"]:
+        print("PASS: Re-uploaded photo has its metadata immediately; escrow detail includes it.")
+    else:
+        print(f"FAIL: Unexpected reuse {again.get('gps_latitude')} / {graph.get(tagged['id'])}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_evidence_metadata()
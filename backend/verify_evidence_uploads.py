@@ -0,0 +1,160 @@
+import requests
+import sys
+import os
+import asyncio
+import hashlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+from fastapi import HTTPException
+from services import evidence_service
+
+BASE_URL = "http://localhost:8000"
+UPLOADS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+AGENT = get_auth_headers("alice_agent", "AGENT")
+CONTRACTOR = get_auth_headers("rick_contractor", "CONTRACTOR")
+INSPECTOR = get_auth_headers("rob_inspector", "INSPECTOR")
+CUSTODIAN = get_auth_headers("title_co", "CUSTODIAN")
+
+def ledger_entry(escrow_id, event_type):
+    logs = requests.get(f"{BASE_URL}/audit-logs", headers=AGENT, params={"limit": 20}).json()
+    return next((l for l in logs if l["entity_id"] == escrow_id and l["event_type"] == event_type), None)
+
+def upload_count():
+    # previews/ is written by background renders of earlier uploads, whenever they finish
+    return len([n for n in os.listdir(UPLOADS) if n != "previews"]) if os.path.isdir(UPLOADS) else 0
+
+def check_hashed(label, res, content, escrow_id, event_type):
+    expected = hashlib.sha256(content).hexdigest()
+    if res.status_code != 200:
+        print(f"FAIL: {label} upload returned {res.status_code} {res.text}")
+        return
+    ev = res.json()
+    if ev.get("sha256") == expected and ev.get("size_bytes") == len(content):
+        print(f"PASS: {label} evidence carries the content SHA-256 and size.")
+    else:
+        print(f"FAIL: {label} expected sha256={expected}, got {ev.get('sha256')} / {ev.get('size_bytes')}")
+    entry = ledger_entry(escrow_id, event_type)
+    if entry and entry["event_data"].get("sha256") == expected:
+        print(f"PASS: {event_type} attestation records the SHA-256.")
+    else:
+        print(f"FAIL: {event_type} attestation missing the hash: {entry}")
+    stored = requests.get(ev["url"].replace("http://localhost:8000", BASE_URL))
+    if stored.status_code == 200 and hashlib.sha256(stored.content).hexdigest() == expected:
+        print(f"PASS: {label} stored file matches its hash.")
+    else:
+        print(f"FAIL: {label} stored file differs ({stored.status_code}).")
+
+async def drive(middleware, chunks, delay=0.0, headers=()):
+    """Feeds a multipart body to the middleware chunk by chunk; returns what the app saw or the error."""
+    seen = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            seen.append(len(message.get("body", b"")))
+            if not message.get("more_body"):
+                return
+
+    async def receive():
+        if delay:
+            await asyncio.sleep(delay)
+        body = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": body, "more_body": bool(chunks)}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"content-type", b"multipart/form-data; boundary=x"), *headers]}
+    try:
+        await middleware(app, max_body_bytes=1000, stall_timeout=0.2)(scope, receive, send)
+    except HTTPException as e:
+        return e.status_code, seen, sent
+    return None, seen, sent
+
+def verify_evidence_uploads():
+    print("--- Verifying Streaming Evidence Uploads ---")
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": 1000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Photo"]}]
+    })
+    escrow_id = res.json()["id"]
+    milestone_id = res.json()["milestones"][0]["id"]
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+
+    # 1. Multi-chunk file: hash computed while streaming matches the content
+    print("\n[1] Contractor upload (multi-chunk)...")
+    content = os.urandom(evidence_service.EVIDENCE_CHUNK_BYTES * 2 + 12345)
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence/upload", headers=CONTRACTOR,
+                        data={"evidence_type": "Photo", "source_type": "PHOTO"},
+                        files={"file": ("site.jpg", content, "image/jpeg")})
+    check_hashed("Contractor", res, content, escrow_id, "UPLOAD_EVIDENCE")
+
+    print("\n[2] Third-party upload...")
+    content = b"%PDF-1.4 inspection report " + os.urandom(4096)
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/external-evidence", headers=INSPECTOR,
+                        data={"source_type": "PDF"}, files={"file": ("report.pdf", content, "application/pdf")})
+    check_hashed("External", res, content, escrow_id, "EVIDENCE_ATTESTED")
+
+    e = requests.get(f"{BASE_URL}/escrows", headers=AGENT, params={"limit": 5}).json()
+    listed = [ev for x in e if x["id"] == escrow_id for m in x["milestones"] for ev in m["evidence"]]
+    if len(listed) == 2 and all(ev.get("sha256") for ev in listed):
+        print("PASS: Escrow list exposes the evidence hashes.")
+    else:
+        print(f"FAIL: Expected 2 hashed evidence rows in the list, got {listed}")
+
+    # 2. Rejections leave nothing behind
+    print("\n[3] Oversized and rejected uploads...")
+    before = upload_count()
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence/upload", headers=CONTRACTOR,
+                        data={"evidence_type": "Photo", "source_type": "PHOTO"},
+                        files={"file": ("huge.jpg", b"\0" * (evidence_service.EVIDENCE_MAX_BYTES + 1), "image/jpeg")})
+    if res.status_code == 413:
+        print("PASS: Oversized upload rejected (413).")
+    else:
+        print(f"FAIL: Expected 413, got {res.status_code}")
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence/upload", headers=CONTRACTOR,
+                        data={"evidence_type": "Photo", "source_type": "PHOTO"},
+                        files={"file": ("script.exe", b"MZ", "application/octet-stream")})
+    if res.status_code == 400:
+        print("PASS: Disallowed file type rejected (400).")
+    else:
+        print(f"FAIL: Expected 400, got {res.status_code}")
+    if upload_count() == before:
+        print("PASS: No partial files left in uploads/.")
+    else:
+        print(f"FAIL: uploads/ grew from {before} to {upload_count()} files.")
+
+    # 3. Middleware: stops reading mid-body (no Content-Length) and on stalls
+    print("\n[4] Body limits enforced while the body is arriving...")
+    status, seen, _ = asyncio.run(drive(evidence_service.UploadLimitMiddleware, [b"x" * 400] * 10))
+    if status == 413 and len(seen) <= 2:
+        print(f"PASS: Streaming body cut off after {len(seen)} chunks (413).")
+    else:
+        print(f"FAIL: Expected 413 within 3 chunks, got {status} after {len(seen)}")
+    _, seen, sent = asyncio.run(drive(evidence_service.UploadLimitMiddleware, [b"x"],
+                                      headers=[(b"content-length", b"5000000")]))
+    if not seen and sent and sent[0]["status"] == 413:
+        print("PASS: Declared oversize rejected before reading the body.")
+    else:
+        print(f"FAIL: Expected an immediate 413, app read {seen}")
+    status, _, _ = asyncio.run(drive(evidence_service.UploadLimitMiddleware, [b"x"] * 3, delay=0.5))
+    if status == 408:
+        print("PASS: Stalled upload aborted (408).")
+    else:
+        print(f"FAIL: Expected 408, got {status}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_evidence_uploads()
@@ -0,0 +1,61 @@
+import requests
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+CONCURRENT_CHANGES = 10
+DELTA = 100
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+def change_budget(escrow_id, i):
+    return requests.post(
+        f"{BASE_URL}/escrows/{escrow_id}/change-budget",
+        headers=get_auth_headers("alice_agent", "AGENT"),
+        json={"amount_delta": DELTA, "milestone_name": f"Concurrent CO {i}", "evidence_type": "Invoice"}
+    )
+
+def verify_optimistic_locking():
+    print("--- Verifying Optimistic Locking (No Lost Updates) ---")
+    res = requests.post(f"{BASE_URL}/escrows", headers=get_auth_headers("alice_agent", "AGENT"), json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "provider_pat",
+        "total_amount": 1000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Invoice"]}]
+    })
+    escrow = res.json()
+    escrow_id = escrow["id"]
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=get_auth_headers("title_co", "CUSTODIAN"),
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+
+    print(f"\n[1] Firing {CONCURRENT_CHANGES} concurrent budget changes (+{DELTA} each)...")
+    with ThreadPoolExecutor(max_workers=CONCURRENT_CHANGES) as pool:
+        results = list(pool.map(lambda i: change_budget(escrow_id, i), range(CONCURRENT_CHANGES)))
+    succeeded = sum(1 for r in results if r.status_code == 200)
+    conflicts = sum(1 for r in results if r.status_code == 409)
+    print(f"Succeeded: {succeeded}, 409 after retries: {conflicts}")
+
+    e = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=get_auth_headers("alice_agent", "AGENT")).json()
+    expected_total = 1000 + succeeded * DELTA
+    expected_milestones = 1 + succeeded
+    print(f"Total: {e['total_amount']} (expected {expected_total}), version: {e['version']}")
+    if e["total_amount"] == expected_total and len(e["milestones"]) == expected_milestones:
+        print("PASS: Every acknowledged change is reflected (no lost updates).")
+    else:
+        print("FAIL: Lost update detected.")
+
+    if succeeded + conflicts == CONCURRENT_CHANGES:
+        print("PASS: Every request either applied or answered 409.")
+    else:
+        print(f"FAIL: Unexpected statuses {[r.status_code for r in results]}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_optimistic_locking()
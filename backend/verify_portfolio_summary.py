@@ -0,0 +1,154 @@
+import requests
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+import models
+import database
+
+BASE_URL = "http://localhost:8000"
+ORG = "org_1"
+
+def seed_users():
+    # /summary is per organization: the agent and the custodian both need one
+    db = database.SessionLocal()
+    for username, role in [("alice_agent", "AGENT"), ("title_co", "CUSTODIAN"),
+                           ("rick_contractor", "CONTRACTOR"), ("rob_inspector", "INSPECTOR")]:
+        user = db.query(models.User).filter(models.User.username == username).first()
+        if not user:
+            db.add(models.User(username=username, role=role, organization_id=ORG,
+                               hashed_password=auth.get_password_hash("password123")))
+        elif role in ("AGENT", "CUSTODIAN") and user.organization_id is None:
+            user.organization_id = ORG
+    db.commit()
+    db.close()
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+def recomputed(role):
+    """The summary row for ORG in role, aggregated straight from the escrows and milestones tables."""
+    db = database.SessionLocal()
+    try:
+        owner = models.Escrow.organization_id if role == "AGENT" else models.Escrow.custodian_organization_id
+        escrows = db.query(models.Escrow).filter(owner == ORG).all()
+        awaiting = db.query(models.Milestone).join(models.Escrow, models.Escrow.id == models.Milestone.escrow_id).filter(
+            owner == ORG, models.Milestone.status == models.MilestoneStatus.EVIDENCE_SUBMITTED
+        ).count()
+    finally:
+        db.close()
+    expected = {
+        "escrow_count": len(escrows),
+        "total_amount": sum(e.total_amount or 0.0 for e in escrows),
+        "funded_amount": sum(e.funded_amount or 0.0 for e in escrows),
+        "outstanding_delta": sum(max((e.total_amount or 0.0) - (e.funded_amount or 0.0), 0.0) for e in escrows
+                                 if e.state in (models.EscrowState.FUNDED, models.EscrowState.ACTIVE)),
+        "milestones_awaiting_inspection": awaiting
+    }
+    for state in models.EscrowState:
+        expected[f"escrows_{state.value.lower()}"] = sum(1 for e in escrows if e.state == state)
+    return expected
+
+def check(step, headers_by_role):
+    mismatches = {}
+    for role, headers in headers_by_role.items():
+        summary = requests.get(f"{BASE_URL}/summary", headers=headers).json()
+        for field, value in recomputed(role).items():
+            if field in summary and abs(summary[field] - value) > 1e-6:
+                mismatches[f"{role}.{field}"] = (summary[field], value)
+    if mismatches:
+        print(f"FAIL: {step}: /summary != recomputed (got, expected) {mismatches}")
+    else:
+        print(f"PASS: {step}: /summary matches the escrows table.")
+
+def create_escrow(headers, amount, milestones):
+    return requests.post(f"{BASE_URL}/escrows", headers=headers, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": amount,
+        "milestones": milestones
+    }).json()
+
+def verify_portfolio_summary():
+    print("--- Verifying Portfolio Summary ---")
+    seed_users()
+    agent = get_auth_headers("alice_agent", "AGENT")
+    custodian = get_auth_headers("title_co", "CUSTODIAN")
+    contractor = get_auth_headers("rick_contractor", "CONTRACTOR")
+    both = {"AGENT": agent, "CUSTODIAN": custodian}
+    funds = {"custodian_id": "title_co", "confirmation_code": "WIRE_123"}
+
+    requests.post(f"{BASE_URL}/reset", headers=agent)
+    check("After reset", both)
+
+    # 1. Creates (single and bulk) count towards the agent's organization
+    print("\n[1] Create...")
+    first = create_escrow(agent, 2000, [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Invoice"]},
+                                        {"name": "Phase 2", "amount": 1000, "required_evidence_types": ["Invoice"]}])
+    second = create_escrow(agent, 500, [{"name": "Only", "amount": 500, "required_evidence_types": ["Invoice"]}])
+    check("Create", both)
+    res = requests.post(f"{BASE_URL}/escrows/bulk", headers=agent, json=[
+        {"buyer_id": f"bulk_buyer_{i}", "provider_id": "rick_contractor", "total_amount": 300,
+         "milestones": [{"name": "Phase 1", "amount": 300, "required_evidence_types": ["Invoice"]}]}
+        for i in range(3)
+    ])
+    if res.status_code == 200:
+        check("Bulk import", both)
+    else:
+        print(f"FAIL: Bulk import returned {res.status_code}")
+
+    # 2. Funding moves the escrow into the custodian's organization too
+    print("\n[2] Funding...")
+    requests.post(f"{BASE_URL}/escrows/{first['id']}/confirm_funds", headers=custodian, json=funds)
+    requests.post(f"{BASE_URL}/escrows/{second['id']}/confirm_funds", headers=custodian, json=funds)
+    check("Initial funding", both)
+
+    # 3. Milestone status changes (evidence submitted -> awaiting inspection -> paid)
+    print("\n[3] State changes...")
+    milestone_id = first["milestones"][0]["id"]
+    requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence", headers=contractor,
+                  json={"evidence_type": "Invoice", "url": "http://example.com/invoice.pdf"})
+    check("Evidence submitted", both)
+    requests.post(f"{BASE_URL}/milestones/{milestone_id}/approve", headers=get_auth_headers("rob_inspector", "INSPECTOR"),
+                  json={"approver_id": "rob_inspector", "signature": "sig"})
+    check("Milestone approved", both)
+    requests.post(f"{BASE_URL}/escrows/{second['id']}/dispute", headers=agent)
+    check("Escrow disputed", both)
+
+    # 4. Budget changes open an outstanding delta until it is funded
+    print("\n[4] Budget changes...")
+    res = requests.post(f"{BASE_URL}/escrows/{first['id']}/change-budget", headers=agent,
+                        json={"amount_delta": 750, "milestone_name": "Extra Work"})
+    summary = requests.get(f"{BASE_URL}/summary", headers=custodian).json()
+    if res.status_code == 200 and summary["outstanding_delta"] == 750:
+        print("PASS: Change order shows 750 of outstanding delta funding.")
+    else:
+        print(f"FAIL: Expected outstanding_delta 750, got {res.status_code} / {summary}")
+    check("Budget change", both)
+    requests.post(f"{BASE_URL}/escrows/{first['id']}/confirm_funds", headers=custodian, json=funds)
+    check("Delta funding", both)
+
+    # 5. Templates add milestones to an existing escrow
+    templates = requests.get(f"{BASE_URL}/templates").json()
+    if templates:
+        third = create_escrow(agent, 1000, [])
+        requests.post(f"{BASE_URL}/escrows/{third['id']}/apply-template", headers=agent,
+                      json={"template_id": templates[0]["id"]})
+        check("Template applied", both)
+
+    # 6. Reset wipes escrows with bulk deletes; the summaries must follow
+    print("\n[5] Reset...")
+    requests.post(f"{BASE_URL}/reset", headers=agent)
+    summary = requests.get(f"{BASE_URL}/summary", headers=agent).json()
+    if summary["escrow_count"] == 0 and summary["total_amount"] == 0:
+        print("PASS: Reset cleared the summary.")
+    else:
+        print(f"FAIL: Summary survived the reset: {summary}")
+    check("Reset", both)
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_portfolio_summary()
@@ -0,0 +1,129 @@
+import requests
+import sys
+import os
+import io
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+AGENT = get_auth_headers("alice_agent", "AGENT")
+CONTRACTOR = get_auth_headers("rick_contractor", "CONTRACTOR")
+CUSTODIAN = get_auth_headers("title_co", "CUSTODIAN")
+ADMIN = get_auth_headers("admin", "ADMIN")
+
+def local(url):
+    return url.replace("http://localhost:8000", BASE_URL)
+
+def photo_bytes():
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.effect_noise((2400, 1600), 64).convert("RGB").save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+def pdf_bytes():
+    import pymupdf
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), f"City inspection card {os.urandom(4).hex()}")
+    return doc.tobytes()
+
+def upload(milestone_id, evidence_type, filename, content, mime):
+    return requests.post(f"{BASE_URL}/milestones/{milestone_id}/evidence/upload", headers=CONTRACTOR,
+                         data={"evidence_type": evidence_type, "source_type": "PHOTO" if mime != "application/pdf" else "PDF"},
+                         files={"file": (filename, content, mime)})
+
+def wait_for_previews(escrow_id, count, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        escrow = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=AGENT).json()
+        evidence = [e for m in escrow["milestones"] for e in m["evidence"]]
+        if sum(1 for e in evidence if e.get("preview_url")) >= count:
+            return evidence
+        time.sleep(0.25)
+    return evidence
+
+def verify_previews():
+    print("--- Verifying Evidence Previews ---")
+    renderers = requests.get(f"{BASE_URL}/metrics/evidence-pool", headers=ADMIN).json()["libraries"]
+    if not (renderers["image"] and renderers["pdf"]):
+        print(f"SKIP: Pillow and PyMuPDF are needed to render previews (available: {renderers})")
+        return
+
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": 2000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Photo", "Inspection Card"]},
+                       {"name": "Phase 2", "amount": 1000, "required_evidence_types": ["Photo"]}]
+    })
+    escrow_id = res.json()["id"]
+    first_ms, second_ms = [m["id"] for m in res.json()["milestones"]]
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+
+    # 1. Uploads answer before any preview exists
+    print("\n[1] Upload response...")
+    photo, card = photo_bytes(), pdf_bytes()
+    res = upload(first_ms, "Photo", "site.jpg", photo, "image/jpeg")
+    evidence = res.json()
+    pdf_res = upload(first_ms, "Inspection Card", "card.pdf", card, "application/pdf")
+    if res.status_code == 200 and pdf_res.status_code == 200 and evidence.get("preview_url") is None:
+        print("PASS: Upload returned without waiting for the preview.")
+    else:
+        print(f"FAIL: Unexpected upload {res.status_code} {res.text[:200]}")
+        return
+
+    # 2. Background rendering fills in preview_url
+    print("\n[2] Background rendering...")
+    rows = wait_for_previews(escrow_id, 2)
+    by_id = {e["id"]: e for e in rows}
+    if by_id[evidence["id"]].get("preview_url") and by_id[pdf_res.json()["id"]].get("preview_url"):
+        print("PASS: Photo thumbnail and PDF first page rendered.")
+    else:
+        print(f"FAIL: Previews not ready: {rows}")
+        return
+
+    from PIL import Image
+    thumb = requests.get(local(by_id[evidence["id"]]["preview_url"]))
+    image = Image.open(io.BytesIO(thumb.content))
+    if image.format == "JPEG" and max(image.size) <= 480 and len(thumb.content) < len(photo) / 10:
+        print(f"PASS: Thumbnail is {image.size[0]}x{image.size[1]}, {len(thumb.content)} of {len(photo)} bytes.")
+    else:
+        print(f"FAIL: Unexpected thumbnail {image.format} {image.size} {len(thumb.content)} bytes")
+    page = Image.open(io.BytesIO(requests.get(local(by_id[pdf_res.json()["id"]]["preview_url"])).content))
+    if page.format == "PNG" and max(page.size) <= 480:
+        print("PASS: PDF preview is a scaled PNG of page one.")
+    else:
+        print(f"FAIL: Unexpected PDF preview {page.format} {page.size}")
+
+    # 3. Same content elsewhere reuses the rendered preview
+    print("\n[3] Deduplicated content...")
+    again = upload(second_ms, "Photo", "site-copy.jpg", photo, "image/jpeg").json()
+    if again.get("preview_url"):
+        print("PASS: Re-uploaded photo has its preview immediately.")
+    else:
+        print(f"FAIL: Expected an immediate preview_url, got {again.get('preview_url')}")
+
+    res = requests.get(f"{BASE_URL}/evidence/does-not-exist/preview", allow_redirects=False)
+    stats = requests.get(f"{BASE_URL}/metrics/evidence-pool", headers=ADMIN).json()
+    previews = stats["jobs"].get("preview", {})
+    if res.status_code == 404 and previews.get("completed", 0) >= 2:
+        print(f"PASS: Metrics report {previews['completed']} renders, avg {previews['avg_ms']} ms.")
+    else:
+        print(f"FAIL: Unexpected 404 check {res.status_code} / stats {stats}")
+    legacy = requests.get(f"{BASE_URL}/metrics/previews", headers=ADMIN).json()
+    if legacy.get("rendered") == previews.get("completed") and legacy.get("renderers") == renderers:
+        print("PASS: Old /metrics/previews route still answers.")
+    else:
+        print(f"FAIL: Unexpected /metrics/previews {legacy}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_previews()
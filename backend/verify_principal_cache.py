@@ -0,0 +1,109 @@
+import requests
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fastapi import HTTPException
+import auth
+import models
+import database
+import dependencies
+from services.principal_service import principal_cache, revocation_list
+
+BASE_URL = "http://localhost:8000"
+USERNAME = "cache_admin"
+
+# Logs in over HTTP, then resolves "the next request" with get_current_user_sync in this process,
+# so the principal cache checked is the one the user changes below invalidate.
+
+def seed_user():
+    db = database.SessionLocal()
+    db.query(models.User).filter(models.User.username == USERNAME).delete(synchronize_session=False)
+    db.add(models.User(username=USERNAME, role="ADMIN", hashed_password=auth.get_password_hash("password123")))
+    db.commit()
+    db.close()
+
+def resolve(token):
+    db = database.SessionLocal()
+    try:
+        return dependencies.get_current_user_sync(token=token, db=db)
+    finally:
+        db.close()
+
+def update_user(**values):
+    db = database.SessionLocal()
+    user = db.query(models.User).filter(models.User.username == USERNAME).one()
+    for name, value in values.items():
+        setattr(user, name, value)
+    db.commit()
+    db.close()
+
+def verify_principal_cache():
+    print("--- Verifying Principal Cache ---")
+    seed_user()
+    stateless = auth.STATELESS_AUTH
+    auth.STATELESS_AUTH = False # the cache serves the DB lookup path
+    try:
+        res = requests.post(f"{BASE_URL}/token", data={"username": USERNAME, "password": "password123"})
+        if res.status_code != 200:
+            print(f"FAIL: Login returned {res.status_code} {res.text}")
+            return
+        token = res.json()["access_token"]
+
+        # 1. Repeat requests are served from the cache
+        print("\n[1] Cache hits...")
+        principal_cache.invalidate(USERNAME)
+        first = resolve(token)
+        hits = principal_cache.stats()["hits"]
+        second = resolve(token)
+        if second is first and principal_cache.stats()["hits"] == hits + 1 and first.role == models.UserRole.ADMIN:
+            print("PASS: Second request resolved from the cache.")
+        else:
+            print(f"FAIL: Expected a cache hit, got {principal_cache.stats()}")
+
+        # 2. Committed changes are visible on the next request
+        print("\n[2] Committed changes...")
+        update_user(role="AGENT")
+        if resolve(token).role == models.UserRole.AGENT:
+            print("PASS: Role change seen by the next request.")
+        else:
+            print("FAIL: Next request still has the cached role.")
+        update_user(is_active=False)
+        try:
+            resolve(token)
+            print("FAIL: Deactivated user still authenticated.")
+        except HTTPException as e:
+            if e.status_code == 401:
+                print("PASS: Deactivation seen by the next request (401).")
+            else:
+                print(f"FAIL: Expected 401, got {e.status_code}")
+        update_user(is_active=True)
+
+        # 3. Flushed but rolled back: nothing changed, nothing is evicted or revoked
+        print("\n[3] Rolled-back change...")
+        cached = resolve(token)
+        invalidations = principal_cache.stats()["invalidations"]
+        db = database.SessionLocal()
+        user = db.query(models.User).filter(models.User.username == USERNAME).one()
+        user.role, user.is_active = "CONTRACTOR", False
+        db.flush()
+        during = principal_cache.get(USERNAME)
+        db.rollback()
+        db.close()
+        after = principal_cache.get(USERNAME)
+        if during is cached and after is cached and principal_cache.stats()["invalidations"] == invalidations:
+            print("PASS: Flush and rollback left the cached principal in place.")
+        else:
+            print(f"FAIL: Cached principal evicted: during={during}, after={after}")
+        if not revocation_list.is_revoked(USERNAME, int(time.time()) + 1) and resolve(token).role == models.UserRole.AGENT:
+            print("PASS: Rolled-back deactivation revoked nothing.")
+        else:
+            print("FAIL: Rolled-back change revoked or altered the principal.")
+    finally:
+        auth.STATELESS_AUTH = stateless
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_principal_cache()
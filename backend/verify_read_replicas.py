@@ -0,0 +1,79 @@
+import requests
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+
+# Uses a second, NON-replicated local database as the "replica", so rows written through the
+# primary are invisible there. That makes the routing decision observable from outside.
+#
+#   createdb escrow_replica_test
+#   POSTGRES_DB=escrow_replica_test python migrate.py upgrade
+#   POSTGRES_REPLICA_HOSTS=localhost/escrow_replica_test READ_STICKINESS_SECONDS=2 ESCROW_CACHE_MAX_ENTRIES=0 uvicorn main:app
+#
+# (ESCROW_CACHE_MAX_ENTRIES=0: the escrow detail cache would otherwise answer [2] without a replica read)
+STICKINESS_SECONDS = float(os.getenv("READ_STICKINESS_SECONDS", "2"))
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+def verify_read_replicas():
+    print("--- Verifying Read Replica Routing ---")
+    agent = get_auth_headers("alice_agent", "AGENT")
+    custodian = get_auth_headers("title_co", "CUSTODIAN")
+
+    res = requests.post(f"{BASE_URL}/escrows", headers=agent, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "provider_pat",
+        "total_amount": 1000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Invoice"]}]
+    })
+    escrow_id = res.json()["id"]
+
+    print("\n[1] Writer reads own write immediately (primary stickiness)...")
+    res = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=agent)
+    if res.status_code == 200:
+        print("PASS: Read-your-writes served from the primary.")
+    else:
+        print(f"FAIL: Expected 200, got {res.status_code}")
+
+    print("\n[2] Another user's read goes to the replica...")
+    res = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=custodian)
+    if res.status_code == 404:
+        print("PASS: Routed to the replica (row not present there).")
+    else:
+        print(f"FAIL: Expected 404 from the unreplicated test replica, got {res.status_code}")
+
+    print(f"\n[3] Writer's reads return to the replica after {STICKINESS_SECONDS}s...")
+    time.sleep(STICKINESS_SECONDS + 0.5)
+    res = requests.get(f"{BASE_URL}/escrows/{escrow_id}", headers=agent)
+    if res.status_code == 404:
+        print("PASS: Stickiness window expired.")
+    else:
+        print(f"FAIL: Expected 404 after the window, got {res.status_code}")
+
+    print("\n[4] Anonymous read right after a write (read_primary cookie)...")
+    browser = requests.Session() # keeps cookies, like the frontend
+    res = browser.post(f"{BASE_URL}/escrows", headers=agent, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "provider_pat",
+        "total_amount": 500,
+        "milestones": [{"name": "Phase 1", "amount": 500, "required_evidence_types": ["Invoice"]}]
+    })
+    escrow_id = res.json()["id"]
+    pinned = browser.get(f"{BASE_URL}/escrows/{escrow_id}")
+    unpinned = requests.get(f"{BASE_URL}/escrows/{escrow_id}")
+    if pinned.status_code == 200 and unpinned.status_code == 404:
+        print("PASS: Token-less read after the write served from the primary; other clients use the replica.")
+    else:
+        print(f"FAIL: Expected 200/404, got {pinned.status_code}/{unpinned.status_code}")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_read_replicas()
@@ -0,0 +1,141 @@
+import requests
+import sys
+import os
+import hashlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import auth
+
+BASE_URL = "http://localhost:8000"
+
+def get_auth_headers(username, role):
+    token = auth.create_access_token(data={"sub": username, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+AGENT = get_auth_headers("alice_agent", "AGENT")
+CONTRACTOR = get_auth_headers("rick_contractor", "CONTRACTOR")
+INSPECTOR = get_auth_headers("rob_inspector", "INSPECTOR")
+CUSTODIAN = get_auth_headers("title_co", "CUSTODIAN")
+
+def put_chunk(session, index, data, headers=CONTRACTOR, **extra):
+    return requests.put(f"{BASE_URL}/upload-sessions/{session['id']}/chunks/{index}", data=data,
+                        headers={**headers, "Content-Type": "application/octet-stream", **extra})
+
+def chunk(content, session, index):
+    size = session["chunk_bytes"]
+    return content[index * size:(index + 1) * size]
+
+def check(condition, passed, failed):
+    print(f"PASS: {passed}" if condition else f"FAIL: {failed}")
+
+def verify_resumable_uploads():
+    print("--- Verifying Resumable Chunked Uploads ---")
+    res = requests.post(f"{BASE_URL}/escrows", headers=AGENT, json={
+        "buyer_id": "buyer_bob",
+        "provider_id": "rick_contractor",
+        "total_amount": 1000,
+        "milestones": [{"name": "Phase 1", "amount": 1000, "required_evidence_types": ["Inspection Report"]}]
+    })
+    escrow_id = res.json()["id"]
+    milestone_id = res.json()["milestones"][0]["id"]
+    requests.post(f"{BASE_URL}/escrows/{escrow_id}/confirm_funds", headers=CUSTODIAN,
+                  json={"custodian_id": "title_co", "confirmation_code": "WIRE_123"})
+
+    # 1. Create a session
+    print("\n[1] Session setup...")
+    probe = requests.post(f"{BASE_URL}/milestones/{milestone_id}/upload-sessions", headers=CONTRACTOR, json={
+        "filename": "report.pdf", "size_bytes": 1, "source_type": "PDF", "evidence_type": "Inspection Report"
+    }).json()
+    chunk_bytes = probe["chunk_bytes"]
+    requests.delete(f"{BASE_URL}/upload-sessions/{probe['id']}", headers=CONTRACTOR)
+    content = b"%PDF-1.7 " + os.urandom(chunk_bytes * 2 + chunk_bytes // 2)
+    sha256 = hashlib.sha256(content).hexdigest()
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/upload-sessions", headers=CONTRACTOR, json={
+        "filename": "report.pdf", "size_bytes": len(content), "source_type": "PDF",
+        "evidence_type": "Inspection Report", "sha256": sha256
+    })
+    session = res.json()
+    check(res.status_code == 201 and session["total_chunks"] == 3 and session["missing_chunks"] == [0, 1, 2],
+          "Session created with 3 chunks to send.", f"Unexpected session {res.status_code} {session}")
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/upload-sessions", headers=CONTRACTOR, json={
+        "filename": "report.pdf", "size_bytes": len(content), "source_type": "PDF", "evidence_type": "Selfie"
+    })
+    check(res.status_code == 400, "Session for an unrequired evidence type rejected.", f"Expected 400, got {res.status_code}")
+
+    # 2. Out-of-order chunks, a dropped connection, then resume
+    print("\n[2] Flaky connection...")
+    res = put_chunk(session, 2, chunk(content, session, 2))
+    check(res.status_code == 200 and res.json()["missing_chunks"] == [0, 1], "Last chunk accepted first.",
+          f"Unexpected response {res.status_code} {res.text[:200]}")
+    res = put_chunk(session, 0, chunk(content, session, 0)[:1000])
+    check(res.status_code == 400, "Truncated chunk rejected.", f"Expected 400, got {res.status_code}")
+    res = put_chunk(session, 0, chunk(content, session, 0), **{"X-Chunk-SHA256": "0" * 64})
+    check(res.status_code == 400, "Chunk with a wrong checksum rejected.", f"Expected 400, got {res.status_code}")
+
+    status = requests.get(f"{BASE_URL}/upload-sessions/{session['id']}", headers=CONTRACTOR).json()
+    check(status["missing_chunks"] == [0, 1] and status["received_ranges"] == [[2 * chunk_bytes, len(content)]],
+          "Session reports received ranges and missing chunks.", f"Unexpected status {status}")
+    res = requests.post(f"{BASE_URL}/upload-sessions/{session['id']}/complete", headers=CONTRACTOR)
+    check(res.status_code == 409, "Completing with missing chunks refused (409).", f"Expected 409, got {res.status_code}")
+
+    piece = chunk(content, session, 0)
+    put_chunk(session, 0, piece, **{"X-Chunk-SHA256": hashlib.sha256(piece).hexdigest()})
+    put_chunk(session, 1, chunk(content, session, 1))
+    res = put_chunk(session, 1, chunk(content, session, 1)) # re-sent after a lost response
+    check(res.json()["received_bytes"] == len(content) and res.json()["received_ranges"] == [[0, len(content)]],
+          "All chunks received (re-send is harmless).", f"Unexpected status {res.json()}")
+    res = requests.get(f"{BASE_URL}/upload-sessions/{session['id']}", headers=INSPECTOR)
+    check(res.status_code == 403, "Other users cannot see the session.", f"Expected 403, got {res.status_code}")
+
+    # 3. Finalize -> normal evidence + attestation
+    print("\n[3] Completion...")
+    res = requests.post(f"{BASE_URL}/upload-sessions/{session['id']}/complete", headers=CONTRACTOR)
+    evidence = res.json()
+    check(res.status_code == 200 and evidence.get("sha256") == sha256 and evidence.get("size_bytes") == len(content),
+          "Evidence recorded with the assembled file's hash.", f"Unexpected completion {res.status_code} {res.text[:200]}")
+    stored = requests.get(evidence["url"].replace("http://localhost:8000", BASE_URL))
+    check(stored.content == content, "Stored file identical to the uploaded bytes.", "Stored file differs.")
+    logs = requests.get(f"{BASE_URL}/audit-logs", headers=AGENT, params={"limit": 20}).json()
+    check(any(l["entity_id"] == escrow_id and l["event_type"] == "UPLOAD_EVIDENCE" and l["event_data"].get("sha256") == sha256
+              for l in logs), "UPLOAD_EVIDENCE attestation written.", "No UPLOAD_EVIDENCE attestation.")
+    res = requests.post(f"{BASE_URL}/upload-sessions/{session['id']}/complete", headers=CONTRACTOR)
+    check(res.status_code == 200 and res.json()["id"] == evidence["id"], "Retried completion returns the same evidence.",
+          f"Unexpected retry {res.status_code} {res.text[:200]}")
+    res = put_chunk(session, 0, chunk(content, session, 0))
+    check(res.status_code == 409, "Completed session no longer accepts chunks.", f"Expected 409, got {res.status_code}")
+
+    # 4. Declared hash mismatch keeps the session open
+    print("\n[4] Integrity and third-party sessions...")
+    small = b"%PDF-1.4 permit"
+    bad = requests.post(f"{BASE_URL}/milestones/{milestone_id}/upload-sessions", headers=INSPECTOR, json={
+        "filename": "permit.pdf", "size_bytes": len(small), "source_type": "PDF", "sha256": "f" * 64
+    }).json()
+    put_chunk(bad, 0, small, headers=INSPECTOR)
+    res = requests.post(f"{BASE_URL}/upload-sessions/{bad['id']}/complete", headers=INSPECTOR)
+    status = requests.get(f"{BASE_URL}/upload-sessions/{bad['id']}", headers=INSPECTOR).json()
+    check(res.status_code == 400 and status["status"] == "OPEN", "Hash mismatch rejected, session left open.",
+          f"Unexpected {res.status_code} / {status.get('status')}")
+
+    good = requests.post(f"{BASE_URL}/milestones/{milestone_id}/upload-sessions", headers=INSPECTOR, json={
+        "filename": "permit.pdf", "size_bytes": len(small), "source_type": "PDF"
+    }).json()
+    put_chunk(good, 0, small, headers=INSPECTOR)
+    res = requests.post(f"{BASE_URL}/upload-sessions/{good['id']}/complete", headers=INSPECTOR)
+    attested = res.json()
+    check(res.status_code == 200 and res.json()["origin"] == "THIRD_PARTY", "Third-party session recorded as external evidence.",
+          f"Unexpected {res.status_code} {res.text[:200]}")
+    logs = requests.get(f"{BASE_URL}/audit-logs", headers=AGENT, params={"limit": 20}).json()
+    check(any(l["entity_id"] == escrow_id and l["event_type"] == "EVIDENCE_ATTESTED" for l in logs),
+          "EVIDENCE_ATTESTED attestation written.", "No EVIDENCE_ATTESTED attestation.")
+
+    res = requests.post(f"{BASE_URL}/milestones/{milestone_id}/external-evidence", headers=INSPECTOR,
+                        data={"source_type": "PDF"}, files={"file": ("permit-again.pdf", small, "application/pdf")})
+    locations = [requests.get(e["url"].replace("http://localhost:8000", BASE_URL), allow_redirects=False).headers.get("Location")
+                 for e in (res.json(), attested)]
+    check(locations[0] and locations[0] == locations[1], "Form upload of the same bytes shares the session's blob.",
+          "Form upload stored a second copy.")
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_resumable_uploads()
@@ -0,0 +1,135 @@
+import sys
+import os
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+
+import database
+import schemas
+from models import Escrow, Milestone, Evidence, PaymentInstruction, EscrowState, MilestoneStatus, PaymentStatus
+from services import escrow_query_service
+from services.payment_service import payment_service
+from services.ledger_service import list_attestations
+from services.serialization import dumps, orjson
+
+ROWS = 1000
+ROUNDS = 5
+MIN_SPEEDUP = 2.0
+
+def schema_path(schema, items):
+    """What response_model does: validate every row through the orm_mode schema, then encode."""
+    validated = [schemas.from_orm(schema, i) if not isinstance(i, dict) else schema(**i) for i in items]
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode()
+
+def normalized(body):
+    # Child collections have no ORDER BY in either path; compare them as sets
+    def walk(value):
+        if isinstance(value, list):
+            items = [walk(v) for v in value]
+            return sorted(items, key=lambda v: json.dumps(v, sort_keys=True)) if items and isinstance(items[0], dict) and "id" in items[0] else items
+        if isinstance(value, dict):
+            return {k: walk(v) for k, v in value.items()}
+        return value
+    return walk(json.loads(body))
+
+async def best_of(fn):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        body = await fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+async def compare(label, baseline, fast):
+    base_time, base_body = await best_of(baseline)
+    fast_time, fast_body = await best_of(fast)
+    speedup = base_time / fast_time
+    print(f"{label}: schema path {base_time * 1000:.1f}ms, fast path {fast_time * 1000:.1f}ms -> {speedup:.1f}x")
+    if normalized(base_body) == normalized(fast_body):
+        print(f"PASS: {label} payloads identical.")
+    else:
+        print(f"FAIL: {label} payloads differ.")
+    if speedup >= MIN_SPEEDUP:
+        print(f"PASS: {label} at least {MIN_SPEEDUP}x faster.")
+    else:
+        print(f"FAIL: {label} expected >= {MIN_SPEEDUP}x, got {speedup:.1f}x")
+
+async def run(first_escrow_id, ledger_rows):
+    async with database.AsyncSessionLocal() as db:
+        async def escrows_schema():
+            db.expunge_all()
+            escrows, _ = await escrow_query_service.list_escrows_async(db, ROWS, buyer_id="bench_buyer")
+            return schema_path(schemas.Escrow, escrows)
+
+        async def escrows_fast():
+            escrows, _ = await escrow_query_service.list_escrow_rows_async(db, ROWS, buyer_id="bench_buyer")
+            return dumps(escrows)
+
+        async def payments_schema():
+            db.expunge_all()
+            return schema_path(schemas.PaymentInstruction, await payment_service.get_by_escrow_async(db, first_escrow_id))
+
+        async def payments_fast():
+            return dumps(await payment_service.get_by_escrow_rows_async(db, first_escrow_id))
+
+        async def ledger_schema():
+            return schema_path(schemas.AuditLogRead, await list_attestations(0, ROWS))
+
+        async def ledger_fast():
+            return dumps(await list_attestations(0, ROWS))
+
+        print(f"\n[2] GET /escrows ({ROWS} escrows x 3 milestones x 1 evidence)")
+        await compare("Escrow list", escrows_schema, escrows_fast)
+        print(f"\n[3] GET /escrows/{{id}}/payment-instructions ({ROWS} rows)")
+        await compare("Payment instructions", payments_schema, payments_fast)
+        print(f"\n[4] GET /audit-logs ({ROWS} rows)")
+        if ledger_rows >= ROWS:
+            await compare("Audit log", ledger_schema, ledger_fast)
+        else:
+            print(f"SKIP: Ledger has only {ledger_rows} entries (run verify_bulk_import.py first).")
+
+def verify_serialization():
+    print("--- Verifying Fast Serialization Path (Direct DB) ---")
+    print(f"Encoder: {'orjson' if orjson else 'stdlib json (orjson not installed)'}")
+    db = database.SessionLocal()
+    created = []
+    try:
+        print(f"\n[1] Setup: {ROWS} escrows, {ROWS} payment instructions...")
+        now = datetime.utcnow()
+        for i in range(ROWS):
+            escrow = Escrow(id=str(uuid.uuid4()), buyer_id="bench_buyer", provider_id="bench_provider", total_amount=3000.0,
+                            state=EscrowState.FUNDED, version=1, agreement_hash="h", funded_amount=3000.0,
+                            created_at=now - timedelta(seconds=i))
+            db.add(escrow)
+            created.append(escrow.id)
+            for m in range(3):
+                ms = Milestone(id=str(uuid.uuid4()), escrow_id=escrow.id, name=f"Phase {m}", amount=1000.0,
+                               required_evidence_types=["Invoice"], status=MilestoneStatus.EVIDENCE_SUBMITTED)
+                db.add(ms)
+                db.add(Evidence(milestone_id=ms.id, evidence_type="Invoice", url="http://example.com/i.pdf"))
+            db.add(PaymentInstruction(escrow_id=created[0], milestone_id=ms.id, amount=1000.0, payee_name="bench_provider",
+                                      payee_role="CONTRACTOR", payee_reference_id="bench_provider", memo=f"Bench {i}",
+                                      status=PaymentStatus.INSTRUCTED))
+        db.commit()
+        asyncio.run(run(created[0], database.audit_collection.count_documents({})))
+    finally:
+        # Cleanup
+        db.rollback()
+        ms_ids = [m.id for m in db.query(Milestone.id).filter(Milestone.escrow_id.in_(created))]
+        db.query(PaymentInstruction).filter(PaymentInstruction.escrow_id.in_(created)).delete(synchronize_session=False)
+        db.query(Evidence).filter(Evidence.milestone_id.in_(ms_ids)).delete(synchronize_session=False)
+        db.query(Milestone).filter(Milestone.escrow_id.in_(created)).delete(synchronize_session=False)
+        db.query(Escrow).filter(Escrow.id.in_(created)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_serialization()
@@ -0,0 +1,116 @@
+import sys
+import os
+import time
+import calendar
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fastapi import HTTPException
+from jose import jwt
+import auth
+import models
+import database
+import dependencies
+from services.principal_service import RevocationList, revocation_list
+
+# Drives the stateless auth path (signed claims + revocation list) in this process, against the
+# configured database; the API server does not need AUTH_STATELESS.
+USERS = ["stateless_agent", "stateless_other"]
+
+def seed_users():
+    db = database.SessionLocal()
+    db.query(models.User).filter(models.User.username.in_(USERS)).delete(synchronize_session=False)
+    for username in USERS:
+        db.add(models.User(username=username, role="AGENT", organization_id="org_1",
+                           hashed_password=auth.get_password_hash("password123")))
+    db.commit()
+    db.close()
+
+def token_for(username, iat=None):
+    db = database.SessionLocal()
+    user = db.query(models.User).filter(models.User.username == username).one()
+    claims = {"sub": user.username, "role": user.role, "uid": user.id, "org": user.organization_id}
+    db.close()
+    if iat is None:
+        return auth.create_access_token(data=claims)
+    return jwt.encode({**claims, "iat": iat, "exp": iat + 900}, auth.SECRET_KEY, algorithm=auth.ALGORITHM)
+
+def accepted(token):
+    try:
+        dependencies._authenticate(token)
+        return True
+    except HTTPException:
+        return False
+
+def update_user(username, **values):
+    """Commits a change on its own session; returns the user's tokens_valid_after afterwards."""
+    db = database.SessionLocal()
+    user = db.query(models.User).filter(models.User.username == username).one()
+    for name, value in values.items():
+        setattr(user, name, value)
+    db.commit()
+    valid_after = user.tokens_valid_after
+    db.close()
+    return valid_after
+
+def verify_stateless_auth():
+    print("--- Verifying Stateless Auth Revocation ---")
+    seed_users()
+    stateless = auth.STATELESS_AUTH
+    auth.STATELESS_AUTH = True
+    try:
+        # 1. Role change
+        print("\n[1] Role change...")
+        old = token_for("stateless_agent")
+        if accepted(old):
+            print("PASS: Fresh token accepted from its signed claims.")
+        else:
+            print("FAIL: Fresh token rejected.")
+        valid_after = update_user("stateless_agent", role="CUSTODIAN")
+        same_second = token_for("stateless_agent", iat=calendar.timegm(valid_after.utctimetuple()))
+        if not accepted(old) and not accepted(same_second):
+            print("PASS: Tokens issued before the role change (incl. the same second) revoked.")
+        else:
+            print(f"FAIL: Old token accepted={accepted(old)}, same-second token accepted={accepted(same_second)}")
+        time.sleep(1.1)
+        if accepted(token_for("stateless_agent")):
+            print("PASS: Token issued after the change accepted.")
+        else:
+            print("FAIL: New token rejected.")
+
+        # 2. Deactivation and deletion
+        print("\n[2] Deactivation...")
+        token = token_for("stateless_agent")
+        update_user("stateless_agent", is_active=False)
+        if not accepted(token) and not accepted(token_for("stateless_agent")):
+            print("PASS: Deactivation revokes every token.")
+        else:
+            print("FAIL: Deactivated user's token accepted.")
+        db = database.SessionLocal()
+        db.query(models.User).filter(models.User.username == "stateless_agent").delete(synchronize_session=False)
+        db.commit()
+        db.close()
+        revocation_list.refresh()
+        if not accepted(token):
+            print("PASS: Revocation of a deleted user survives a refresh.")
+        else:
+            print("FAIL: Deleted user's token accepted after a refresh.")
+
+        # 3. Another worker's revocation list catches up through its refresh thread
+        print("\n[3] Refresh thread...")
+        worker = RevocationList(refresh_seconds=0.2)
+        worker.start()
+        issued = int(time.time())
+        update_user("stateless_other", role="INSPECTOR")
+        time.sleep(0.6)
+        worker.stop()
+        if worker.is_revoked("stateless_other", issued) and not worker.is_revoked("stateless_other", issued + 2):
+            print("PASS: Change made on another session reached the other list within its refresh interval.")
+        else:
+            print(f"FAIL: Other list not refreshed: {worker.stats()}")
+    finally:
+        auth.STATELESS_AUTH = stateless
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    verify_stateless_auth()
@@ -0,0 +1,204 @@
+import requests
+import threading
+import time
+import json
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import models
+import auth
+from database import SessionLocal
+from services.webhook_service import WebhookService, sign_payload, SIGNATURE_HEADER, TIMESTAMP_HEADER
+
+# Configuration
+# The stub receiver is on loopback, which webhook URLs may not target by default:
+#   WEBHOOK_ALLOWED_HOSTS=127.0.0.1 uvicorn main:app
+BASE_URL = "http://localhost:8000"
+STUB_PORT = 8765
+STUB_URL = f"http://127.0.0.1:{STUB_PORT}"
+REBIND_HOST = "rebind.webhooks.test" # resolves to a public address at registration, to the stub afterwards
+SECRET = "verify-secret"
+
+# --- Local stub receiver ---
+received = []
+bad_signatures = []
+flaky_hits = {}
+lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, so pooled connections are reused
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        expected = sign_payload(SECRET, self.headers.get(TIMESTAMP_HEADER, ""), body)
+
+        with lock:
+            if self.headers.get(SIGNATURE_HEADER) != expected:
+                bad_signatures.append(body)
+            # /flaky fails twice per delivery before accepting
+            if self.path == "/flaky":
+                delivery = self.headers.get("X-VeriDraw-Delivery")
+                flaky_hits[delivery] = flaky_hits.get(delivery, 0) + 1
+                status = 503 if flaky_hits[delivery] <= 2 else 200
+            elif self.path == "/dead":
+                status = 500
+            else:
+                status = 200
+            if status == 200:
+                received.append((self.path, json.loads(body)))
+
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", STUB_PORT), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def get_token(username, password):
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"Failed to login {username}: {response.text}")
+        return None
+    return response.json()["access_token"]
+
+def seed_users():
+    db = SessionLocal()
+    users = [
+        ("alice_agent", "password123", "AGENT"),
+        ("title_co", "password123", "CUSTODIAN"),
+    ]
+    for username, password, role in users:
+        user = db.query(models.User).filter(models.User.username == username).first()
+        if not user:
+            print(f"Creating user {username}...")
+            db.add(models.User(username=username, hashed_password=auth.get_password_hash(password), role=role))
+        else:
+            user.role = role
+    db.commit()
+    db.close()
+
+def fake_notification(user_id, i):
+    return {"_id": f"n{i}", "user_id": user_id, "event_type": "CREATE", "escrow_id": f"e{i}",
+            "message": "bench", "severity": "INFO", "created_at": "now"}
+
+def main():
+    print("--- Starting Webhook Delivery Verification ---")
+    stub = start_stub()
+    seed_users()
+
+    # 1. End-to-end: register via API, trigger an event, expect a signed push
+    print("\n[1] Registering webhook for Custodian...")
+    custodian_token = get_token("title_co", "password123")
+    agent_token = get_token("alice_agent", "password123")
+    headers = {"Authorization": f"Bearer {custodian_token}"}
+    res = requests.post(f"{BASE_URL}/webhooks", json={"url": f"{STUB_URL}/e2e", "secret": SECRET}, headers=headers)
+    if res.status_code != 200:
+        print(f"FAIL: Registration error: {res.text}")
+        return
+    webhook_id = res.json()["id"]
+
+    print("\n[2] Creating Escrow (should notify Custodian)...")
+    escrow_data = {"buyer_id": "alice_buyer", "provider_id": "rick_contractor", "total_amount": 1000.0,
+                   "milestones": [{"name": "M1", "amount": 1000.0, "required_evidence_types": ["PHOTO"]}]}
+    res = requests.post(f"{BASE_URL}/escrows", json=escrow_data, headers={"Authorization": f"Bearer {agent_token}"})
+    escrow_id = res.json()["id"]
+
+    deadline = time.time() + 5
+    while time.time() < deadline and not any(p == "/e2e" and b["escrow_id"] == escrow_id for p, b in received):
+        time.sleep(0.05)
+    if any(p == "/e2e" and b["escrow_id"] == escrow_id for p, b in received):
+        print("PASS: Signed webhook received for new escrow.")
+    else:
+        print("FAIL: Webhook not received.")
+    requests.delete(f"{BASE_URL}/webhooks/{webhook_id}", headers=headers)
+
+    # 2. Retries + dead letters, using a local service instance with fast backoff
+    service = WebhookService(max_attempts=3, backoff_base=0.05)
+    flaky = service.register("verify_flaky", "AGENT", f"{STUB_URL}/flaky", SECRET)
+    dead = service.register("verify_dead", "AGENT", f"{STUB_URL}/dead", SECRET)
+
+    print("\n[3] Flaky endpoint (fails twice, then accepts)...")
+    service.dispatch([fake_notification("verify_flaky", 0)])
+    service.wait_idle(timeout=10)
+    if any(p == "/flaky" for p, _ in received):
+        print("PASS: Delivered after retries with backoff.")
+    else:
+        print("FAIL: Flaky delivery never succeeded.")
+
+    print("\n[4] Dead endpoint (always 500)...")
+    service.dispatch([fake_notification("verify_dead", 0)])
+    service.wait_idle(timeout=10)
+    if service.get_dead_letters("verify_dead"):
+        print("PASS: Exhausted delivery moved to dead-letter store.")
+    else:
+        print("FAIL: No dead letter recorded.")
+
+    if not bad_signatures:
+        print("PASS: All HMAC signatures valid.")
+    else:
+        print(f"FAIL: {len(bad_signatures)} deliveries with invalid signature.")
+
+    # 3. Subscription URLs and ids from clients
+    print("\n[5] Rejected URLs and malformed ids...")
+    rejected = {}
+    for url in ["http://localhost:9000/hook", "http://169.254.169.254/latest/meta-data/", "http://10.0.0.5/hook",
+                "http://[::1]/hook", "ftp://example.com/hook"]:
+        rejected[url] = requests.post(f"{BASE_URL}/webhooks", json={"url": url}, headers=headers).status_code
+    if all(code == 400 for code in rejected.values()):
+        print("PASS: Non-http(s), loopback, link-local and private targets rejected (400).")
+    else:
+        print(f"FAIL: Expected 400 for every URL, got {rejected}")
+    removed = requests.delete(f"{BASE_URL}/webhooks/not-an-object-id", headers=headers)
+    redelivered = requests.post(f"{BASE_URL}/webhooks/dead-letters/not-an-object-id/redeliver", headers=headers)
+    if removed.status_code == 404 and redelivered.status_code == 404:
+        print("PASS: Malformed webhook / dead-letter ids are 404s.")
+    else:
+        print(f"FAIL: Expected 404/404, got {removed.status_code}/{redelivered.status_code}")
+
+    print("\n[6] Host rebinding to a private address after registration...")
+    real_getaddrinfo = socket.getaddrinfo
+    answer = {"ip": "93.184.216.34"}
+
+    def rebinding(host, *args, **kwargs):
+        return real_getaddrinfo(answer["ip"] if host == REBIND_HOST else host, *args, **kwargs)
+
+    socket.getaddrinfo = rebinding
+    try:
+        rebind_service = WebhookService(max_attempts=1)
+        rebound = rebind_service.register("verify_rebind", "AGENT", f"http://{REBIND_HOST}:{STUB_PORT}/rebind", SECRET)
+        answer["ip"] = "127.0.0.1"
+        rebind_service.dispatch([fake_notification("verify_rebind", 0)])
+        rebind_service.wait_idle(timeout=10)
+    finally:
+        socket.getaddrinfo = real_getaddrinfo
+    dead_letters = rebind_service.get_dead_letters("verify_rebind")
+    if not any(p == "/rebind" for p, _ in received) and dead_letters and "non-public" in dead_letters[0]["last_error"]:
+        print("PASS: Delivery refused to connect to the rebound loopback address.")
+    else:
+        print(f"FAIL: Expected a refused delivery, got {[l.get('last_error') for l in dead_letters]}")
+
+    # 4. Throughput
+    print("\n[7] Throughput (2000 deliveries, pooled keep-alive)...")
+    bench = WebhookService()
+    bench_sub = bench.register("verify_bench", "AGENT", f"{STUB_URL}/bench", SECRET)
+    start = time.perf_counter()
+    bench.dispatch([fake_notification("verify_bench", i) for i in range(2000)])
+    bench.wait_idle(timeout=120)
+    elapsed = time.perf_counter() - start
+    stats = bench.stats()
+    print(f"Delivered {stats['delivered']} in {elapsed:.2f}s -> {stats['delivered'] / elapsed:.0f} deliveries/sec")
+
+    # Cleanup
+    for svc, sub in [(service, flaky), (service, dead), (rebind_service, rebound), (bench, bench_sub)]:
+        svc.remove(str(sub["_id"]), sub["user_id"])
+    service.dead_letter_collection.delete_many({"user_id": {"$in": ["verify_flaky", "verify_dead", "verify_rebind"]}})
+    stub.shutdown()
+
+    print("\n--- Verification Complete ---")
+
+if __name__ == "__main__":
+    main()
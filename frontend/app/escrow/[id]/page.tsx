@@ -7,6 +7,14 @@ import { useAuth } from '@/context/AuthContext';
 interface Evidence {
     evidence_type: string;
     url: string;
+    preview_url?: string | null; // thumbnail / first PDF page, once rendered
+    // Extracted from the file after upload
+    captured_at?: string | null;
+    captured_at_utc?: boolean | null; // false/unknown: camera-local time, shown as recorded
+    gps_latitude?: number | null;
+    gps_longitude?: number | null;
+    page_count?: number | null;
+    has_text?: boolean | null;
 }
 interface Milestone {
     id: string;
@@ -38,6 +46,12 @@ interface PaymentInstruction {
 
 }
 
+// UTC capture times are shown in the viewer's zone; camera-local ones (no offset or GPS clock) as recorded
+function formatCaptureTime(capturedAt: string, isUtc?: boolean | null) {
+    if (isUtc) return new Date(capturedAt + 'Z').toLocaleString();
+    return `${capturedAt.replace('T', ' ')} (camera time)`;
+}
+
 export default function EscrowDetail() {
     const params = useParams();
     const router = useRouter(); // Use correct import from next/navigation
@@ -59,7 +73,10 @@ export default function EscrowDetail() {
 
 
     const refreshData = () => {
-        fetch(`http://localhost:8000/escrows/${params.id}`)
+        // Send the token so reads right after our own writes are served from the primary
+        fetch(`http://localhost:8000/escrows/${params.id}`, {
+            headers: token ? { "Authorization": `Bearer ${token}` } : {}
+        })
             .then(res => res.json())
             .then(data => {
                 setEscrow(data);
@@ -477,11 +494,27 @@ export default function EscrowDetail() {
                                                 ) : (
                                                     <div className="w-3 h-3 rounded-full bg-green-500" />
                                                 )}
+                                                {ev.preview_url && (
+                                                    <a href={ev.url} target="_blank">
+                                                        <img src={ev.preview_url} alt={ev.evidence_type} loading="lazy" className="w-12 h-12 object-cover rounded border border-gray-200" />
+                                                    </a>
+                                                )}
                                                 <div>
                                                     <a href={ev.url} target="_blank" className="text-blue-600 hover:underline block">{ev.evidence_type}</a>
                                                     {(ev as any).submitted_by_role && (
                                                         <span className="text-xs text-gray-500 block">Attached by {(ev as any).submitted_by_role}</span>
                                                     )}
+                                                    {ev.gps_latitude != null && ev.gps_longitude != null && (
+                                                        <span className="text-xs text-gray-500 block">
+                                                            Geotagged {ev.gps_latitude.toFixed(5)}, {ev.gps_longitude.toFixed(5)}
+                                                            {ev.captured_at ? ` · taken ${formatCaptureTime(ev.captured_at, ev.captured_at_utc)}` : ''}
+                                                        </span>
+                                                    )}
+                                                    {ev.page_count != null && (
+                                                        <span className="text-xs text-gray-500 block">
+                                                            {ev.page_count} page{ev.page_count === 1 ? '' : 's'}{ev.has_text === false ? ' · scanned (no text)' : ''}
+                                                        </span>
+                                                    )}
                                                 </div>
                                             </div>
                                             <div className="text-xs text-gray-400 text-right">